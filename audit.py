@@ -1,7 +1,6 @@
 import random
 import sys
 import structlog
-import numpy as np
 
 from src.logging_config import setup_logging
 from src.extractors.mysql_extractor import MySQLExtractor
@@ -11,7 +10,6 @@ from src.loaders.neo4j_ratings_loader import Neo4jRatingsLoader
 
 SAMPLE_SIZE_PERCENT = 0.05
 
-setup_logging()
 log = structlog.get_logger()
 
 
@@ -129,7 +127,7 @@ class Auditor:
             )
             return
 
-        expected_avg = round(float(np.mean(raw_ratings)), 5)
+        expected_avg = round(float(sum(raw_ratings) / len(raw_ratings)), 5)
         expected_count = len(raw_ratings)
 
         summary_record = self._get_postgres_summary_record(movie_id)
@@ -199,6 +197,10 @@ class Auditor:
                 cursor.execute(query)
                 source_records = cursor.fetchall()
 
+        dead_lettered = {
+            (entry["row"]["userId"], entry["row"]["movieId"])
+            for entry in self.neo4j_ratings_loader.dead_letters.pending()
+        }
         for src_rating_record in source_records:
             user_id = src_rating_record["userId"]
             movie_id = src_rating_record["movieId"]
@@ -209,6 +211,7 @@ class Auditor:
                     "Mismatch: Rating missing in Neo4j",
                     user_id=user_id,
                     movie_id=movie_id,
+                    dead_lettered=(user_id, movie_id) in dead_lettered,
                 )
                 self.neo4j_ratings_mismatches += 1
             else:
@@ -250,6 +253,7 @@ class Auditor:
 
 
 if __name__ == "__main__":
+    setup_logging()
     auditor = Auditor()
     success = auditor.run()
     if not success:
@@ -0,0 +1,350 @@
+import random
+import re
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.config import settings
+from src.interfaces.extractor import Extractor
+from src.interfaces.loader import Loader
+from src.rating_codec import HALF_STARS_KEY
+
+RATING_VALUES = [Decimal(str(value / 2)) for value in range(1, 11)]
+
+
+class InjectedFailure(Exception):
+    pass
+
+
+class LatencyModel:
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        jitter_seconds: float = 0.0,
+        bytes_per_second: Optional[float] = None,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.bytes_per_second = bytes_per_second
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def call(self, num_bytes: int = 0):
+        with self._lock:
+            jitter = self._random.uniform(0, self.jitter_seconds)
+            fail = self._random.random() < self.failure_rate
+        delay = self.latency_seconds + jitter
+        if self.bytes_per_second:
+            delay += num_bytes / self.bytes_per_second
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise InjectedFailure("Injected failure")
+
+
+def generate_movies(num_movies: int) -> List[Dict]:
+    return [
+        {
+            "movieId": movie_id,
+            "title": f"Movie {movie_id} (1995)",
+            "genres": "Adventure|Animation|Children|Comedy|Fantasy",
+        }
+        for movie_id in range(1, num_movies + 1)
+    ]
+
+
+def generate_ratings(
+    num_ratings: int, num_movies: int, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    ratings_per_user = 50
+    num_users = max(1, num_ratings // ratings_per_user)
+    user_ids = np.repeat(np.arange(1, num_users + 1), ratings_per_user)[:num_ratings]
+    movie_ids = np.empty(len(user_ids), dtype=np.int64)
+    for start in range(0, len(user_ids), ratings_per_user):
+        count = min(ratings_per_user, len(user_ids) - start)
+        movie_ids[start : start + count] = np.sort(
+            rng.choice(num_movies, size=count, replace=False) + 1
+        )
+    half_stars = rng.integers(1, 11, size=len(user_ids))
+    timestamps = rng.integers(828124615, 1537799250, size=len(user_ids))
+    return user_ids, movie_ids, half_stars, timestamps
+
+
+class FakeMoviesExtractor(Extractor):
+    def __init__(self, num_movies: int, latency: LatencyModel = None):
+        self.rows = generate_movies(num_movies)
+        self.latency = latency or LatencyModel()
+
+    def read_batch(self, batch_size: int, high_water_mark: int) -> List[Dict]:
+        rows = self.rows[high_water_mark : high_water_mark + batch_size]
+        batch = [dict(row) for row in rows]
+        self.latency.call(num_bytes=len(batch) * 80)
+        return batch
+
+    def get_next_high_water_mark(self, batch: List[Dict]) -> int:
+        if not batch:
+            return 0
+        return batch[-1]["movieId"]
+
+    def get_source_high_water_mark(self) -> int:
+        return len(self.rows)
+
+
+class FakeRatingsExtractor(Extractor):
+    def __init__(
+        self, num_ratings: int, num_movies: int, latency: LatencyModel = None, seed=0
+    ):
+        self.user_ids, self.movie_ids, self.half_stars, self.timestamps = (
+            generate_ratings(num_ratings, num_movies, seed)
+        )
+        self._keys = self.user_ids * (num_movies + 1) + self.movie_ids
+        self._key_base = num_movies + 1
+        self.latency = latency or LatencyModel()
+        self.compact = settings.etl.compact_ratings
+        self.rating_key = HALF_STARS_KEY if self.compact else "rating"
+
+    def read_batch(
+        self, batch_size: int, high_water_mark: Tuple[int, int]
+    ) -> List[Dict]:
+        key = high_water_mark[0] * self._key_base + high_water_mark[1]
+        start = int(np.searchsorted(self._keys, key, side="right"))
+        end = start + batch_size
+        batch = [
+            {
+                "userId": user_id,
+                "movieId": movie_id,
+                self.rating_key: (
+                    half_stars if self.compact else RATING_VALUES[half_stars - 1]
+                ),
+                "timestamp": timestamp,
+            }
+            for user_id, movie_id, half_stars, timestamp in zip(
+                self.user_ids[start:end].tolist(),
+                self.movie_ids[start:end].tolist(),
+                self.half_stars[start:end].tolist(),
+                self.timestamps[start:end].tolist(),
+            )
+        ]
+        self.latency.call(num_bytes=len(batch) * 24)
+        return batch
+
+    def get_next_high_water_mark(self, batch: List[Dict]) -> Tuple[int, int]:
+        if not batch:
+            return (0, 0)
+        return (batch[-1]["userId"], batch[-1]["movieId"])
+
+    def get_source_high_water_mark(self) -> Tuple[int, int]:
+        return (int(self.user_ids[-1]), int(self.movie_ids[-1]))
+
+
+class FakeLoader(Loader):
+    def __init__(self, initial_hwm: Any = 0, latency: LatencyModel = None):
+        self.initial_hwm = initial_hwm
+        self.latency = latency or LatencyModel()
+        self.rows_written = 0
+
+    def get_high_water_mark(self) -> Any:
+        return self.initial_hwm
+
+    def write_batch(self, batch: List[Dict]) -> None:
+        self.latency.call(num_bytes=len(batch) * 24)
+        self.rows_written += len(batch)
+
+
+class FakeDatabase:
+    def __init__(
+        self,
+        movie_ids: np.ndarray,
+        half_stars: np.ndarray,
+        user_ids: np.ndarray = None,
+        timestamps: np.ndarray = None,
+    ):
+        order = np.argsort(movie_ids, kind="stable")
+        self.movie_ids = movie_ids[order]
+        self.half_stars = half_stars[order]
+        self.user_ids = (
+            np.ones(len(order), dtype=np.int64) if user_ids is None else user_ids
+        )[order]
+        self.timestamps = (
+            np.zeros(len(order), dtype=np.int64) if timestamps is None else timestamps
+        )[order]
+        self.batches: Dict[int, Tuple[int, int]] = {}
+        self.statuses: Dict[int, str] = {}
+        self.staging_rows = 0
+        self.rows_written = 0
+
+    def plan_batches(self, batch_size: int) -> List[int]:
+        self.batches.clear()
+        max_movie_id = int(self.movie_ids[-1])
+        for batch_id, start in enumerate(range(1, max_movie_id + 1, batch_size), 1):
+            self.batches[batch_id] = (start, min(start + batch_size - 1, max_movie_id))
+            self.statuses[batch_id] = "pending"
+        return list(self.batches)
+
+    def ratings_between(self, start_id: int, end_id: int) -> List[Tuple]:
+        lo = np.searchsorted(self.movie_ids, start_id, side="left")
+        hi = np.searchsorted(self.movie_ids, end_id, side="right")
+        return [
+            (movie_id, user_id, half_stars, timestamp)
+            for movie_id, user_id, half_stars, timestamp in zip(
+                self.movie_ids[lo:hi].tolist(),
+                self.user_ids[lo:hi].tolist(),
+                self.half_stars[lo:hi].tolist(),
+                self.timestamps[lo:hi].tolist(),
+            )
+        ]
+
+
+class FakeCursor:
+    def __init__(self, connection: "FakeConnection"):
+        self.connection = connection
+        self.description = None
+        self.rowcount = -1
+        self._results: List[Tuple] = []
+        self._pending_args: List[Any] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def mogrify(self, sql, args) -> bytes:
+        self._pending_args.append(args)
+        return sql if isinstance(sql, bytes) else sql.encode()
+
+    def execute(self, sql, params=None):
+        if isinstance(sql, bytes):
+            sql = sql.decode()
+        database = self.connection.database
+        self._results = []
+        self.description = None
+
+        if sql.lstrip().upper().startswith("INSERT"):
+            rows = len(self._pending_args) or 1
+            self.connection.latency.call(num_bytes=rows * 24)
+            self.rowcount = rows
+            if "ratings_summary_staging" in sql:
+                database.staging_rows += rows
+            else:
+                database.rows_written += rows
+            self._pending_args = []
+            return
+
+        self.connection.latency.call()
+        if sql.lstrip().upper().startswith("UPDATE JOBS.AGGREGATION_BATCHES"):
+            status, batch_id = params
+            database.statuses[batch_id] = status
+            self.rowcount = 1
+        elif "start_movie_id, end_movie_id" in sql:
+            self._results = [database.batches[params[0]]]
+        elif re.search(r"FROM movies\.ratings WHERE movie_id BETWEEN", sql):
+            self._results = database.ratings_between(*params)
+            self.description = [
+                ("movie_id",),
+                ("user_id",),
+                ("half_stars",),
+                ("timestamp",),
+            ]
+            self.connection.latency.call(num_bytes=len(self._results) * 12)
+        elif "relkind" in sql:
+            self._results = [("r",)]
+        elif "MAX(" in sql.upper():
+            self._results = [(None, None)]
+        self.rowcount = len(self._results)
+
+    def fetchone(self):
+        return self._results[0] if self._results else None
+
+    def fetchall(self):
+        return list(self._results)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    encoding = "UTF8"
+
+    def __init__(self, database: FakeDatabase, latency: LatencyModel = None):
+        self.database = database
+        self.latency = latency or LatencyModel()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.latency.call()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeResult:
+    def __init__(self, record: Optional[Dict] = None, records: List[Dict] = ()):
+        self.record = record
+        self.records = list(records)
+
+    def single(self):
+        return self.record
+
+    def __iter__(self):
+        return iter(self.records)
+
+
+class FakeSession:
+    def __init__(self, latency: LatencyModel, movie_ids=None):
+        self.latency = latency
+        self.movie_ids = movie_ids
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, query: str, **params):
+        batch = params.get("batch") or []
+        self.latency.call(num_bytes=len(batch) * 48)
+        self.rows_written += len(batch)
+        if "RETURN m.movieId" not in query:
+            return FakeResult()
+        return FakeResult(
+            records=[
+                {"movieId": row["movieId"]}
+                for row in batch
+                if self.movie_ids is None or row["movieId"] in self.movie_ids
+            ]
+        )
+
+    def close(self):
+        pass
+
+
+class FakeDriver:
+    def __init__(self, latency: LatencyModel = None, movie_ids=None):
+        self.latency = latency or LatencyModel()
+        self.movie_ids = movie_ids
+
+    def session(self, **kwargs):
+        return FakeSession(self.latency, self.movie_ids)
+
+    def close(self):
+        pass
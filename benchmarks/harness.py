@@ -0,0 +1,269 @@
+import multiprocessing
+import platform
+import resource
+import statistics
+import time
+from datetime import datetime, timezone
+from queue import Empty
+from typing import Dict, List
+
+import numpy as np
+import structlog
+
+from benchmarks.fakes import (
+    FakeConnection,
+    FakeDatabase,
+    FakeDriver,
+    FakeLoader,
+    FakeMoviesExtractor,
+    FakeRatingsExtractor,
+    LatencyModel,
+    generate_ratings,
+)
+from src.aggregators.ratings_aggregator import RatingsAggregator
+from src.conductor import PipelineConductor
+
+log = structlog.get_logger()
+
+SINKS = ("fake", "postgres", "neo4j")
+CHILD_POLL_SECONDS = 1.0
+
+_worker_database = None
+_worker_latency = None
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    if not samples:
+        return 0.0
+    return float(np.percentile(samples, percentile))
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    return resource.getrusage(who).ru_maxrss / 1024.0
+
+
+def _timed(write_batch, samples: List[float], committed: List[int]):
+    def wrapper(batch):
+        started = time.perf_counter()
+        try:
+            result = write_batch(batch)
+        finally:
+            samples.append(time.perf_counter() - started)
+        committed.append(len(batch))
+        return result
+
+    return wrapper
+
+
+def _make_loader(
+    sink: str, dataset: str, latency: LatencyModel, database, num_movies: int = 0
+):
+    initial_hwm = (0, 0) if dataset == "ratings" else 0
+    if sink == "fake":
+        return FakeLoader(initial_hwm=initial_hwm, latency=latency)
+
+    if sink == "postgres":
+        if dataset == "ratings":
+            from src.loaders.postgres_ratings_loader import PostgresRatingsLoader
+
+            loader = PostgresRatingsLoader()
+        else:
+            from src.loaders.postgres_loader import PostgresLoader
+
+            loader = PostgresLoader()
+        loader._get_connection = lambda: FakeConnection(database, latency)
+        loader.get_high_water_mark = lambda: initial_hwm
+        loader.initial_load.mode = "off"
+        return loader
+
+    if dataset == "ratings":
+        from src.loaders.neo4j_ratings_loader import Neo4jRatingsLoader
+
+        loader = Neo4jRatingsLoader()
+        loader.fetch_movie_ids = lambda: range(1, num_movies + 1)
+    else:
+        from src.loaders.neo4j_loader import Neo4jLoader
+
+        loader = Neo4jLoader()
+    loader.driver.close()
+    loader.driver = FakeDriver(latency)
+    loader.get_high_water_mark = lambda: initial_hwm
+    return loader
+
+
+def run_transfer_scenario(scenario: Dict) -> Dict:
+    extract_latency = LatencyModel(
+        latency_seconds=scenario["extract_latency_ms"] / 1000.0,
+        bytes_per_second=scenario.get("bytes_per_second"),
+        seed=scenario["seed"],
+    )
+    if scenario["dataset"] == "ratings":
+        extractor = FakeRatingsExtractor(
+            num_ratings=scenario["rows"],
+            num_movies=scenario["movies"],
+            latency=extract_latency,
+            seed=scenario["seed"],
+        )
+    else:
+        extractor = FakeMoviesExtractor(scenario["rows"], latency=extract_latency)
+
+    database = FakeDatabase(np.array([1]), np.array([1]))
+    samples: List[float] = []
+    committed: List[int] = []
+    loaders = []
+    for index in range(scenario["workers"]):
+        latency = LatencyModel(
+            latency_seconds=scenario["write_latency_ms"] / 1000.0,
+            bytes_per_second=scenario.get("bytes_per_second"),
+            failure_rate=scenario["failure_rate"],
+            seed=scenario["seed"] + index,
+        )
+        loader = _make_loader(
+            scenario["sink"],
+            scenario["dataset"],
+            latency,
+            database,
+            num_movies=scenario["movies"],
+        )
+        loader.preferred_write_size = scenario.get("write_size")
+        loader.write_batch = _timed(loader.write_batch, samples, committed)
+        loaders.append(loader)
+
+    conductor = PipelineConductor(extractor=extractor, loaders=loaders)
+    conductor.batch_size = scenario["batch_size"]
+
+    started = time.perf_counter()
+    failures = conductor.run_concurrently()
+    elapsed = time.perf_counter() - started
+
+    result = _result(scenario, sum(committed), elapsed, samples, _peak_rss_mb())
+    result["expected_rows"] = scenario["rows"] * scenario["workers"]
+    result["failures"] = failures
+    return result
+
+
+def _init_aggregation_worker(scenario: Dict):
+    global _worker_database, _worker_latency
+    user_ids, movie_ids, half_stars, timestamps = generate_ratings(
+        scenario["rows"], scenario["movies"], scenario["seed"]
+    )
+    _worker_database = FakeDatabase(movie_ids, half_stars, user_ids, timestamps)
+    _worker_database.plan_batches(scenario["batch_size"])
+    _worker_latency = LatencyModel(
+        latency_seconds=scenario["read_latency_ms"] / 1000.0,
+        bytes_per_second=scenario.get("bytes_per_second"),
+        seed=scenario["seed"],
+    )
+
+
+def _aggregation_worker(batch_id: int):
+    aggregator = RatingsAggregator()
+    aggregator._get_connection = lambda: FakeConnection(
+        _worker_database, _worker_latency
+    )
+    started = time.perf_counter()
+    aggregator.process_batch(batch_id)
+    return time.perf_counter() - started
+
+
+def run_aggregation_scenario(scenario: Dict) -> Dict:
+    _, movie_ids, half_stars, _ = generate_ratings(
+        scenario["rows"], scenario["movies"], scenario["seed"]
+    )
+    batch_ids = FakeDatabase(movie_ids, half_stars).plan_batches(scenario["batch_size"])
+
+    context = multiprocessing.get_context("fork")
+    started = time.perf_counter()
+    with context.Pool(
+        processes=scenario["workers"],
+        initializer=_init_aggregation_worker,
+        initargs=(scenario,),
+    ) as pool:
+        samples = pool.map(_aggregation_worker, batch_ids)
+    elapsed = time.perf_counter() - started
+
+    peak_rss = max(_peak_rss_mb(), _peak_rss_mb(resource.RUSAGE_CHILDREN))
+    return _result(scenario, scenario["rows"], elapsed, samples, peak_rss)
+
+
+def _result(scenario, rows, elapsed, samples, peak_rss_mb) -> Dict:
+    return {
+        "scenario": scenario,
+        "rows": rows,
+        "batches": len(samples),
+        "seconds": round(elapsed, 6),
+        "rows_per_second": round(rows / elapsed, 2) if elapsed else 0.0,
+        "batch_latency_p50_ms": round(_percentile(samples, 50) * 1000, 3),
+        "batch_latency_p99_ms": round(_percentile(samples, 99) * 1000, 3),
+        "batch_latency_mean_ms": round(
+            statistics.fmean(samples) * 1000 if samples else 0.0, 3
+        ),
+        "peak_rss_mb": round(peak_rss_mb, 2),
+    }
+
+
+def _run_in_child(target, scenario: Dict, queue):
+    try:
+        queue.put(target(scenario))
+    except Exception as e:
+        queue.put({"scenario": scenario, "error": str(e)})
+
+
+def run_isolated(target, scenario: Dict) -> Dict:
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_run_in_child, args=(target, scenario, queue))
+    process.start()
+    while True:
+        try:
+            result = queue.get(timeout=CHILD_POLL_SECONDS)
+            break
+        except Empty:
+            if not process.is_alive():
+                process.join()
+                return {
+                    "scenario": scenario,
+                    "error": f"benchmark process exited with code {process.exitcode}",
+                }
+    process.join()
+    return result
+
+
+def run_benchmarks(
+    stages: List[str],
+    batch_sizes: List[int],
+    worker_counts: List[int],
+    base_scenario: Dict,
+) -> Dict:
+    results = []
+    for stage in stages:
+        target = (
+            run_transfer_scenario if stage == "transfer" else run_aggregation_scenario
+        )
+        for batch_size in batch_sizes:
+            for workers in worker_counts:
+                scenario = dict(
+                    base_scenario, stage=stage, batch_size=batch_size, workers=workers
+                )
+                log.info("Running benchmark scenario", **scenario)
+                result = run_isolated(target, scenario)
+                log.info(
+                    "Benchmark scenario finished",
+                    stage=stage,
+                    batch_size=batch_size,
+                    workers=workers,
+                    rows_per_second=result.get("rows_per_second"),
+                    error=result.get("error"),
+                    failures=result.get("failures"),
+                )
+                results.append(result)
+
+    return {
+        "metadata": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": multiprocessing.cpu_count(),
+        },
+        "results": results,
+    }
@@ -0,0 +1,56 @@
+import argparse
+import sys
+
+import structlog
+
+from config.config import settings
+from src.run_ledger import RunLedger, detect_regressions
+
+log = structlog.get_logger()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare the latest run in the ledger with a rolling baseline."
+    )
+    parser.add_argument("--ledger", default=settings.ledger.path)
+    parser.add_argument(
+        "--role", choices=["main", "aggregation"], nargs="+", default=["main"]
+    )
+    parser.add_argument("--window", type=int, default=settings.ledger.window)
+    parser.add_argument(
+        "--z-threshold", type=float, default=settings.ledger.z_threshold
+    )
+    parser.add_argument("--min-change", type=float, default=settings.ledger.min_change)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    from src.logging_config import setup_logging
+
+    args = parse_args(argv)
+    setup_logging()
+    records = RunLedger(args.ledger).load()
+    if not records:
+        log.warn("Run ledger is empty, nothing to compare", path=args.ledger)
+        return 0
+
+    regressed = False
+    for role in args.role:
+        regressions = detect_regressions(
+            records,
+            role,
+            window=args.window,
+            z_threshold=args.z_threshold,
+            min_change=args.min_change,
+        )
+        for regression in regressions:
+            log.error("Performance regression detected", role=role, **regression)
+        if not regressions:
+            log.info("No performance regressions detected", role=role)
+        regressed = regressed or bool(regressions)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
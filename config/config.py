@@ -7,6 +7,12 @@ class MySQLSettings(BaseSettings):
     password: str
     host: str
     db: str
+    max_rows_per_second: float = 0
+    max_queries_per_second: float = 0
+    max_concurrency: int = 0
+    latency_tolerance: float = 2.0
+    replica_host: str = ""
+    replica_max_lag_seconds: float = 30.0
 
     model_config = ConfigDict(env_prefix="MYSQL_")
 
@@ -16,6 +22,11 @@ class PostgresSettings(BaseSettings):
     password: str
     host: str
     db: str
+    write_batch_size: int = 20000
+    flush_interval: float = 10.0
+    initial_load: str = "auto"
+    parallel_maintenance_workers: int = 4
+    maintenance_work_mem: str = "1GB"
 
     model_config = ConfigDict(env_prefix="POSTGRES_")
 
@@ -24,21 +35,125 @@ class Neo4jSettings(BaseSettings):
     user: str
     password: str
     uri: str
+    write_batch_size: int = 5000
+    flush_interval: float = 10.0
+    check_movie_ids: bool = True
+    dead_letter_path: str = ".chariot_cache/dead_letters/neo4j_ratings.jsonl"
 
     model_config = ConfigDict(env_prefix="NEO4J_")
 
 
 class EtlSettings(BaseSettings):
     batch_size: int
+    adaptive_batching: bool = False
+    min_batch_size: int = 100
+    max_batch_size: int = 50000
+    target_batch_seconds: float = 5.0
+    memory_limit_mb: float = 0
+    batch_state_path: str = ""
+    compact_ratings: bool = False
+    loader_processes: bool = False
+    loader_start_method: str = "forkserver"
 
     model_config = ConfigDict(env_prefix="ETL_")
 
 
+class CacheSettings(BaseSettings):
+    enabled: bool = False
+    directory: str = ".chariot_cache"
+    max_bytes: int = 1024 * 1024 * 1024
+
+    model_config = ConfigDict(env_prefix="CACHE_")
+
+
+class SpillSettings(BaseSettings):
+    enabled: bool = False
+    directory: str = ".chariot_spill"
+    max_bytes: int = 10 * 1024 * 1024 * 1024
+    consumer_ttl_seconds: float = 7 * 24 * 3600
+
+    model_config = ConfigDict(env_prefix="SPILL_")
+
+
+class MetricsSettings(BaseSettings):
+    port: int = 0
+    summary_path: str = ""
+
+    model_config = ConfigDict(env_prefix="METRICS_")
+
+
+class ProfilingSettings(BaseSettings):
+    enabled: bool = False
+    sample_rate: float = 1.0
+    trace_memory: bool = False
+    output_dir: str = "profiles"
+
+    model_config = ConfigDict(env_prefix="PROFILE_")
+
+
+class TracingSettings(BaseSettings):
+    enabled: bool = False
+    output_dir: str = "traces"
+
+    model_config = ConfigDict(env_prefix="TRACE_")
+
+
+class AggregationSettings(BaseSettings):
+    processes: int = 0
+    start_method: str = "forkserver"
+    batch_width: int = 1000
+    vacuum_before_plan: bool = True
+    streaming: bool = False
+    checkpoint_path: str = ".chariot_cache/streaming_aggregation.npz"
+    checkpoint_interval: float = 30.0
+    rollups: str = "user,genre,month"
+    shared_dataset: bool = False
+
+    model_config = ConfigDict(env_prefix="AGGREGATION_")
+
+
+class SimilaritySettings(BaseSettings):
+    method: str = "cosine"
+    top_k: int = 20
+    min_score: float = 0.0
+    chunk_size: int = 1000
+    processes: int = 0
+
+    model_config = ConfigDict(env_prefix="SIMILARITY_")
+
+
+class LedgerSettings(BaseSettings):
+    path: str = ".chariot_cache/run_ledger.jsonl"
+    window: int = 10
+    z_threshold: float = 3.0
+    min_change: float = 0.1
+    max_row_ratio: float = 2.0
+
+    model_config = ConfigDict(env_prefix="LEDGER_")
+
+
+class LoggingSettings(BaseSettings):
+    level: str = "INFO"
+    background: bool = False
+    sample_rates: str = ""
+
+    model_config = ConfigDict(env_prefix="LOG_")
+
+
 class Settings(BaseSettings):
     mysql: MySQLSettings = MySQLSettings()
     postgres: PostgresSettings = PostgresSettings()
     neo4j: Neo4jSettings = Neo4jSettings()
     etl: EtlSettings = EtlSettings()
+    cache: CacheSettings = CacheSettings()
+    spill: SpillSettings = SpillSettings()
+    metrics: MetricsSettings = MetricsSettings()
+    profiling: ProfilingSettings = ProfilingSettings()
+    tracing: TracingSettings = TracingSettings()
+    aggregation: AggregationSettings = AggregationSettings()
+    similarity: SimilaritySettings = SimilaritySettings()
+    ledger: LedgerSettings = LedgerSettings()
+    log: LoggingSettings = LoggingSettings()
 
 
 settings = Settings()
@@ -1,60 +1,247 @@
+import argparse
+import sys
+import time
 import structlog
-import subprocess
+from typing import List
 
-from src.logging_config import setup_logging
-from scripts.neo4j_init import initialize_neo4j
+from config.config import settings
+from src import metrics, profiling, run_ledger, tracing
+from src.scheduler import SUCCEEDED, StageNode, StageScheduler
 
-from src.extractors.mysql_extractor import MySQLExtractor
-from src.extractors.mysql_ratings_extractor import MySQLRatingsExtractor
-from src.loaders.postgres_loader import PostgresLoader
-from src.loaders.postgres_ratings_loader import PostgresRatingsLoader
-from src.loaders.neo4j_loader import Neo4jLoader
-from src.loaders.neo4j_ratings_loader import Neo4jRatingsLoader
-from src.conductor import PipelineConductor
+STAGES = ["movies", "ratings", "aggregate", "sync", "similarity", "audit"]
+DEFAULT_STAGES = ["movies", "ratings", "aggregate"]
+NEO4J_STAGES = {"movies", "ratings", "sync", "similarity", "audit"}
 
-setup_logging()
-initialize_neo4j()
 log = structlog.get_logger()
 
 
-def main():
-    log.info("--- Chariot Data Pipeline: Starting Full Run ---")
+def build_extractor(extractor):
+    if settings.cache.enabled:
+        from src.extractors.cached_extractor import CachedExtractor
 
-    log.info("--- Stage 1: Transferring core movie data ---")
-    movies_extractor = MySQLExtractor()
-    postgres_movies_loader = PostgresLoader()
-    neo4j_movies_loader = Neo4jLoader()
-    movies_conductor = PipelineConductor(
-        extractor=movies_extractor,
-        loaders=[postgres_movies_loader, neo4j_movies_loader],
-    )
-    movies_conductor.run_concurrently()
-    neo4j_movies_loader.close()
+        extractor = CachedExtractor(extractor)
+    if settings.spill.enabled:
+        from src.extractors.spilling_extractor import SpillingExtractor
 
-    log.info("--- Stage 2: Transferring raw ratings data ---")
-    ratings_extractor = MySQLRatingsExtractor()
-    postgres_ratings_loader = PostgresRatingsLoader()
-    neo4j_ratings_loader = Neo4jRatingsLoader()
+        extractor = SpillingExtractor(extractor)
+    return extractor
+
+
+def build_transfer_node(
+    name: str,
+    extractor,
+    loader_factory,
+    depends_on=(),
+    isolated: bool = None,
+    consumer: str = None,
+):
+    if isolated is None:
+        isolated = settings.etl.loader_processes
+    extractor.register_consumer(consumer or loader_factory.__name__)
+
+    def run():
+        from src.conductor import PipelineConductor
+
+        if isolated:
+            from src.loaders.process_loader import ProcessLoader
+
+            loader = ProcessLoader(loader_factory)
+        else:
+            loader = loader_factory()
+        try:
+            conductor = PipelineConductor(extractor=extractor, loaders=[loader])
+            failures = conductor.run_concurrently()
+        finally:
+            if hasattr(loader, "close"):
+                loader.close()
+        if failures:
+            raise RuntimeError(f"Transfer {name} failed: {failures}")
+
+    return StageNode(name, run, depends_on)
+
+
+def streams_aggregation(stages: List[str]) -> bool:
+    return settings.aggregation.streaming and "ratings" in stages
+
+
+def run_aggregate_stage(pool):
+    from run_aggregation import run_aggregation
+
+    run_aggregation(pool=pool)
+
+
+def run_sync_stage():
+    from run_summary_sync import run_summary_sync
+
+    run_summary_sync()
+
+
+def run_similarity_stage():
+    from run_similarity import run_similarity
+
+    run_similarity()
+
+
+def run_audit_stage():
+    from audit import Auditor
+
+    if not Auditor().run():
+        raise RuntimeError("Audit found mismatches")
 
-    ratings_conductor = PipelineConductor(
-        extractor=ratings_extractor,
-        loaders=[postgres_ratings_loader, neo4j_ratings_loader],
-    )
-    ratings_conductor.run_concurrently()
-    neo4j_ratings_loader.close()
 
-    log.info("--- Stage 3: Launching parallel ratings aggregation subprocess ---")
-    result = subprocess.run(
-        ["python", "run_aggregation.py"], capture_output=True, text=True
+def build_stage_graph(stages: List[str], pool=None) -> List[StageNode]:
+    nodes = []
+    if "movies" in stages:
+        from src.extractors.mysql_extractor import MySQLExtractor
+        from src.loaders.neo4j_loader import Neo4jLoader
+        from src.loaders.postgres_loader import PostgresLoader
+
+        movies_extractor = build_extractor(MySQLExtractor())
+        nodes.append(
+            build_transfer_node("movies:postgres", movies_extractor, PostgresLoader)
+        )
+        nodes.append(build_transfer_node("movies:neo4j", movies_extractor, Neo4jLoader))
+
+    if "ratings" in stages:
+        from src.extractors.mysql_ratings_extractor import MySQLRatingsExtractor
+        from src.loaders.neo4j_ratings_loader import Neo4jRatingsLoader
+        from src.loaders.postgres_ratings_loader import PostgresRatingsLoader
+
+        ratings_extractor = build_extractor(MySQLRatingsExtractor())
+        postgres_ratings_loader = PostgresRatingsLoader
+        streaming = streams_aggregation(stages)
+        if streaming:
+            from src.aggregators.streaming_aggregator import StreamingRatingsAggregator
+
+            streaming_aggregator = StreamingRatingsAggregator(
+                PostgresRatingsLoader(), ratings_extractor
+            )
+
+            def postgres_ratings_loader():
+                return streaming_aggregator
+
+        nodes.append(
+            build_transfer_node(
+                "ratings:postgres",
+                ratings_extractor,
+                postgres_ratings_loader,
+                isolated=False if streaming else None,
+                consumer=streaming_aggregator.name if streaming else None,
+            )
+        )
+        nodes.append(
+            build_transfer_node(
+                "ratings:neo4j",
+                ratings_extractor,
+                Neo4jRatingsLoader,
+                depends_on=["movies:neo4j"],
+            )
+        )
+
+    if "aggregate" in stages and streams_aggregation(stages):
+        nodes.append(
+            StageNode(
+                "aggregate",
+                streaming_aggregator.write_summary,
+                depends_on=["movies:postgres", "ratings:postgres"],
+            )
+        )
+    elif "aggregate" in stages:
+        nodes.append(
+            StageNode(
+                "aggregate",
+                lambda: run_aggregate_stage(pool),
+                depends_on=["movies:postgres", "ratings:postgres"],
+            )
+        )
+
+    if "sync" in stages:
+        nodes.append(
+            StageNode("sync", run_sync_stage, depends_on=["aggregate", "movies:neo4j"])
+        )
+
+    if "similarity" in stages:
+        nodes.append(
+            StageNode(
+                "similarity",
+                run_similarity_stage,
+                depends_on=["ratings:postgres", "movies:neo4j"],
+            )
+        )
+
+    if "audit" in stages:
+        nodes.append(
+            StageNode(
+                "audit", run_audit_stage, depends_on=[node.name for node in nodes]
+            )
+        )
+
+    names = {node.name for node in nodes}
+    for node in nodes:
+        node.depends_on = [dep for dep in node.depends_on if dep in names]
+    return nodes
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Chariot data pipeline.")
+    parser.add_argument(
+        "stages",
+        nargs="*",
+        metavar="STAGE",
+        help=f"Stages to run, in pipeline order: {', '.join(STAGES)} "
+        f"(default: {' '.join(DEFAULT_STAGES)})",
     )
-    log.info("Aggregation subprocess stdout", output=result.stdout)
-    if result.returncode != 0:
-        log.error("Aggregation subprocess FAILED", stderr=result.stderr)
-    else:
-        log.info("Aggregation subprocess completed successfully.")
+    parser.add_argument("--profile", action="store_true", default=None)
+    args = parser.parse_args(argv)
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    selected = set(args.stages or DEFAULT_STAGES)
+    args.stages = [stage for stage in STAGES if stage in selected]
+    return args
+
+
+def main(argv=None) -> int:
+    from src.logging_config import setup_logging
+
+    args = parse_args(argv)
+    started_at = time.time()
+    setup_logging()
+    profiling.configure_from_settings(role="main", enabled=args.profile)
+    if settings.metrics.port:
+        metrics.start_http_server(settings.metrics.port)
+    run_id = tracing.init(role="main")
+    log.info("--- Chariot Data Pipeline: Starting Run ---", stages=args.stages)
+
+    pool = None
+    with tracing.span("pipeline.run", stages=",".join(args.stages)):
+        if "aggregate" in args.stages and not streams_aggregation(args.stages):
+            from run_aggregation import WarmWorkerPool
+
+            pool = WarmWorkerPool()
+        try:
+            if NEO4J_STAGES.intersection(args.stages):
+                from scripts.neo4j_init import initialize_neo4j
+
+                initialize_neo4j()
+
+            scheduler = StageScheduler(build_stage_graph(args.stages, pool))
+            statuses = scheduler.run()
+        finally:
+            if pool is not None:
+                pool.close()
+
+    success = all(status == SUCCEEDED for status in statuses.values())
+    log.info("--- Chariot Data Pipeline: Run Finished ---", success=success)
+    profiling.flush()
+    run_ledger.record_run("main", run_id, started_at, success, stages=args.stages)
 
-    log.info("--- Chariot Data Pipeline: Run Finished ---")
+    if settings.metrics.summary_path:
+        metrics.registry.write_summary(settings.metrics.summary_path)
+    if settings.tracing.enabled:
+        tracing.merge_trace(settings.tracing.output_dir, run_id)
+    return 0 if success else 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,30 +1,141 @@
+import argparse
+import functools
 import multiprocessing
-import psycopg2
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
 import structlog
 
 from config.config import settings
-from src.logging_config import setup_logging
-from src.aggregators.ratings_aggregator import RatingsAggregator
+from src import logging_config, metrics, profiling, run_ledger, tracing
+
+WORKER_PRELOAD = ["run_aggregation", "src.aggregators.ratings_aggregator"]
+SHARED_DATASET_FETCH_SIZE = 100_000
 
 log = structlog.get_logger()
 
 
+def get_worker_context():
+    start_method = settings.aggregation.start_method
+    if start_method not in multiprocessing.get_all_start_methods():
+        log.warn(
+            "Start method unavailable, using platform default",
+            start_method=start_method,
+        )
+        return multiprocessing.get_context()
+    context = multiprocessing.get_context(start_method)
+    if start_method == "forkserver":
+        context.set_forkserver_preload(WORKER_PRELOAD)
+    return context
+
+
+class WarmWorkerPool:
+    def __init__(self, processes: int = None):
+        self.processes = (
+            processes or settings.aggregation.processes or (multiprocessing.cpu_count())
+        )
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._future = self._executor.submit(
+            self._create_pool,
+            profiling.worker_config(),
+            tracing.worker_config(),
+            logging_config.worker_config(),
+        )
+        log.info("Warming aggregation worker pool", processes=self.processes)
+
+    def _create_pool(
+        self, profiling_config: dict, tracing_config: dict, log_config: dict
+    ):
+        started = time.perf_counter()
+        pool = get_worker_context().Pool(
+            processes=self.processes,
+            initializer=init_worker,
+            initargs=(profiling_config, tracing_config, log_config),
+        )
+        log.info(
+            "Aggregation worker pool ready",
+            processes=self.processes,
+            startup_seconds=round(time.perf_counter() - started, 3),
+        )
+        return pool
+
+    def get(self):
+        return self._future.result()
+
+    def close(self):
+        try:
+            if self._future.exception() is not None:
+                return
+            pool = self._future.result()
+            pool.close()
+            pool.join()
+        finally:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def plan_movie_ranges(
+    min_movie_id: int, max_movie_id: int, width: int
+) -> List[Tuple[int, int]]:
+    if min_movie_id is None:
+        return []
+    first = min_movie_id // width * width
+    return [
+        (max(start_id, min_movie_id), min(start_id + width - 1, max_movie_id))
+        for start_id in range(first, max_movie_id + 1, width)
+    ]
+
+
 class AggregationDispatcher:
-    def __init__(self):
+    def __init__(self, pool: WarmWorkerPool = None):
         self.db_config = {
             "user": settings.postgres.user,
             "password": settings.postgres.password,
             "host": settings.postgres.host,
             "dbname": settings.postgres.db,
         }
-        self.num_processes = multiprocessing.cpu_count()
+        self.pool = pool
+        self.batch_width = settings.aggregation.batch_width
+        self.shared_dataset = settings.aggregation.shared_dataset
+        self.num_processes = (
+            pool.processes
+            if pool
+            else settings.aggregation.processes or multiprocessing.cpu_count()
+        )
         log.info("Aggregation Dispatcher initialized", num_processes=self.num_processes)
 
     def _get_connection(self):
+        import psycopg2
+
         return psycopg2.connect(**self.db_config)
 
+    def vacuum_ratings(self):
+        conn = self._get_connection()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute("VACUUM (ANALYZE) movies.ratings;")
+            log.info("Vacuumed movies.ratings for index-only range scans.")
+        finally:
+            conn.close()
+
+    @metrics.AGGREGATION_STAGE_SECONDS.time(stage="plan")
     def pre_process_create_batches(self):
+        from psycopg2 import extras
+        from src.aggregators.rollups import configured_rollups, truncate_staging
+        from src.loaders.postgres_ratings_loader import (
+            get_partition_ranges,
+            is_partitioned,
+        )
+
         log.info("Starting pre-processing: creating job batches.")
+        if settings.aggregation.vacuum_before_plan:
+            self.vacuum_ratings()
         conn = self._get_connection()
         try:
             with conn.cursor() as cursor:
@@ -33,25 +144,30 @@ class AggregationDispatcher:
                     "TRUNCATE TABLE jobs.aggregation_batches RESTART IDENTITY;"
                 )
                 cursor.execute("TRUNCATE TABLE movies.ratings_summary_staging;")
-
-                cursor.execute(
-                    "SELECT MIN(movie_id), MAX(movie_id) FROM movies.movies;"
-                )
-                min_movie_id, max_movie_id = cursor.fetchone()
-
-                log.info("Movie ID range found", min=min_movie_id, max=max_movie_id)
-
-                batch_size = 1000
-                for start_id in range(min_movie_id, max_movie_id + 1, batch_size):
-                    end_id = start_id + batch_size - 1
-                    if end_id > max_movie_id:
-                        end_id = max_movie_id
-
-                    insert_query = """
-                        INSERT INTO jobs.aggregation_batches (start_movie_id, end_movie_id)
-                        VALUES (%s, %s);
-                    """
-                    cursor.execute(insert_query, (start_id, end_id))
+                cursor.execute("TRUNCATE TABLE movies.monthly_raters_staging;")
+                truncate_staging(cursor, configured_rollups())
+
+                if is_partitioned(cursor):
+                    ranges = [
+                        (start_id, end_id - 1)
+                        for start_id, end_id in get_partition_ranges(cursor)
+                    ]
+                    log.info("Planning one batch per partition", num_ranges=len(ranges))
+                else:
+                    cursor.execute(
+                        "SELECT MIN(movie_id), MAX(movie_id) FROM movies.movies;"
+                    )
+                    min_movie_id, max_movie_id = cursor.fetchone()
+                    log.info("Movie ID range found", min=min_movie_id, max=max_movie_id)
+                    ranges = plan_movie_ranges(
+                        min_movie_id, max_movie_id, self.batch_width
+                    )
+
+                insert_query = """
+                    INSERT INTO jobs.aggregation_batches (start_movie_id, end_movie_id)
+                    VALUES %s;
+                """
+                extras.execute_values(cursor, insert_query, ranges)
 
             conn.commit()
             log.info("Successfully created job batches.")
@@ -62,6 +178,7 @@ class AggregationDispatcher:
         finally:
             conn.close()
 
+    @metrics.AGGREGATION_STAGE_SECONDS.time(stage="aggregate")
     def run_parallel_aggregation(self):
         log.info("Starting parallel aggregation process.")
         conn = self._get_connection()
@@ -80,12 +197,116 @@ class AggregationDispatcher:
 
         log.info("Distributing tasks to worker pool", num_batches=len(pending_batches))
 
-        with multiprocessing.Pool(processes=self.num_processes) as pool:
-            pool.map(worker_process, pending_batches)
-
-        log.info("All worker processes have completed.")
+        metrics.AGGREGATION_PENDING_BATCHES.set(len(pending_batches))
+        busy_seconds = 0.0
+        started = time.perf_counter()
+        errors = []
+        dataset = self.load_shared_dataset() if self.shared_dataset else None
+        pool = self.pool or WarmWorkerPool(self.num_processes)
+        try:
+            for worker_metrics, elapsed, error in pool.get().imap_unordered(
+                functools.partial(
+                    worker_process,
+                    traceparent=tracing.worker_traceparent(),
+                    dataset=dataset.descriptor if dataset else None,
+                ),
+                pending_batches,
+            ):
+                metrics.registry.merge(worker_metrics)
+                metrics.AGGREGATION_PENDING_BATCHES.dec()
+                busy_seconds += elapsed
+                if error is not None:
+                    errors.append(error)
+        finally:
+            if pool is not self.pool:
+                pool.close()
+            if dataset is not None:
+                dataset.unlink()
+
+        wall_seconds = time.perf_counter() - started
+        utilization = busy_seconds / (wall_seconds * self.num_processes)
+        metrics.AGGREGATION_WORKER_UTILIZATION.set(round(utilization, 4))
+        if errors:
+            raise errors[0]
+        log.info("All worker processes have completed.", worker_utilization=utilization)
+
+    @metrics.AGGREGATION_STAGE_SECONDS.time(stage="load")
+    def load_shared_dataset(self):
+        import numpy as np
+        from src.aggregators.shared_dataset import COLUMNS, SharedRatingsDataset
+        from src.rating_codec import POSTGRES_HALF_STARS, check_half_star_rows
 
+        conn = self._get_connection()
+        try:
+            conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM movies.ratings WHERE rating IS NOT NULL;"
+                )
+                length = cursor.fetchone()[0]
+            dataset = SharedRatingsDataset.create(length)
+            try:
+                offset = 0
+                with conn.cursor(name="shared_dataset") as cursor:
+                    cursor.itersize = SHARED_DATASET_FETCH_SIZE
+                    cursor.execute(
+                        f"SELECT movie_id, user_id, {POSTGRES_HALF_STARS}, timestamp "
+                        "FROM movies.ratings WHERE rating IS NOT NULL "
+                        "ORDER BY movie_id"
+                    )
+                    while True:
+                        rows = cursor.fetchmany(SHARED_DATASET_FETCH_SIZE)
+                        if not rows:
+                            break
+                        check_half_star_rows(rows)
+                        block = np.array(rows, dtype=np.int64)
+                        end = offset + len(rows)
+                        for position, (name, _) in enumerate(COLUMNS):
+                            dataset.columns[name][offset:end] = block[:, position]
+                        offset = end
+            except Exception:
+                dataset.unlink()
+                raise
+        finally:
+            conn.close()
+        log.info(
+            "Loaded ratings into shared memory",
+            num_ratings=length,
+            megabytes=round(dataset.nbytes / (1024 * 1024), 1),
+        )
+        return dataset
+
+    def _promote_monthly_raters(self, conn) -> int:
+        from psycopg2 import Binary, extras
+        from src.aggregators.sketches import HyperLogLog
+
+        merged = {}
+        with conn.cursor(name="monthly_rater_sketches") as cursor:
+            cursor.itersize = 1000
+            cursor.execute("SELECT month, sketch FROM movies.monthly_raters_staging;")
+            for month, sketch in cursor:
+                sketch = HyperLogLog.from_bytes(sketch)
+                if month in merged:
+                    merged[month].merge(sketch)
+                else:
+                    merged[month] = sketch
+
+        with conn.cursor() as cursor:
+            cursor.execute("TRUNCATE TABLE movies.monthly_raters;")
+            extras.execute_values(
+                cursor,
+                "INSERT INTO movies.monthly_raters (month, distinct_raters, sketch) VALUES %s",
+                [
+                    (month, sketch.estimate(), Binary(sketch.to_bytes()))
+                    for month, sketch in sorted(merged.items())
+                ],
+            )
+        return len(merged)
+
+    @metrics.AGGREGATION_STAGE_SECONDS.time(stage="promote")
     def finalize_promotion(self):
+        from src.aggregators.rollups import configured_rollups, promote
+
         log.info("Starting final data promotion.")
         conn = self._get_connection()
         try:
@@ -96,16 +317,29 @@ class AggregationDispatcher:
 
                 cursor.execute(
                     """
-                    INSERT INTO movies.ratings_summary (movie_id, average_rating, rating_count)
-                    SELECT movie_id, average_rating, rating_count
+                    INSERT INTO movies.ratings_summary (movie_id, average_rating, rating_count, median_rating, p90_rating, rating_histogram)
+                    SELECT movie_id, average_rating, rating_count, median_rating, p90_rating, rating_histogram
                     FROM movies.ratings_summary_staging;
                 """
                 )
 
                 promoted_rows = cursor.rowcount
 
-                conn.commit()
-                log.info("Data promotion successful.", promoted_rows=promoted_rows)
+            promoted_months = self._promote_monthly_raters(conn)
+
+            promoted_rollups = {}
+            with conn.cursor() as cursor:
+                for rollup in configured_rollups():
+                    promoted_rollups[rollup.name] = promote(cursor, rollup)
+
+            conn.commit()
+            metrics.AGGREGATION_PROMOTED_ROWS.set(promoted_rows)
+            log.info(
+                "Data promotion successful.",
+                promoted_rows=promoted_rows,
+                promoted_months=promoted_months,
+                promoted_rollups=promoted_rollups,
+            )
 
         except Exception as e:
             conn.rollback()
@@ -115,24 +349,79 @@ class AggregationDispatcher:
             conn.close()
 
 
-def worker_process(batch_id: int):
-    aggregator = RatingsAggregator()
-    aggregator.process_batch(batch_id)
+def init_worker(profiling_config: dict, tracing_config: dict, log_config: dict):
+    logging_config.setup_worker_logging(**log_config)
+    metrics.registry.reset()
+    profiling.configure(**profiling_config)
+    tracing.init(role="worker", **tracing_config)
 
 
-def main():
-    setup_logging()
-    log.info("--- Starting Aggregation Pipeline ---")
-    dispatcher = AggregationDispatcher()
+def worker_process(batch_id: int, traceparent: str = None, dataset: dict = None):
+    from src.aggregators.ratings_aggregator import RatingsAggregator
+    from src.aggregators.shared_dataset import attach_cached
 
-    dispatcher.pre_process_create_batches()
+    started = time.perf_counter()
+    error = None
+    try:
+        aggregator = RatingsAggregator()
+        with tracing.attach(traceparent), tracing.span(
+            "aggregation.batch", batch_id=batch_id
+        ):
+            with profiling.profiled("aggregation.batch"):
+                aggregator.process_batch(
+                    batch_id, attach_cached(dataset) if dataset else None
+                )
+    except Exception as e:
+        error = e
+    profiling.flush()
+    return metrics.registry.drain(), time.perf_counter() - started, error
 
-    dispatcher.run_parallel_aggregation()
 
-    dispatcher.finalize_promotion()
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the ratings aggregation.")
+    parser.add_argument("--profile", action="store_true", default=None)
+    return parser.parse_args(argv)
+
+
+def run_aggregation(pool: WarmWorkerPool = None):
+    log.info("--- Starting Aggregation Pipeline ---")
+    with tracing.span("aggregation.run"):
+        dispatcher = AggregationDispatcher(pool=pool)
 
+        with tracing.span("aggregation.plan"):
+            with profiling.profiled("aggregation.plan"):
+                dispatcher.pre_process_create_batches()
+
+        with tracing.span("aggregation.dispatch"):
+            dispatcher.run_parallel_aggregation()
+
+        with tracing.span("aggregation.promote"):
+            with profiling.profiled("aggregation.promote"):
+                dispatcher.finalize_promotion()
     log.info("--- Aggregation Pipeline Finished ---")
 
 
+def main(argv=None):
+    from src.logging_config import setup_logging
+
+    args = parse_args(argv)
+    started_at = time.time()
+    setup_logging()
+    profiling.configure_from_settings(role="aggregation", enabled=args.profile)
+    run_id = tracing.init(role="aggregation")
+    if settings.metrics.port:
+        metrics.start_http_server(settings.metrics.port)
+    success = False
+    try:
+        run_aggregation()
+        success = True
+    finally:
+        profiling.flush()
+        run_ledger.record_run("aggregation", run_id, started_at, success)
+
+    if settings.metrics.summary_path:
+        metrics.registry.write_summary(settings.metrics.summary_path)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,64 @@
+import argparse
+import json
+
+import structlog
+
+from src.logging_config import setup_logging
+from benchmarks.harness import SINKS, run_benchmarks
+
+log = structlog.get_logger()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the transfer and aggregation stages against local fakes."
+    )
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=["transfer", "aggregation"],
+        default=["transfer", "aggregation"],
+    )
+    parser.add_argument("--dataset", choices=["movies", "ratings"], default="ratings")
+    parser.add_argument("--sink", choices=SINKS, default="fake")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--movies", type=int, default=10_000)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1000, 5000])
+    parser.add_argument("--write-size", type=int, default=None)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--extract-latency-ms", type=float, default=1.0)
+    parser.add_argument("--write-latency-ms", type=float, default=2.0)
+    parser.add_argument("--read-latency-ms", type=float, default=1.0)
+    parser.add_argument("--bytes-per-second", type=float, default=None)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+
+    base_scenario = {
+        "dataset": args.dataset,
+        "sink": args.sink,
+        "rows": args.rows,
+        "write_size": args.write_size,
+        "movies": args.movies,
+        "extract_latency_ms": args.extract_latency_ms,
+        "write_latency_ms": args.write_latency_ms,
+        "read_latency_ms": args.read_latency_ms,
+        "bytes_per_second": args.bytes_per_second,
+        "failure_rate": args.failure_rate,
+        "seed": args.seed,
+    }
+    report = run_benchmarks(args.stages, args.batch_sizes, args.workers, base_scenario)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    log.info("Benchmark results written", path=args.output)
+
+
+if __name__ == "__main__":
+    main()
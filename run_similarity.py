@@ -0,0 +1,251 @@
+import argparse
+import functools
+import multiprocessing
+import time
+import uuid
+from typing import Dict, List
+import structlog
+
+from config.config import settings
+from src import logging_config, metrics, profiling, tracing
+
+RATINGS_FETCH_SIZE = 100_000
+
+log = structlog.get_logger()
+
+_worker_matrix = None
+
+
+def plan_row_chunks(num_rows: int, chunk_size: int) -> List[tuple]:
+    return [
+        (start, min(start + chunk_size, num_rows))
+        for start in range(0, num_rows, chunk_size)
+    ]
+
+
+def init_similarity_worker(
+    matrix, profiling_config: dict, tracing_config: dict, log_config: dict
+):
+    global _worker_matrix
+    _worker_matrix = matrix
+    logging_config.setup_worker_logging(**log_config)
+    metrics.registry.reset()
+    profiling.configure(**profiling_config)
+    tracing.init(role="similarity-worker", **tracing_config)
+
+
+def similarity_worker(
+    chunk: tuple, top_k: int, min_score: float, traceparent: str = None
+):
+    from src.aggregators.similarity import top_k_similar
+
+    start, end = chunk
+    with tracing.attach(traceparent), tracing.span(
+        "similarity.chunk", start=start, end=end
+    ):
+        with profiling.profiled("similarity.chunk"):
+            neighbors = top_k_similar(_worker_matrix, start, end, top_k, min_score)
+    profiling.flush()
+    return neighbors
+
+
+class SimilarityBuilder:
+    def __init__(self):
+        self.db_config = {
+            "user": settings.postgres.user,
+            "password": settings.postgres.password,
+            "host": settings.postgres.host,
+            "dbname": settings.postgres.db,
+        }
+        self.method = settings.similarity.method
+        self.top_k = settings.similarity.top_k
+        self.min_score = settings.similarity.min_score
+        self.chunk_size = settings.similarity.chunk_size
+        self.write_batch_size = settings.neo4j.write_batch_size
+        self.num_processes = (
+            settings.similarity.processes or multiprocessing.cpu_count()
+        )
+        log.info(
+            "Similarity Builder initialized",
+            method=self.method,
+            top_k=self.top_k,
+            num_processes=self.num_processes,
+        )
+
+    def _get_connection(self):
+        import psycopg2
+
+        return psycopg2.connect(**self.db_config)
+
+    @metrics.AGGREGATION_STAGE_SECONDS.time(stage="similarity_load")
+    def load_ratings(self):
+        import numpy as np
+        from src.rating_codec import POSTGRES_HALF_STARS, check_half_star_rows
+
+        chunks = []
+        conn = self._get_connection()
+        try:
+            with conn.cursor(name="similarity_ratings") as cursor:
+                cursor.itersize = RATINGS_FETCH_SIZE
+                cursor.execute(
+                    f"SELECT movie_id, user_id, {POSTGRES_HALF_STARS} "
+                    "FROM movies.ratings WHERE rating IS NOT NULL"
+                )
+                while True:
+                    rows = cursor.fetchmany(RATINGS_FETCH_SIZE)
+                    if not rows:
+                        break
+                    check_half_star_rows(rows)
+                    chunks.append(np.array(rows, dtype=np.int64))
+        finally:
+            conn.close()
+        ratings = np.concatenate(chunks) if chunks else np.zeros((0, 3), dtype=np.int64)
+        log.info("Loaded ratings for similarity", num_ratings=len(ratings))
+        return (
+            ratings[:, 0],
+            ratings[:, 1],
+            ratings[:, 2] / 2,
+        )
+
+    def remove_stale_relationships(self, session, version: str):
+        session.run(
+            """
+            MATCH (:Movie)-[s:SIMILAR_TO]->(:Movie)
+            WHERE s.version IS NULL OR s.version <> $version
+            CALL { WITH s DELETE s } IN TRANSACTIONS OF $batch_size ROWS
+            """,
+            version=version,
+            batch_size=self.write_batch_size,
+        )
+
+    def write_relationships(self, session, batch: List[Dict], version: str):
+        with metrics.WRITE_SECONDS.time(loader="SimilarityBuilder"):
+            session.run(
+                """
+                UNWIND $sources AS source
+                OPTIONAL MATCH (:Movie {movieId: source})-[s:SIMILAR_TO]->()
+                WHERE s.version IS NULL OR s.version <> $version
+                DELETE s
+                WITH count(*) AS replaced
+                UNWIND $batch AS pair
+                MATCH (a:Movie {movieId: pair.source})
+                MATCH (b:Movie {movieId: pair.target})
+                CREATE (a)-[:SIMILAR_TO {score: pair.score, version: $version}]->(b)
+                """,
+                sources=sorted({pair["source"] for pair in batch}),
+                batch=batch,
+                version=version,
+            )
+        metrics.ROWS_WRITTEN.inc(len(batch), loader="SimilarityBuilder")
+
+    def publish(self, session, movie_index, neighbors, version: str) -> int:
+        sources, targets, scores = neighbors
+        written = 0
+        for start in range(0, len(sources), self.write_batch_size):
+            end = start + self.write_batch_size
+            batch = [
+                {"source": int(source), "target": int(target), "score": float(score)}
+                for source, target, score in zip(
+                    movie_index[sources[start:end]],
+                    movie_index[targets[start:end]],
+                    scores[start:end],
+                )
+            ]
+            self.write_relationships(session, batch, version)
+            written += len(batch)
+        return written
+
+    def run(self):
+        from neo4j import GraphDatabase
+
+        from run_aggregation import get_worker_context
+        from src.aggregators.similarity import build_item_matrix
+
+        movie_ids, user_ids, ratings = self.load_ratings()
+        with metrics.AGGREGATION_STAGE_SECONDS.time(stage="similarity_matrix"):
+            movie_index, matrix = build_item_matrix(
+                movie_ids, user_ids, ratings, self.method
+            )
+        del movie_ids, user_ids, ratings
+        chunks = plan_row_chunks(len(movie_index), self.chunk_size)
+        log.info(
+            "Built item rating matrix",
+            num_movies=matrix.shape[0],
+            num_users=matrix.shape[1],
+            num_chunks=len(chunks),
+        )
+
+        driver = GraphDatabase.driver(
+            settings.neo4j.uri, auth=(settings.neo4j.user, settings.neo4j.password)
+        )
+        pool = get_worker_context().Pool(
+            processes=self.num_processes,
+            initializer=init_similarity_worker,
+            initargs=(
+                matrix,
+                profiling.worker_config(),
+                tracing.worker_config(),
+                logging_config.worker_config(),
+            ),
+        )
+        version = tracing.current_run_id() or uuid.uuid4().hex
+        started = time.perf_counter()
+        written = 0
+        try:
+            with driver.session() as session:
+                for neighbors in pool.imap_unordered(
+                    functools.partial(
+                        similarity_worker,
+                        top_k=self.top_k,
+                        min_score=self.min_score,
+                        traceparent=tracing.worker_traceparent(),
+                    ),
+                    chunks,
+                ):
+                    written += self.publish(session, movie_index, neighbors, version)
+                self.remove_stale_relationships(session, version)
+        finally:
+            pool.close()
+            pool.join()
+            driver.close()
+        log.info(
+            "Similarity relationships published to Neo4j",
+            relationships=written,
+            seconds=round(time.perf_counter() - started, 3),
+        )
+        return written
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compute item-item similarity and publish it to Neo4j."
+    )
+    parser.add_argument("--profile", action="store_true", default=None)
+    return parser.parse_args(argv)
+
+
+def run_similarity():
+    log.info("--- Starting Similarity Pipeline ---")
+    with tracing.span("similarity.run"):
+        SimilarityBuilder().run()
+    log.info("--- Similarity Pipeline Finished ---")
+
+
+def main(argv=None):
+    from src.logging_config import setup_logging
+
+    args = parse_args(argv)
+    setup_logging()
+    profiling.configure_from_settings(role="similarity", enabled=args.profile)
+    tracing.init(role="similarity")
+    if settings.metrics.port:
+        metrics.start_http_server(settings.metrics.port)
+    run_similarity()
+    profiling.flush()
+
+    if settings.metrics.summary_path:
+        metrics.registry.write_summary(settings.metrics.summary_path)
+
+
+if __name__ == "__main__":
+    main()
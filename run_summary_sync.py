@@ -0,0 +1,188 @@
+import argparse
+import time
+from typing import Dict, List, Set, Tuple
+import structlog
+
+from config.config import settings
+from src import metrics, profiling, tracing
+
+log = structlog.get_logger()
+
+CHANGED_SUMMARIES_QUERY = """
+    SELECT COALESCE(summary.movie_id, synced.movie_id),
+           summary.average_rating,
+           summary.rating_count
+    FROM movies.ratings_summary summary
+    FULL OUTER JOIN jobs.neo4j_summary_sync synced
+        ON synced.movie_id = summary.movie_id
+    WHERE summary.average_rating IS DISTINCT FROM synced.average_rating
+       OR summary.rating_count IS DISTINCT FROM synced.rating_count
+    ORDER BY 1
+"""
+
+
+def to_properties(rows: List[Tuple]) -> List[Dict]:
+    return [
+        {
+            "movieId": movie_id,
+            "averageRating": None if average is None else float(average),
+            "ratingCount": count,
+        }
+        for movie_id, average, count in rows
+    ]
+
+
+class SummarySync:
+    def __init__(self):
+        self.db_config = {
+            "user": settings.postgres.user,
+            "password": settings.postgres.password,
+            "host": settings.postgres.host,
+            "dbname": settings.postgres.db,
+        }
+        self.write_batch_size = settings.neo4j.write_batch_size
+        log.info("Summary Sync initialized", write_batch_size=self.write_batch_size)
+
+    def _get_connection(self):
+        import psycopg2
+
+        return psycopg2.connect(**self.db_config)
+
+    def _get_driver(self):
+        from neo4j import GraphDatabase
+
+        return GraphDatabase.driver(
+            settings.neo4j.uri, auth=(settings.neo4j.user, settings.neo4j.password)
+        )
+
+    def reset(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute("TRUNCATE TABLE jobs.neo4j_summary_sync;")
+        conn.commit()
+        log.info("Summary sync state cleared, all movies will be synced")
+
+    def changed_summaries(self, conn) -> List[Tuple]:
+        with conn.cursor() as cursor:
+            cursor.execute(CHANGED_SUMMARIES_QUERY)
+            return cursor.fetchall()
+
+    def write_properties(self, session, batch: List[Dict]) -> Set[int]:
+        with metrics.WRITE_SECONDS.time(loader="SummarySync"):
+            result = session.run(
+                """
+                UNWIND $batch AS summary
+                MATCH (m:Movie {movieId: summary.movieId})
+                SET m.averageRating = summary.averageRating,
+                    m.ratingCount = summary.ratingCount
+                RETURN m.movieId AS movieId
+                """,
+                batch=batch,
+            )
+            matched = {record["movieId"] for record in result}
+        metrics.ROWS_WRITTEN.inc(len(matched), loader="SummarySync")
+        return matched
+
+    def record_synced(self, conn, rows: List[Tuple]):
+        from psycopg2 import extras
+
+        synced = [row for row in rows if row[2] is not None]
+        removed = [row[0] for row in rows if row[2] is None]
+        with conn.cursor() as cursor:
+            if synced:
+                extras.execute_values(
+                    cursor,
+                    """
+                    INSERT INTO jobs.neo4j_summary_sync
+                        (movie_id, average_rating, rating_count)
+                    VALUES %s
+                    ON CONFLICT (movie_id) DO UPDATE SET
+                        average_rating = EXCLUDED.average_rating,
+                        rating_count = EXCLUDED.rating_count,
+                        synced_at = NOW()
+                    """,
+                    synced,
+                )
+            if removed:
+                cursor.execute(
+                    "DELETE FROM jobs.neo4j_summary_sync WHERE movie_id = ANY(%s)",
+                    (removed,),
+                )
+        conn.commit()
+
+    @metrics.AGGREGATION_STAGE_SECONDS.time(stage="summary_sync")
+    def run(self, full: bool = False) -> int:
+        started = time.perf_counter()
+        missing = 0
+        conn = self._get_connection()
+        try:
+            if full:
+                self.reset(conn)
+            rows = self.changed_summaries(conn)
+            log.info("Movie summaries changed since last sync", num_changed=len(rows))
+            if not rows:
+                return 0
+            driver = self._get_driver()
+            try:
+                with driver.session() as session:
+                    for start in range(0, len(rows), self.write_batch_size):
+                        chunk = rows[start : start + self.write_batch_size]
+                        matched = self.write_properties(session, to_properties(chunk))
+                        synced = [
+                            row for row in chunk if row[0] in matched or row[2] is None
+                        ]
+                        self.record_synced(conn, synced)
+                        missing += len(chunk) - len(synced)
+            finally:
+                driver.close()
+        finally:
+            conn.close()
+        log.info(
+            "Movie summaries synced to Neo4j",
+            num_movies=len(rows) - missing,
+            num_missing_nodes=missing,
+            seconds=round(time.perf_counter() - started, 3),
+        )
+        if missing:
+            log.warn(
+                "Movie nodes missing in Neo4j, their summaries will be retried",
+                num_missing_nodes=missing,
+            )
+        return len(rows) - missing
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Push changed movie rating summaries onto Neo4j Movie nodes."
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="Resync every movie, not only changes."
+    )
+    parser.add_argument("--profile", action="store_true", default=None)
+    return parser.parse_args(argv)
+
+
+def run_summary_sync(full: bool = False):
+    log.info("--- Starting Summary Sync ---")
+    with tracing.span("summary_sync.run"):
+        SummarySync().run(full=full)
+    log.info("--- Summary Sync Finished ---")
+
+
+def main(argv=None):
+    from src.logging_config import setup_logging
+
+    args = parse_args(argv)
+    setup_logging()
+    profiling.configure_from_settings(role="summary_sync", enabled=args.profile)
+    tracing.init(role="summary_sync")
+    if settings.metrics.port:
+        metrics.start_http_server(settings.metrics.port)
+    run_summary_sync(full=args.full)
+    profiling.flush()
+
+    if settings.metrics.summary_path:
+        metrics.registry.write_summary(settings.metrics.summary_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import argparse
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+import structlog
+
+log = structlog.get_logger()
+
+GENRES = [
+    "Drama",
+    "Comedy",
+    "Thriller",
+    "Action",
+    "Romance",
+    "Adventure",
+    "Crime",
+    "Sci-Fi",
+    "Horror",
+    "Fantasy",
+    "Children",
+    "Animation",
+    "Mystery",
+    "Documentary",
+    "War",
+    "Musical",
+    "Western",
+    "IMAX",
+    "Film-Noir",
+]
+GENRE_WEIGHTS = np.array(
+    [
+        4361,
+        3756,
+        1894,
+        1828,
+        1596,
+        1263,
+        1199,
+        980,
+        978,
+        779,
+        664,
+        611,
+        573,
+        440,
+        382,
+        334,
+        167,
+        158,
+        87,
+    ],
+    dtype=np.float64,
+)
+NO_GENRES = "(no genres listed)"
+
+FIRST_TIMESTAMP = 828124615
+LAST_TIMESTAMP = 1537799250
+MIN_RATINGS_PER_USER = 20
+
+
+class DatasetGenerator:
+    def __init__(
+        self,
+        num_movies: int,
+        num_ratings: int,
+        seed: int = 42,
+        zipf_exponent: float = 1.07,
+        id_sparsity: float = 20.0,
+        power_user_fraction: float = 0.01,
+        users_per_chunk: int = 5000,
+    ):
+        self.num_movies = num_movies
+        self.num_ratings = num_ratings
+        self.zipf_exponent = zipf_exponent
+        self.id_sparsity = id_sparsity
+        self.power_user_fraction = power_user_fraction
+        self.users_per_chunk = users_per_chunk
+        self.rng = np.random.default_rng(seed)
+
+        gaps = self.rng.geometric(1.0 / max(id_sparsity, 1.0), size=num_movies)
+        self.movie_ids = np.cumsum(gaps).astype(np.int64)
+
+        popularity_order = self.rng.permutation(num_movies)
+        weights = 1.0 / np.power(np.arange(1, num_movies + 1), zipf_exponent)
+        self._popularity_cdf = np.cumsum(weights / weights.sum())
+        self._movie_by_rank = popularity_order
+        self._movie_quality = self.rng.normal(0.0, 0.5, size=num_movies)
+        log.info(
+            "Dataset generator initialized",
+            num_movies=num_movies,
+            num_ratings=num_ratings,
+            max_movie_id=int(self.movie_ids[-1]),
+        )
+
+    def _movie_genres(self, count: int) -> list:
+        probabilities = GENRE_WEIGHTS / GENRE_WEIGHTS.sum()
+        genre_counts = np.clip(self.rng.poisson(1.3, size=count) + 1, 1, 6)
+        no_genres = self.rng.random(count) < 0.003
+        genres = []
+        for num_genres, missing in zip(genre_counts, no_genres):
+            if missing:
+                genres.append(NO_GENRES)
+                continue
+            picked = self.rng.choice(
+                len(GENRES), size=num_genres, replace=False, p=probabilities
+            )
+            genres.append("|".join(sorted(GENRES[index] for index in picked)))
+        return genres
+
+    def write_movies(self, path: str, chunk_size: int = 100_000):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(["movieId", "title", "genres"])
+            for start in range(0, self.num_movies, chunk_size):
+                movie_ids = self.movie_ids[start : start + chunk_size]
+                years = self.rng.integers(1902, 2019, size=len(movie_ids))
+                genres = self._movie_genres(len(movie_ids))
+                writer.writerows(
+                    (
+                        movie_id,
+                        f"Synthetic Movie {movie_id}, Part {year % 7 + 1} ({year})",
+                        genre,
+                    )
+                    for movie_id, year, genre in zip(
+                        movie_ids.tolist(), years.tolist(), genres
+                    )
+                )
+        log.info("Movies file written", path=path, num_movies=self.num_movies)
+
+    def _ratings_per_user(self, num_users: int):
+        counts = MIN_RATINGS_PER_USER + self.rng.lognormal(
+            mean=3.6, sigma=1.1, size=num_users
+        ).astype(np.int64)
+        power_users = self.rng.random(num_users) < self.power_user_fraction
+        counts[power_users] *= self.rng.integers(10, 40, size=power_users.sum())
+        return np.minimum(counts, self.num_movies // 2), power_users
+
+    def _sample_movies(self, count: int) -> np.ndarray:
+        picked = np.empty(0, dtype=np.int64)
+        while len(picked) < count:
+            draws = int((count - len(picked)) * 1.3) + 8
+            ranks = np.searchsorted(self._popularity_cdf, self.rng.random(draws))
+            ranks = np.minimum(ranks, self.num_movies - 1)
+            picked = np.unique(np.concatenate([picked, self._movie_by_rank[ranks]]))
+        if len(picked) > count:
+            picked = np.sort(self.rng.choice(picked, size=count, replace=False))
+        return picked
+
+    def _user_chunk(self, first_user_id: int, num_users: int, remaining: int):
+        counts, power_users = self._ratings_per_user(num_users)
+        user_ids = (
+            first_user_id + np.cumsum(self.rng.geometric(0.9, size=num_users)) - 1
+        )
+
+        frames = []
+        for user_id, count, is_power_user in zip(user_ids, counts, power_users):
+            if remaining <= 0:
+                break
+            count = int(min(count, remaining))
+            movies = self._sample_movies(count)
+
+            user_bias = self.rng.normal(0.0, 0.4)
+            scores = (
+                3.5
+                + user_bias
+                + self._movie_quality[movies]
+                + self.rng.normal(0.0, 0.9, size=count)
+            )
+            half_stars = np.clip(np.rint(scores * 2), 1, 10).astype(np.int64)
+
+            active_from = self.rng.integers(FIRST_TIMESTAMP, LAST_TIMESTAMP)
+            if is_power_user:
+                span = self.rng.integers(3600, 7 * 86400)
+            else:
+                span = int(self.rng.lognormal(mean=14.0, sigma=2.0))
+            active_to = min(LAST_TIMESTAMP, active_from + max(span, 60))
+            timestamps = self.rng.integers(active_from, active_to + 1, size=count)
+
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "userId": np.full(count, user_id, dtype=np.int64),
+                        "movieId": self.movie_ids[movies],
+                        "rating": half_stars / 2.0,
+                        "timestamp": timestamps,
+                    }
+                )
+            )
+            remaining -= count
+
+        last_user_id = int(user_ids[-1]) if len(user_ids) else first_user_id
+        chunk = pd.concat(frames, ignore_index=True) if frames else None
+        return chunk, last_user_id, remaining
+
+    def write_ratings(self, path: str):
+        remaining = self.num_ratings
+        next_user_id = 1
+        written = 0
+        with open(path, "w", newline="") as f:
+            f.write("userId,movieId,rating,timestamp\n")
+            while remaining > 0:
+                chunk, last_user_id, remaining = self._user_chunk(
+                    next_user_id, self.users_per_chunk, remaining
+                )
+                if chunk is not None:
+                    chunk.to_csv(f, header=False, index=False, float_format="%.1f")
+                    written += len(chunk)
+                next_user_id = last_user_id + 1
+                log.info("Ratings chunk written", rows_written=written)
+        log.info("Ratings file written", path=path, num_ratings=written)
+
+
+def load_into_mysql(movies_path: str, ratings_path: str, truncate: bool):
+    import mysql.connector
+
+    from config.config import settings
+
+    conn = mysql.connector.connect(
+        user=settings.mysql.user,
+        password=settings.mysql.password,
+        host=settings.mysql.host,
+        database=settings.mysql.db,
+        allow_local_infile=True,
+    )
+    try:
+        with conn.cursor() as cursor:
+            for table, path in (("movies", movies_path), ("ratings", ratings_path)):
+                if truncate:
+                    cursor.execute(f"TRUNCATE TABLE {table}")
+                log.info("Loading file into MySQL", table=table, path=path)
+                cursor.execute(
+                    f"""
+                    LOAD DATA LOCAL INFILE '{os.path.abspath(path)}'
+                    INTO TABLE {table}
+                    FIELDS TERMINATED BY ','
+                    ENCLOSED BY '"'
+                    LINES TERMINATED BY '\\n'
+                    IGNORE 1 ROWS
+                    """
+                )
+                log.info("Loaded file into MySQL", table=table, rows=cursor.rowcount)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate a MovieLens-shaped movies/ratings dataset at scale."
+    )
+    parser.add_argument("--movies", type=int, default=60_000)
+    parser.add_argument("--ratings", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--zipf-exponent", type=float, default=1.07)
+    parser.add_argument("--id-sparsity", type=float, default=20.0)
+    parser.add_argument("--power-user-fraction", type=float, default=0.01)
+    parser.add_argument("--output-dir", default="data/synthetic")
+    parser.add_argument("--load-mysql", action="store_true")
+    parser.add_argument("--truncate", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from src.logging_config import setup_logging
+
+    args = parse_args(argv)
+    setup_logging()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    movies_path = os.path.join(args.output_dir, "movies.csv")
+    ratings_path = os.path.join(args.output_dir, "ratings.csv")
+
+    generator = DatasetGenerator(
+        num_movies=args.movies,
+        num_ratings=args.ratings,
+        seed=args.seed,
+        zipf_exponent=args.zipf_exponent,
+        id_sparsity=args.id_sparsity,
+        power_user_fraction=args.power_user_fraction,
+    )
+    generator.write_movies(movies_path)
+    generator.write_ratings(ratings_path)
+
+    if args.load_mysql:
+        load_into_mysql(movies_path, ratings_path, truncate=args.truncate)
+
+
+if __name__ == "__main__":
+    main()
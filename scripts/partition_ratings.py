@@ -0,0 +1,96 @@
+import argparse
+
+import psycopg2
+import structlog
+
+from config.config import settings
+from src.loaders.postgres_ratings_loader import (
+    create_partition,
+    is_partitioned,
+    partition_start,
+)
+from src.logging_config import setup_logging
+
+log = structlog.get_logger()
+
+
+def partition_ratings(width: int):
+    conn = psycopg2.connect(
+        user=settings.postgres.user,
+        password=settings.postgres.password,
+        host=settings.postgres.host,
+        dbname=settings.postgres.db,
+    )
+    try:
+        with conn.cursor() as cursor:
+            if is_partitioned(cursor):
+                log.info("movies.ratings is already partitioned, nothing to do.")
+                return
+
+            cursor.execute(
+                "SELECT GREATEST((SELECT MAX(movie_id) FROM movies.movies), "
+                "(SELECT MAX(movie_id) FROM movies.ratings));"
+            )
+            max_movie_id = cursor.fetchone()[0] or 0
+
+            log.info("Converting movies.ratings to a range-partitioned table")
+            cursor.execute(
+                "ALTER TABLE movies.ratings RENAME TO ratings_unpartitioned;"
+            )
+            cursor.execute(
+                "ALTER INDEX movies.ratings_pkey RENAME TO ratings_unpartitioned_pkey;"
+            )
+            cursor.execute(
+                "ALTER INDEX IF EXISTS movies.idx_ratings_movie_id_covering "
+                "RENAME TO idx_ratings_unpartitioned_movie_id_covering;"
+            )
+            cursor.execute(
+                """
+                CREATE TABLE movies.ratings (
+                    user_id INT,
+                    movie_id INT,
+                    rating DECIMAL(2,1),
+                    timestamp BIGINT,
+                    PRIMARY KEY (user_id, movie_id)
+                ) PARTITION BY RANGE (movie_id);
+                """
+            )
+            for start in range(0, partition_start(max_movie_id, width) + 1, width):
+                create_partition(cursor, start, width)
+            cursor.execute(
+                "CREATE INDEX idx_ratings_movie_id_covering "
+                "ON movies.ratings (movie_id) INCLUDE (rating, user_id, timestamp);"
+            )
+
+            cursor.execute(
+                "INSERT INTO movies.ratings SELECT * FROM movies.ratings_unpartitioned;"
+            )
+            moved_rows = cursor.rowcount
+            cursor.execute("DROP TABLE movies.ratings_unpartitioned;")
+        conn.commit()
+        log.info(
+            "movies.ratings partitioned by movie_id",
+            width=width,
+            max_movie_id=max_movie_id,
+            moved_rows=moved_rows,
+        )
+    except Exception as e:
+        conn.rollback()
+        log.error("Failed to partition movies.ratings", error=str(e))
+        raise
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert movies.ratings into a table range-partitioned by movie_id."
+    )
+    parser.add_argument("--width", type=int, default=settings.aggregation.batch_width)
+    args = parser.parse_args(argv)
+    setup_logging()
+    partition_ratings(args.width)
+
+
+if __name__ == "__main__":
+    main()
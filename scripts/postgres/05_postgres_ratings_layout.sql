@@ -0,0 +1,2 @@
+CREATE INDEX IF NOT EXISTS idx_ratings_movie_id_rating
+    ON movies.ratings (movie_id) INCLUDE (rating);
@@ -0,0 +1,25 @@
+ALTER TABLE movies.ratings_summary_staging
+    ADD COLUMN IF NOT EXISTS median_rating DECIMAL(2, 1),
+    ADD COLUMN IF NOT EXISTS p90_rating DECIMAL(2, 1),
+    ADD COLUMN IF NOT EXISTS rating_histogram INT[];
+
+ALTER TABLE movies.ratings_summary
+    ADD COLUMN IF NOT EXISTS median_rating DECIMAL(2, 1),
+    ADD COLUMN IF NOT EXISTS p90_rating DECIMAL(2, 1),
+    ADD COLUMN IF NOT EXISTS rating_histogram INT[];
+
+CREATE TABLE IF NOT EXISTS movies.monthly_raters_staging (
+    batch_id INT NOT NULL,
+    month DATE NOT NULL,
+    sketch BYTEA NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS movies.monthly_raters (
+    month DATE PRIMARY KEY,
+    distinct_raters BIGINT NOT NULL,
+    sketch BYTEA NOT NULL
+);
+
+DROP INDEX IF EXISTS movies.idx_ratings_movie_id_rating;
+CREATE INDEX IF NOT EXISTS idx_ratings_movie_id_covering
+    ON movies.ratings (movie_id) INCLUDE (rating, user_id, timestamp);
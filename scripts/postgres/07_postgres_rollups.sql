@@ -0,0 +1,38 @@
+CREATE TABLE IF NOT EXISTS movies.ratings_by_user_staging (
+    batch_id INT NOT NULL,
+    user_id INT NOT NULL,
+    half_star_sum BIGINT NOT NULL,
+    rating_count INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS movies.ratings_by_user (
+    user_id INT PRIMARY KEY,
+    average_rating DECIMAL(10, 5),
+    rating_count INT
+);
+
+CREATE TABLE IF NOT EXISTS movies.ratings_by_genre_staging (
+    batch_id INT NOT NULL,
+    genre TEXT NOT NULL,
+    half_star_sum BIGINT NOT NULL,
+    rating_count INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS movies.ratings_by_genre (
+    genre TEXT PRIMARY KEY,
+    average_rating DECIMAL(10, 5),
+    rating_count INT
+);
+
+CREATE TABLE IF NOT EXISTS movies.ratings_by_month_staging (
+    batch_id INT NOT NULL,
+    month DATE NOT NULL,
+    half_star_sum BIGINT NOT NULL,
+    rating_count INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS movies.ratings_by_month (
+    month DATE PRIMARY KEY,
+    average_rating DECIMAL(10, 5),
+    rating_count INT
+);
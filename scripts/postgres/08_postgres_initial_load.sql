@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS jobs.initial_load_state (
+    table_name TEXT NOT NULL,
+    position INT NOT NULL,
+    object_kind VARCHAR(20) NOT NULL,
+    object_name TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    PRIMARY KEY (table_name, position)
+);
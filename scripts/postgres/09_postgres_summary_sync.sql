@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS jobs.neo4j_summary_sync (
+    movie_id INT PRIMARY KEY,
+    average_rating DECIMAL(10, 5),
+    rating_count INT,
+    synced_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
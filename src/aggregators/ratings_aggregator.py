@@ -1,13 +1,38 @@
+from contextlib import contextmanager
+
+import numpy as np
 import pandas as pd
 import psycopg2
 from psycopg2 import extras
 import structlog
 
 from config.config import settings
+from src import metrics, tracing
+from src.aggregators.rollups import (
+    compute_rollups,
+    configured_rollups,
+    fetch_genres,
+    write_partials,
+)
+from src.aggregators.shared_dataset import SharedRatingsDataset
+from src.aggregators.sketches import (
+    HALF_STARS,
+    half_star_histograms,
+    histogram_quantiles,
+    monthly_hyperloglogs,
+)
+from src.rating_codec import POSTGRES_HALF_STARS, half_star_codes
 
 log = structlog.get_logger()
 
 
+@contextmanager
+def _phase(phase: str, batch_id: int):
+    with tracing.span(f"aggregation.{phase}", batch_id=batch_id):
+        with metrics.AGGREGATION_BATCH_SECONDS.time(phase=phase):
+            yield
+
+
 class RatingsAggregator:
     def __init__(self):
         self.db_config = {
@@ -16,7 +41,11 @@ class RatingsAggregator:
             "host": settings.postgres.host,
             "dbname": settings.postgres.db,
         }
-        log.info("Ratings Aggregator initialized.")
+        self.rollups = configured_rollups()
+        log.info(
+            "Ratings Aggregator initialized.",
+            rollups=[rollup.name for rollup in self.rollups],
+        )
 
     def _get_connection(self):
         return psycopg2.connect(**self.db_config)
@@ -28,12 +57,12 @@ class RatingsAggregator:
         with conn.cursor() as cursor:
             cursor.execute(update_query, (status, batch_id))
         conn.commit()
-        log.info("Updated batch status", batch_id=batch_id, status=status)
+        log.debug("Updated batch status", batch_id=batch_id, status=status)
 
-    def process_batch(self, batch_id: int):
-        log.info("Starting to process batch", batch_id=batch_id)
+    def process_batch(self, batch_id: int, dataset: SharedRatingsDataset = None):
+        log.debug("Starting to process batch", batch_id=batch_id)
 
-        fetch_query = "SELECT movie_id, rating FROM movies.ratings WHERE movie_id BETWEEN %s AND %s"
+        fetch_query = f"SELECT movie_id, user_id, {POSTGRES_HALF_STARS} AS half_stars, timestamp FROM movies.ratings WHERE movie_id BETWEEN %s AND %s AND rating IS NOT NULL"
 
         conn = None
         try:
@@ -47,51 +76,111 @@ class RatingsAggregator:
                     (batch_id,),
                 )
                 start_id, end_id = cursor.fetchone()
+                genres = (
+                    fetch_genres(cursor, start_id, end_id)
+                    if any(rollup.name == "genre" for rollup in self.rollups)
+                    else {}
+                )
 
-            log.info(
+            log.debug(
                 "Fetching ratings for batch",
                 batch_id=batch_id,
                 start_id=start_id,
                 end_id=end_id,
             )
-            df = pd.read_sql_query(fetch_query, conn, params=(start_id, end_id))
-
-            if df.empty:
+            with _phase("fetch", batch_id):
+                if dataset is None:
+                    df = pd.read_sql_query(fetch_query, conn, params=(start_id, end_id))
+                    movie_ids = df["movie_id"].to_numpy()
+                    user_ids = df["user_id"].to_numpy()
+                    half_stars = half_star_codes(
+                        df["half_stars"].to_numpy(), movie_ids, user_ids
+                    )
+                    timestamps = df["timestamp"].to_numpy()
+                else:
+                    movie_ids, user_ids, half_stars, timestamps = dataset.between(
+                        start_id, end_id
+                    )
+            metrics.AGGREGATION_RATINGS.inc(len(movie_ids))
+
+            if not len(movie_ids):
                 log.warn(
                     "No ratings found for this batch. Marking as complete.",
                     batch_id=batch_id,
                 )
                 self._update_batch_status(conn, batch_id, "complete")
+                metrics.AGGREGATION_BATCHES.inc(status="empty")
                 return
 
-            log.info(
-                "Aggregating ratings for batch", batch_id=batch_id, num_ratings=len(df)
-            )
-            aggregation = df.groupby("movie_id")["rating"].agg(["mean", "count"])
-            aggregation.rename(
-                columns={"mean": "average_rating", "count": "rating_count"},
-                inplace=True,
+            log.debug(
+                "Aggregating ratings for batch",
+                batch_id=batch_id,
+                num_ratings=len(movie_ids),
             )
-            aggregation["average_rating"] = aggregation["average_rating"].round(5)
+            with _phase("aggregate", batch_id):
+                movie_index, movie_codes = np.unique(movie_ids, return_inverse=True)
+                histograms = half_star_histograms(
+                    movie_codes, half_stars, len(movie_index)
+                )
+                counts = histograms.sum(axis=1)
+                half_star_sums = histograms @ np.arange(1, HALF_STARS + 1)
+                averages = np.round(half_star_sums / 2 / counts, 5)
+                medians = histogram_quantiles(histograms, 0.5)
+                p90s = histogram_quantiles(histograms, 0.9)
+                monthly_raters = monthly_hyperloglogs(user_ids, timestamps)
+                rollup_partials = compute_rollups(
+                    self.rollups,
+                    user_ids,
+                    half_stars,
+                    timestamps,
+                    (movie_index, half_star_sums, counts),
+                    genres,
+                )
 
-            log.info(
+            log.debug(
                 "Writing aggregated results to staging table",
                 batch_id=batch_id,
-                num_movies=len(aggregation),
+                num_movies=len(movie_index),
             )
-            with conn.cursor() as cursor:
-                insert_data = [
-                    (int(index), float(row["average_rating"]), int(row["rating_count"]))
-                    for index, row in aggregation.iterrows()
-                ]
-                insert_query = "INSERT INTO movies.ratings_summary_staging (movie_id, average_rating, rating_count) VALUES %s"
-                extras.execute_values(cursor, insert_query, insert_data)
-
-            self._update_batch_status(conn, batch_id, "complete")
+            with _phase("write", batch_id):
+                with conn.cursor() as cursor:
+                    insert_data = list(
+                        zip(
+                            movie_index.tolist(),
+                            averages.tolist(),
+                            counts.tolist(),
+                            medians.tolist(),
+                            p90s.tolist(),
+                            histograms.tolist(),
+                        )
+                    )
+                    insert_query = "INSERT INTO movies.ratings_summary_staging (movie_id, average_rating, rating_count, median_rating, p90_rating, rating_histogram) VALUES %s"
+                    extras.execute_values(cursor, insert_query, insert_data)
+
+                    sketch_data = [
+                        (
+                            batch_id,
+                            str(month.astype("datetime64[D]")),
+                            psycopg2.Binary(sketch.to_bytes()),
+                        )
+                        for month, sketch in monthly_raters.items()
+                    ]
+                    sketch_query = "INSERT INTO movies.monthly_raters_staging (batch_id, month, sketch) VALUES %s"
+                    extras.execute_values(cursor, sketch_query, sketch_data)
+
+                    for rollup in self.rollups:
+                        write_partials(
+                            cursor, rollup, batch_id, rollup_partials[rollup.name]
+                        )
+
+                self._update_batch_status(conn, batch_id, "complete")
+            metrics.AGGREGATION_MOVIES.inc(len(insert_data))
+            metrics.AGGREGATION_BATCHES.inc(status="complete")
             log.info("Successfully processed batch", batch_id=batch_id)
 
         except Exception as e:
             log.error("Failed to process batch", batch_id=batch_id, error=str(e))
+            metrics.AGGREGATION_BATCHES.inc(status="failed")
             if conn:
                 conn.rollback()
 
@@ -0,0 +1,131 @@
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+from psycopg2 import extras
+
+from config.config import settings
+from src.aggregators.sketches import month_starts
+
+Partials = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class Rollup(NamedTuple):
+    name: str
+    key_column: str
+    staging_table: str
+    summary_table: str
+
+
+ROLLUPS = {
+    "user": Rollup(
+        "user", "user_id", "movies.ratings_by_user_staging", "movies.ratings_by_user"
+    ),
+    "genre": Rollup(
+        "genre", "genre", "movies.ratings_by_genre_staging", "movies.ratings_by_genre"
+    ),
+    "month": Rollup(
+        "month", "month", "movies.ratings_by_month_staging", "movies.ratings_by_month"
+    ),
+}
+
+
+def configured_rollups(names: str = None) -> List[Rollup]:
+    names = settings.aggregation.rollups if names is None else names
+    selected = [name.strip() for name in names.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in ROLLUPS]
+    if unknown:
+        raise ValueError(f"Unknown rollups {unknown}, expected some of {list(ROLLUPS)}")
+    return [ROLLUPS[name] for name in selected]
+
+
+def group_partials(keys: np.ndarray, half_stars: np.ndarray) -> Partials:
+    unique_keys, codes = np.unique(keys, return_inverse=True)
+    half_star_sums = np.bincount(codes, weights=half_stars).astype(np.int64)
+    counts = np.bincount(codes, minlength=len(unique_keys))
+    return unique_keys, half_star_sums, counts
+
+
+def genre_partials(
+    movie_ids: np.ndarray,
+    half_star_sums: np.ndarray,
+    counts: np.ndarray,
+    genres: Dict[int, List[str]],
+) -> Partials:
+    movie_genres = [genres.get(int(movie_id)) or [] for movie_id in movie_ids]
+    repeats = np.array([len(names) for names in movie_genres], dtype=np.int64)
+    keys = np.array([name for names in movie_genres for name in names], dtype=object)
+    if not len(keys):
+        return keys, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    unique_keys, codes = np.unique(keys, return_inverse=True)
+    return (
+        unique_keys,
+        np.bincount(codes, weights=np.repeat(half_star_sums, repeats)).astype(np.int64),
+        np.bincount(codes, weights=np.repeat(counts, repeats)).astype(np.int64),
+    )
+
+
+def compute_rollups(
+    rollups: List[Rollup],
+    user_ids: np.ndarray,
+    half_stars: np.ndarray,
+    timestamps: np.ndarray,
+    movie_partials: Partials,
+    genres: Dict[int, List[str]],
+) -> Dict[str, Partials]:
+    results = {}
+    for rollup in rollups:
+        if rollup.name == "user":
+            results["user"] = group_partials(user_ids, half_stars)
+        elif rollup.name == "month":
+            results["month"] = group_partials(month_starts(timestamps), half_stars)
+        elif rollup.name == "genre":
+            results["genre"] = genre_partials(*movie_partials, genres)
+    return results
+
+
+def fetch_genres(cursor, start_id: int, end_id: int) -> Dict[int, List[str]]:
+    cursor.execute(
+        "SELECT movie_id, genres FROM movies.movies WHERE movie_id BETWEEN %s AND %s",
+        (start_id, end_id),
+    )
+    return {movie_id: genres for movie_id, genres in cursor.fetchall()}
+
+
+def _db_key(rollup: Rollup, key):
+    if rollup.name == "month":
+        return str(np.datetime64(key, "M").astype("datetime64[D]"))
+    if rollup.name == "user":
+        return int(key)
+    return str(key)
+
+
+def write_partials(cursor, rollup: Rollup, batch_id: int, partials: Partials):
+    keys, half_star_sums, counts = partials
+    extras.execute_values(
+        cursor,
+        f"INSERT INTO {rollup.staging_table} (batch_id, {rollup.key_column}, half_star_sum, rating_count) VALUES %s",
+        [
+            (batch_id, _db_key(rollup, key), int(half_star_sum), int(count))
+            for key, half_star_sum, count in zip(keys, half_star_sums, counts)
+        ],
+    )
+
+
+def truncate_staging(cursor, rollups: List[Rollup]):
+    for rollup in rollups:
+        cursor.execute(f"TRUNCATE TABLE {rollup.staging_table};")
+
+
+def promote(cursor, rollup: Rollup) -> int:
+    cursor.execute(f"TRUNCATE TABLE {rollup.summary_table};")
+    cursor.execute(
+        f"""
+        INSERT INTO {rollup.summary_table} ({rollup.key_column}, average_rating, rating_count)
+        SELECT {rollup.key_column},
+               ROUND(SUM(half_star_sum) / 2.0 / SUM(rating_count), 5),
+               SUM(rating_count)
+        FROM {rollup.staging_table}
+        GROUP BY {rollup.key_column};
+        """
+    )
+    return cursor.rowcount
@@ -0,0 +1,84 @@
+from multiprocessing import shared_memory
+from typing import Dict, Tuple
+
+import numpy as np
+
+COLUMNS = (
+    ("movie_id", np.int32),
+    ("user_id", np.int32),
+    ("half_stars", np.int8),
+    ("timestamp", np.int64),
+)
+
+_attached = None
+
+
+class SharedRatingsDataset:
+    def __init__(
+        self,
+        segments: Dict[str, shared_memory.SharedMemory],
+        length: int,
+        owner: bool = False,
+    ):
+        self.segments = segments
+        self.length = length
+        self.owner = owner
+        self.columns = {
+            name: np.ndarray((length,), dtype=dtype, buffer=segments[name].buf)
+            for name, dtype in COLUMNS
+        }
+
+    @classmethod
+    def create(cls, length: int) -> "SharedRatingsDataset":
+        segments = {
+            name: shared_memory.SharedMemory(
+                create=True, size=max(1, length * np.dtype(dtype).itemsize)
+            )
+            for name, dtype in COLUMNS
+        }
+        return cls(segments, length, owner=True)
+
+    @classmethod
+    def attach(cls, descriptor: Dict) -> "SharedRatingsDataset":
+        segments = {
+            name: shared_memory.SharedMemory(name=segment_name)
+            for name, segment_name in descriptor["segments"].items()
+        }
+        return cls(segments, descriptor["length"])
+
+    @property
+    def descriptor(self) -> Dict:
+        return {
+            "length": self.length,
+            "segments": {name: segment.name for name, segment in self.segments.items()},
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def between(self, start_id: int, end_id: int) -> Tuple[np.ndarray, ...]:
+        movie_ids = self.columns["movie_id"]
+        lo = np.searchsorted(movie_ids, start_id, side="left")
+        hi = np.searchsorted(movie_ids, end_id, side="right")
+        return tuple(self.columns[name][lo:hi] for name, _ in COLUMNS)
+
+    def close(self):
+        self.columns = {}
+        for segment in self.segments.values():
+            segment.close()
+
+    def unlink(self):
+        self.close()
+        if self.owner:
+            for segment in self.segments.values():
+                segment.unlink()
+
+
+def attach_cached(descriptor: Dict) -> SharedRatingsDataset:
+    global _attached
+    if _attached is None or _attached.descriptor != descriptor:
+        if _attached is not None:
+            _attached.close()
+        _attached = SharedRatingsDataset.attach(descriptor)
+    return _attached
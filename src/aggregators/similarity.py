@@ -0,0 +1,61 @@
+from typing import Tuple
+
+import numpy as np
+from scipy import sparse
+
+SIMILARITY_METHODS = ("cosine", "adjusted_cosine")
+
+
+def build_item_matrix(
+    movie_ids: np.ndarray,
+    user_ids: np.ndarray,
+    ratings: np.ndarray,
+    method: str = "cosine",
+) -> Tuple[np.ndarray, sparse.csr_matrix]:
+    if method not in SIMILARITY_METHODS:
+        raise ValueError(
+            f"Unknown similarity method {method!r}, expected one of {SIMILARITY_METHODS}"
+        )
+    movie_index, movie_codes = np.unique(movie_ids, return_inverse=True)
+    user_index, user_codes = np.unique(user_ids, return_inverse=True)
+    values = np.asarray(ratings, dtype=np.float64)
+    if method == "adjusted_cosine":
+        user_means = np.bincount(user_codes, weights=values) / np.bincount(user_codes)
+        values = values - user_means[user_codes]
+
+    matrix = sparse.csr_matrix(
+        (values, (movie_codes, user_codes)),
+        shape=(len(movie_index), len(user_index)),
+    )
+    matrix.sum_duplicates()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return movie_index, sparse.diags(1.0 / norms).dot(matrix).tocsr()
+
+
+def top_k_similar(
+    matrix: sparse.csr_matrix,
+    start: int,
+    end: int,
+    k: int,
+    min_score: float = 0.0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    block = matrix[start:end].dot(matrix.T).tocsr()
+    sources, targets, scores = [], [], []
+    for row in range(block.shape[0]):
+        lo, hi = block.indptr[row], block.indptr[row + 1]
+        columns = block.indices[lo:hi]
+        values = block.data[lo:hi]
+        keep = (columns != start + row) & (values > min_score)
+        columns, values = columns[keep], values[keep]
+        if len(values) > k:
+            top = np.argpartition(-values, k - 1)[:k]
+            columns, values = columns[top], values[top]
+        order = np.lexsort((columns, -values))
+        sources.append(np.full(len(order), start + row, dtype=np.int64))
+        targets.append(columns[order].astype(np.int64))
+        scores.append(values[order])
+    if not sources:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.float64)
+    return np.concatenate(sources), np.concatenate(targets), np.concatenate(scores)
@@ -0,0 +1,121 @@
+import math
+from typing import Dict, Iterable
+
+import numpy as np
+
+HALF_STARS = 10
+HLL_PRECISION = 14
+HLL_REGISTERS = 1 << HLL_PRECISION
+HLL_RELATIVE_ERROR = 1.04 / math.sqrt(HLL_REGISTERS)
+
+_DENSE = b"D"
+_SPARSE = b"S"
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def half_star_histograms(codes: np.ndarray, half_stars: np.ndarray, size: int):
+    flat = np.bincount(
+        np.asarray(codes, dtype=np.int64) * HALF_STARS
+        + np.asarray(half_stars, dtype=np.int64)
+        - 1,
+        minlength=size * HALF_STARS,
+    )
+    return flat.reshape(size, HALF_STARS)
+
+
+def histogram_quantiles(histograms: np.ndarray, q: float) -> np.ndarray:
+    histograms = np.atleast_2d(histograms)
+    cumulative = np.cumsum(histograms, axis=1)
+    ranks = np.ceil(q * cumulative[:, -1:]).clip(min=1)
+    half_stars = (cumulative < ranks).sum(axis=1) + 1
+    return half_stars / 2
+
+
+def month_starts(timestamps: np.ndarray) -> np.ndarray:
+    return (
+        np.asarray(timestamps, dtype=np.int64)
+        .astype("datetime64[s]")
+        .astype("datetime64[M]")
+    )
+
+
+def _splitmix64(values: np.ndarray) -> np.ndarray:
+    with np.errstate(over="ignore"):
+        z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return (z ^ (z >> np.uint64(31))) & _MASK64
+
+
+def hll_positions(values: np.ndarray):
+    hashes = _splitmix64(np.asarray(values, dtype=np.int64))
+    index = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.int64)
+    remainder = (hashes << np.uint64(HLL_PRECISION)) & _MASK64
+    bits = 64 - HLL_PRECISION
+    leading_zeros = np.where(
+        remainder == 0,
+        bits,
+        63 - np.floor(np.log2(remainder.astype(np.float64))).astype(np.int64),
+    )
+    ranks = np.minimum(leading_zeros, bits) + 1
+    return index, ranks.astype(np.uint8)
+
+
+class HyperLogLog:
+    def __init__(self, registers: np.ndarray = None):
+        self.registers = (
+            np.zeros(HLL_REGISTERS, dtype=np.uint8) if registers is None else registers
+        )
+
+    def add(self, values: Iterable[int]):
+        index, ranks = hll_positions(np.asarray(values))
+        np.maximum.at(self.registers, index, ranks)
+        return self
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        m = float(HLL_REGISTERS)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    def to_bytes(self) -> bytes:
+        nonzero = np.flatnonzero(self.registers)
+        if len(nonzero) * 3 < HLL_REGISTERS:
+            return (
+                _SPARSE
+                + nonzero.astype("<u2").tobytes()
+                + self.registers[nonzero].tobytes()
+            )
+        return _DENSE + self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        data = bytes(data)
+        if data[:1] == _DENSE:
+            return cls(np.frombuffer(data[1:], dtype=np.uint8).copy())
+        body = data[1:]
+        count = len(body) // 3
+        index = np.frombuffer(body[: count * 2], dtype="<u2")
+        registers = np.zeros(HLL_REGISTERS, dtype=np.uint8)
+        registers[index] = np.frombuffer(body[count * 2 :], dtype=np.uint8)
+        return cls(registers)
+
+
+def monthly_hyperloglogs(
+    user_ids: np.ndarray, timestamps: np.ndarray
+) -> Dict[np.datetime64, HyperLogLog]:
+    months = month_starts(timestamps)
+    month_values, month_codes = np.unique(months, return_inverse=True)
+    index, ranks = hll_positions(np.asarray(user_ids))
+    registers = np.zeros((len(month_values), HLL_REGISTERS), dtype=np.uint8)
+    np.maximum.at(registers, (month_codes, index), ranks)
+    return {
+        month: HyperLogLog(registers[code]) for code, month in enumerate(month_values)
+    }
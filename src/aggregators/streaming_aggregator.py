@@ -0,0 +1,299 @@
+import os
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import structlog
+
+from config.config import settings
+from src.aggregators.rollups import (
+    ROLLUPS,
+    configured_rollups,
+    fetch_genres,
+    genre_partials,
+    truncate_staging,
+    write_partials,
+)
+from src.aggregators.sketches import (
+    HALF_STARS,
+    HLL_REGISTERS,
+    HyperLogLog,
+    half_star_histograms,
+    histogram_quantiles,
+    month_starts,
+    monthly_hyperloglogs,
+)
+from src.interfaces.extractor import Extractor
+from src.interfaces.loader import Loader
+from src import metrics
+from src.rating_codec import (
+    POSTGRES_HALF_STARS,
+    check_half_star_rows,
+    half_star_array,
+)
+
+log = structlog.get_logger()
+
+INITIAL_CAPACITY = 1024
+CATCH_UP_FETCH_SIZE = 100_000
+
+
+class StreamingRatingsAggregator(Loader):
+    def __init__(
+        self,
+        loader: Loader,
+        extractor: Extractor,
+        checkpoint_path: str = None,
+        checkpoint_interval: float = None,
+    ):
+        self.loader = loader
+        self.extractor = extractor
+        self.preferred_write_size = loader.preferred_write_size
+        self.flush_interval = loader.flush_interval
+        self.checkpoint_path = checkpoint_path or settings.aggregation.checkpoint_path
+        self.checkpoint_interval = (
+            checkpoint_interval
+            if checkpoint_interval is not None
+            else settings.aggregation.checkpoint_interval
+        )
+        self.rollups = configured_rollups()
+        self._reset()
+        self._last_checkpoint = time.monotonic()
+        log.info(
+            "Streaming Ratings Aggregator initialized.",
+            loader=loader.name,
+            checkpoint_path=self.checkpoint_path,
+        )
+
+    def _reset(self):
+        self.histograms = np.zeros((INITIAL_CAPACITY, HALF_STARS), dtype=np.int64)
+        self.monthly_raters: Dict[np.datetime64, HyperLogLog] = {}
+        self.user_totals = np.zeros((INITIAL_CAPACITY, 2), dtype=np.int64)
+        self.month_totals = np.zeros((INITIAL_CAPACITY, 2), dtype=np.int64)
+        self.high_water_mark: Tuple[int, int] = (0, 0)
+
+    @staticmethod
+    def _grow(array: np.ndarray, size: int) -> np.ndarray:
+        if size <= len(array):
+            return array
+        capacity = max(size, len(array) * 2)
+        return np.pad(array, ((0, capacity - len(array)), (0, 0)))
+
+    @staticmethod
+    def _add_totals(totals: np.ndarray, keys: np.ndarray, half_stars: np.ndarray):
+        size = len(totals)
+        totals[:, 0] += np.bincount(keys, weights=half_stars, minlength=size).astype(
+            np.int64
+        )
+        totals[:, 1] += np.bincount(keys, minlength=size)
+
+    def _accumulate(self, movie_ids, user_ids, half_stars, timestamps):
+        if not len(movie_ids):
+            return
+        months = month_starts(timestamps).astype(np.int64)
+        self.histograms = self._grow(self.histograms, int(movie_ids.max()) + 1)
+        self.user_totals = self._grow(self.user_totals, int(user_ids.max()) + 1)
+        self.month_totals = self._grow(self.month_totals, int(months.max()) + 1)
+        self.histograms += half_star_histograms(
+            movie_ids, half_stars, len(self.histograms)
+        )
+        self._add_totals(self.user_totals, user_ids, half_stars)
+        self._add_totals(self.month_totals, months, half_stars)
+        for month, sketch in monthly_hyperloglogs(user_ids, timestamps).items():
+            if month in self.monthly_raters:
+                self.monthly_raters[month].merge(sketch)
+            else:
+                self.monthly_raters[month] = sketch
+
+    def _load_checkpoint(self) -> bool:
+        if not os.path.exists(self.checkpoint_path):
+            return False
+        with np.load(self.checkpoint_path) as checkpoint:
+            if "user_totals" not in checkpoint.files:
+                log.warn(
+                    "Ignoring checkpoint without rollup totals",
+                    path=self.checkpoint_path,
+                )
+                return False
+            self.histograms = checkpoint["histograms"].copy()
+            self.user_totals = checkpoint["user_totals"].copy()
+            self.month_totals = checkpoint["month_totals"].copy()
+            self.monthly_raters = {
+                month: HyperLogLog(registers.copy())
+                for month, registers in zip(
+                    checkpoint["months"].astype("datetime64[M]"),
+                    checkpoint["month_registers"],
+                )
+            }
+            self.high_water_mark = tuple(int(v) for v in checkpoint["high_water_mark"])
+        return True
+
+    def checkpoint(self):
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        months = sorted(self.monthly_raters)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                histograms=self.histograms,
+                user_totals=self.user_totals,
+                month_totals=self.month_totals,
+                months=np.array(months, dtype="datetime64[M]").astype(np.int64),
+                month_registers=np.array(
+                    [self.monthly_raters[month].registers for month in months],
+                    dtype=np.uint8,
+                ).reshape(len(months), HLL_REGISTERS),
+                high_water_mark=np.array(self.high_water_mark, dtype=np.int64),
+            )
+        os.replace(tmp_path, self.checkpoint_path)
+        self._last_checkpoint = time.monotonic()
+        log.info("Streaming aggregation checkpointed", hwm=self.high_water_mark)
+
+    def _catch_up(self, loader_hwm: Tuple[int, int]):
+        query = f"""
+            SELECT movie_id, user_id, {POSTGRES_HALF_STARS}, timestamp
+            FROM movies.ratings
+            WHERE (user_id, movie_id) > (%s, %s) AND rating IS NOT NULL
+        """
+        num_rows = 0
+        with self.loader._get_connection() as conn:
+            with conn.cursor(name="streaming_catch_up") as cursor:
+                cursor.itersize = CATCH_UP_FETCH_SIZE
+                cursor.execute(query, self.high_water_mark)
+                while True:
+                    rows = cursor.fetchmany(CATCH_UP_FETCH_SIZE)
+                    if not rows:
+                        break
+                    check_half_star_rows(rows)
+                    columns = np.array(rows, dtype=np.int64)
+                    self._accumulate(
+                        columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3]
+                    )
+                    num_rows += len(rows)
+        log.info(
+            "Streaming aggregation caught up from PostgreSQL",
+            from_hwm=self.high_water_mark,
+            to_hwm=loader_hwm,
+            num_rows=num_rows,
+        )
+        self.high_water_mark = loader_hwm
+        self.checkpoint()
+
+    def start_run(self):
+        self.loader.start_run()
+
+    def finish_run(self):
+        self.loader.finish_run()
+
+    def get_high_water_mark(self) -> Tuple[int, int]:
+        loader_hwm = tuple(self.loader.get_high_water_mark())
+        if self._load_checkpoint() and self.high_water_mark > loader_hwm:
+            log.warn(
+                "Checkpoint is ahead of the sink, discarding it",
+                checkpoint_hwm=self.high_water_mark,
+                loader_hwm=loader_hwm,
+            )
+            self._reset()
+        if self.high_water_mark != loader_hwm:
+            self._catch_up(loader_hwm)
+        return loader_hwm
+
+    def write_batch(self, batch: List[Dict]) -> None:
+        self.loader.write_batch(batch)
+
+        def column(key):
+            return np.fromiter(
+                (rec[key] for rec in batch), dtype=np.int64, count=len(batch)
+            )
+
+        self._accumulate(
+            column("movieId"),
+            column("userId"),
+            half_star_array(batch),
+            column("timestamp"),
+        )
+        self.high_water_mark = tuple(self.extractor.get_next_high_water_mark(batch))
+
+        if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+
+    def summary(self) -> List[Tuple]:
+        movie_ids = np.flatnonzero(self.histograms.sum(axis=1))
+        histograms = self.histograms[movie_ids]
+        counts = histograms.sum(axis=1)
+        half_star_sums = histograms @ np.arange(1, HALF_STARS + 1)
+        averages = np.round(half_star_sums / 2 / counts, 5)
+        return list(
+            zip(
+                movie_ids.tolist(),
+                averages.tolist(),
+                counts.tolist(),
+                histogram_quantiles(histograms, 0.5).tolist(),
+                histogram_quantiles(histograms, 0.9).tolist(),
+                histograms.tolist(),
+            )
+        )
+
+    def rollup_partials(self, genres: Dict[int, List[str]]) -> Dict:
+        movie_ids = np.flatnonzero(self.histograms.sum(axis=1))
+        histograms = self.histograms[movie_ids]
+        user_ids = np.flatnonzero(self.user_totals[:, 1])
+        months = np.flatnonzero(self.month_totals[:, 1])
+        partials = {
+            "user": (user_ids, *self.user_totals[user_ids].T),
+            "month": (months.astype("datetime64[M]"), *self.month_totals[months].T),
+            "genre": genre_partials(
+                movie_ids,
+                histograms @ np.arange(1, HALF_STARS + 1),
+                histograms.sum(axis=1),
+                genres,
+            ),
+        }
+        return {rollup.name: partials[rollup.name] for rollup in self.rollups}
+
+    @metrics.AGGREGATION_STAGE_SECONDS.time(stage="stream")
+    def write_summary(self):
+        from psycopg2 import Binary, extras
+        from run_aggregation import AggregationDispatcher
+
+        self.checkpoint()
+        summary = self.summary()
+        log.info("Writing streamed summary to staging table", num_movies=len(summary))
+        with self.loader._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("TRUNCATE TABLE movies.ratings_summary_staging;")
+                cursor.execute("TRUNCATE TABLE movies.monthly_raters_staging;")
+                truncate_staging(cursor, self.rollups)
+                extras.execute_values(
+                    cursor,
+                    "INSERT INTO movies.ratings_summary_staging (movie_id, average_rating, rating_count, median_rating, p90_rating, rating_histogram) VALUES %s",
+                    summary,
+                )
+                extras.execute_values(
+                    cursor,
+                    "INSERT INTO movies.monthly_raters_staging (batch_id, month, sketch) VALUES %s",
+                    [
+                        (
+                            0,
+                            str(month.astype("datetime64[D]")),
+                            Binary(sketch.to_bytes()),
+                        )
+                        for month, sketch in self.monthly_raters.items()
+                    ],
+                )
+                genres = (
+                    fetch_genres(cursor, 0, len(self.histograms))
+                    if any(rollup.name == "genre" for rollup in self.rollups)
+                    else {}
+                )
+                for name, partials in self.rollup_partials(genres).items():
+                    write_partials(cursor, ROLLUPS[name], 0, partials)
+            conn.commit()
+        metrics.AGGREGATION_MOVIES.inc(len(summary))
+        AggregationDispatcher().finalize_promotion()
+
+    def close(self):
+        if hasattr(self.loader, "close"):
+            self.loader.close()
@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+from typing import Dict
+
+import structlog
+
+from config.config import settings
+from src import metrics
+
+log = structlog.get_logger()
+
+TIMEOUT_ERROR_NAMES = ("Timeout", "TransientError", "ServiceUnavailable")
+
+_store_lock = threading.Lock()
+
+
+def is_timeout_error(error: BaseException) -> bool:
+    if isinstance(error, TimeoutError):
+        return True
+    return any(name in type(error).__name__ for name in TIMEOUT_ERROR_NAMES)
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0.0
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class AdaptiveBatchSizer:
+    def __init__(
+        self,
+        name: str,
+        initial_size: int,
+        min_size: int = None,
+        max_size: int = None,
+        target_seconds: float = None,
+        increase_step: int = None,
+        decrease_factor: float = None,
+        memory_limit_mb: float = None,
+    ):
+        self.name = name
+        self.min_size = min_size or settings.etl.min_batch_size
+        self.max_size = max_size or settings.etl.max_batch_size
+        self.target_seconds = target_seconds or settings.etl.target_batch_seconds
+        self.increase_step = increase_step or max(self.min_size, 1)
+        self.decrease_factor = decrease_factor or 0.5
+        self.memory_limit_mb = (
+            memory_limit_mb
+            if memory_limit_mb is not None
+            else settings.etl.memory_limit_mb
+        )
+        self.size = self._clamp(initial_size)
+        self.best_rows_per_second = 0.0
+        metrics.CONDUCTOR_BATCH_SIZE.set(self.size, loader=name)
+
+    def _clamp(self, size: float) -> int:
+        return int(min(self.max_size, max(self.min_size, size)))
+
+    def _set(self, size: int, reason: str):
+        size = self._clamp(size)
+        if size != self.size:
+            log.info(
+                "Adaptive batch size changed",
+                loader=self.name,
+                old_size=self.size,
+                new_size=size,
+                reason=reason,
+            )
+            self.size = size
+            metrics.CONDUCTOR_BATCH_SIZE.set(size, loader=self.name)
+
+    def back_off(self, reason: str) -> bool:
+        if self.size <= self.min_size:
+            return False
+        self._set(self.size * self.decrease_factor, reason)
+        return True
+
+    def observe(self, rows: int, seconds: float) -> int:
+        if self.memory_limit_mb and current_rss_mb() > self.memory_limit_mb:
+            self.back_off("memory_pressure")
+            return self.size
+        if seconds > self.target_seconds:
+            self.back_off("latency")
+            return self.size
+
+        if rows < self.size or seconds <= 0:
+            return self.size
+        rows_per_second = rows / seconds
+        if rows_per_second < self.best_rows_per_second * 0.8:
+            self.best_rows_per_second *= 0.9
+            self.back_off("throughput")
+            return self.size
+
+        self.best_rows_per_second = max(self.best_rows_per_second, rows_per_second)
+        self._set(self.size + self.increase_step, "increase")
+        return self.size
+
+
+class BatchSizeStore:
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Dict[str, int]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return {name: int(size) for name, size in json.load(f).items()}
+        except (OSError, ValueError) as e:
+            log.warn(
+                "Ignoring unreadable batch size state", path=self.path, error=str(e)
+            )
+            return {}
+
+    def save(self, name: str, size: int):
+        if not self.path:
+            return
+        with _store_lock:
+            sizes = self.load()
+            sizes[name] = size
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(sizes, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,54 @@
+import json
+import os
+import threading
+from typing import Dict, List, Tuple
+
+import structlog
+
+log = structlog.get_logger()
+
+
+class DeadLetterStore:
+    def __init__(self, path: str, key_fields: Tuple[str, ...]):
+        self.path = path
+        self.key_fields = key_fields
+        self._lock = threading.Lock()
+
+    def _key(self, row: Dict) -> Tuple:
+        return tuple(row[field] for field in self.key_fields)
+
+    def append(self, rows: List[Dict], reason: str):
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a") as f:
+                for row in rows:
+                    f.write(json.dumps({"reason": reason, "row": row}) + "\n")
+
+    def pending(self) -> List[Dict]:
+        entries = {}
+        with self._lock:
+            if not os.path.exists(self.path):
+                return []
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        log.warn("Skipping unreadable dead letter", path=self.path)
+                        continue
+                    entries[self._key(entry["row"])] = entry
+        return list(entries.values())
+
+    def replace(self, entries: List[Dict]):
+        with self._lock:
+            if not entries:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.path)
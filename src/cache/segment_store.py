@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import structlog
+
+log = structlog.get_logger()
+
+MANIFEST_FILE = "manifest.json"
+KINDS_KEY = "__kinds__"
+NULL_SUFFIX = "__null"
+
+
+def _to_hwm(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def _column_kind(values: List[Any]) -> str:
+    sample = next((value for value in values if value is not None), None)
+    if isinstance(sample, bool):
+        return "bool"
+    if isinstance(sample, int):
+        return "int"
+    if isinstance(sample, float):
+        return "float"
+    if isinstance(sample, Decimal):
+        return "decimal"
+    return "str"
+
+
+def encode_batch(batch: List[Dict]) -> Dict[str, np.ndarray]:
+    arrays = {}
+    kinds = []
+    for column in batch[0].keys():
+        values = [record[column] for record in batch]
+        kind = _column_kind(values)
+        nulls = np.array([value is None for value in values], dtype=bool)
+
+        if kind == "int":
+            array = np.array([0 if v is None else v for v in values], dtype=np.int64)
+        elif kind == "float":
+            array = np.array(
+                [0.0 if v is None else v for v in values], dtype=np.float64
+            )
+        elif kind == "bool":
+            array = np.array([bool(v) for v in values], dtype=bool)
+        else:
+            array = np.array(["" if v is None else str(v) for v in values], dtype=str)
+
+        arrays[column] = array
+        if nulls.any():
+            arrays[column + NULL_SUFFIX] = nulls
+        kinds.append(f"{column}:{kind}")
+
+    arrays[KINDS_KEY] = np.array(kinds, dtype=str)
+    return arrays
+
+
+def decode_batch(arrays: Dict[str, np.ndarray]) -> List[Dict]:
+    columns = {}
+    for entry in arrays[KINDS_KEY].tolist():
+        column, kind = entry.rsplit(":", 1)
+        values = arrays[column].tolist()
+        if kind == "decimal":
+            values = [Decimal(value) for value in values]
+        null_key = column + NULL_SUFFIX
+        if null_key in arrays:
+            values = [
+                None if is_null else value
+                for value, is_null in zip(values, arrays[null_key].tolist())
+            ]
+        columns[column] = values
+
+    names = list(columns.keys())
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+class SegmentStore:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._last_access: Dict[str, float] = {}
+        self._decoded: Dict[str, List[Dict]] = {}
+        os.makedirs(self.directory, exist_ok=True)
+        self._manifest = self._load_manifest()
+        log.info(
+            "Segment store opened",
+            directory=self.directory,
+            num_segments=len(self._manifest["segments"]),
+        )
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self._manifest_path()) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {"source_high_water_mark": None, "next_id": 0, "segments": []}
+        except (OSError, ValueError) as err:
+            log.warn("Unreadable cache manifest, starting empty", error=str(err))
+            return {"source_high_water_mark": None, "next_id": 0, "segments": []}
+
+        manifest["source_high_water_mark"] = _to_hwm(
+            manifest.get("source_high_water_mark")
+        )
+        for segment in manifest["segments"]:
+            segment["start"] = _to_hwm(segment["start"])
+            segment["end"] = _to_hwm(segment["end"])
+        return manifest
+
+    def _save_manifest(self):
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp_path, self._manifest_path())
+
+    def _remove_segment_file(self, segment: Dict):
+        self._decoded.pop(segment["file"], None)
+        self._last_access.pop(segment["file"], None)
+        try:
+            os.remove(os.path.join(self.directory, segment["file"]))
+        except FileNotFoundError:
+            pass
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(segment["bytes"] for segment in self._manifest["segments"])
+
+    @property
+    def source_high_water_mark(self) -> Any:
+        return self._manifest["source_high_water_mark"]
+
+    def find(self, high_water_mark: Any) -> Optional[Dict]:
+        with self._lock:
+            for segment in self._manifest["segments"]:
+                if segment["start"] <= high_water_mark < segment["end"]:
+                    self._last_access[segment["file"]] = time.monotonic()
+                    return segment
+        return None
+
+    def read(self, segment: Dict) -> List[Dict]:
+        with self._lock:
+            rows = self._decoded.get(segment["file"])
+            if rows is not None:
+                return rows
+
+        path = os.path.join(self.directory, segment["file"])
+        with np.load(path, allow_pickle=False) as data:
+            rows = decode_batch({key: data[key] for key in data.files})
+
+        with self._lock:
+            self._decoded = {segment["file"]: rows}
+        return rows
+
+    def append(self, start: Any, end: Any, batch: List[Dict]) -> bool:
+        with self._lock:
+            for segment in self._manifest["segments"]:
+                if start < segment["end"] and segment["start"] < end:
+                    return False
+
+            file_name = f"segment-{self._manifest['next_id']:08d}.npz"
+            self._manifest["next_id"] += 1
+
+        path = os.path.join(self.directory, file_name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **encode_batch(batch))
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._manifest["segments"].append(
+                {
+                    "file": file_name,
+                    "start": start,
+                    "end": end,
+                    "rows": len(batch),
+                    "bytes": os.path.getsize(path),
+                }
+            )
+            self._manifest["segments"].sort(key=lambda segment: segment["start"])
+            self._last_access[file_name] = time.monotonic()
+            self._evict()
+            self._save_manifest()
+        return True
+
+    def _evict(self):
+        segments = self._manifest["segments"]
+        total = sum(segment["bytes"] for segment in segments)
+        if total <= self.max_bytes:
+            return
+
+        by_access = sorted(
+            segments, key=lambda segment: self._last_access.get(segment["file"], 0.0)
+        )
+        evicted = 0
+        for segment in by_access:
+            if total <= self.max_bytes:
+                break
+            total -= segment["bytes"]
+            segments.remove(segment)
+            self._remove_segment_file(segment)
+            evicted += 1
+        log.info("Evicted cache segments", evicted=evicted, total_bytes=total)
+
+    def set_source_high_water_mark(self, high_water_mark: Any):
+        with self._lock:
+            self._manifest["source_high_water_mark"] = high_water_mark
+            self._save_manifest()
+
+    def invalidate(self):
+        with self._lock:
+            for segment in self._manifest["segments"]:
+                self._remove_segment_file(segment)
+            num_segments = len(self._manifest["segments"])
+            self._manifest["segments"] = []
+            self._manifest["source_high_water_mark"] = None
+            self._save_manifest()
+        log.warn("Cache invalidated", directory=self.directory, segments=num_segments)
@@ -0,0 +1,99 @@
+import time
+from typing import Any, Dict
+
+import structlog
+
+from src.cache.segment_store import SegmentStore, _to_hwm
+from src import metrics
+
+log = structlog.get_logger()
+
+
+class SpillQueue(SegmentStore):
+    def __init__(self, directory: str, max_bytes: int, consumer_ttl_seconds=None):
+        self.consumer_ttl_seconds = consumer_ttl_seconds
+        super().__init__(directory, max_bytes)
+
+    def _load_manifest(self) -> Dict:
+        manifest = super()._load_manifest()
+        manifest["consumers"] = {
+            consumer: _to_hwm(high_water_mark)
+            for consumer, high_water_mark in manifest.get("consumers", {}).items()
+        }
+        manifest["consumers_seen_at"] = {
+            consumer: manifest.get("consumers_seen_at", {}).get(consumer, time.time())
+            for consumer in manifest["consumers"]
+        }
+        return manifest
+
+    @property
+    def consumers(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._manifest["consumers"])
+
+    def register(self, consumer: str):
+        with self._lock:
+            self._manifest["consumers"].setdefault(consumer, None)
+            self._manifest["consumers_seen_at"][consumer] = time.time()
+            self._save_manifest()
+
+    def remove_consumer(self, consumer: str):
+        with self._lock:
+            self._manifest["consumers"].pop(consumer, None)
+            self._manifest["consumers_seen_at"].pop(consumer, None)
+            self._trim()
+            self._save_manifest()
+        log.info("Spill queue consumer removed", consumer=consumer)
+
+    def acknowledge(self, consumer: str, high_water_mark: Any):
+        with self._lock:
+            now = time.time()
+            self._manifest["consumers"][consumer] = high_water_mark
+            self._manifest["consumers_seen_at"][consumer] = now
+            self._expire_consumers(now)
+            self._trim()
+            self._save_manifest()
+
+    def _expire_consumers(self, now: float):
+        if not self.consumer_ttl_seconds:
+            return
+        seen_at = self._manifest["consumers_seen_at"]
+        for consumer, seen in list(seen_at.items()):
+            if now - seen > self.consumer_ttl_seconds:
+                del seen_at[consumer]
+                del self._manifest["consumers"][consumer]
+                log.warn(
+                    "Spill queue consumer expired",
+                    consumer=consumer,
+                    idle_seconds=round(now - seen),
+                )
+
+    def _trim(self):
+        positions = list(self._manifest["consumers"].values())
+        if positions and None not in positions:
+            slowest = min(positions)
+            segments = self._manifest["segments"]
+            drained = [segment for segment in segments if segment["end"] <= slowest]
+            for segment in drained:
+                segments.remove(segment)
+                self._remove_segment_file(segment)
+        metrics.SPILL_QUEUE_BYTES.set(self.total_bytes)
+
+    def _evict(self):
+        segments = self._manifest["segments"]
+        total = sum(segment["bytes"] for segment in segments)
+        evicted = 0
+        while total > self.max_bytes and len(segments) > 1:
+            segment = segments.pop(0)
+            total -= segment["bytes"]
+            self._remove_segment_file(segment)
+            evicted += 1
+        if evicted:
+            log.warn(
+                "Spill queue full, dropped oldest segments; lagging consumers "
+                "will re-extract them from the source",
+                evicted=evicted,
+                total_bytes=total,
+                consumers=self._manifest["consumers"],
+            )
+        metrics.SPILL_QUEUE_BYTES.set(total)
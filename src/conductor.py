@@ -1,10 +1,14 @@
+import contextvars
+import time
 import structlog
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List
+from typing import Dict, List
 
 from config.config import settings
+from src.batch_sizing import AdaptiveBatchSizer, BatchSizeStore, is_timeout_error
 from src.interfaces.extractor import Extractor
 from src.interfaces.loader import Loader
+from src import metrics, profiling, tracing
 
 log = structlog.get_logger()
 
@@ -14,60 +18,157 @@ class PipelineConductor:
         self.extractor = extractor
         self.loaders = loaders
         self.batch_size = settings.etl.batch_size
+        self.adaptive = settings.etl.adaptive_batching
+        self.batch_size_store = BatchSizeStore(settings.etl.batch_state_path)
         log.info(
             "Conductor initialized",
             extractor=type(extractor).__name__,
-            loaders=[type(loader).__name__ for loader in loaders],
+            loaders=[loader.name for loader in loaders],
         )
 
     def _run_pipeline_for_loader(self, loader: Loader):
-        loader_name = type(loader).__name__
+        loader_name = loader.name
+        with tracing.span("conductor.pipeline", loader=loader_name):
+            return self._run_batches_for_loader(loader, loader_name)
+
+    def _create_sizer(self, loader_name: str, write_size: int) -> AdaptiveBatchSizer:
+        initial_size = self.batch_size_store.load().get(loader_name, write_size)
+        sizer = AdaptiveBatchSizer(loader_name, initial_size)
+        log.info("Adaptive batch sizing enabled", loader=loader_name, size=sizer.size)
+        return sizer
+
+    def _write(self, loader: Loader, loader_name: str, chunk: List[Dict]):
+        with tracing.span(
+            "conductor.write", loader=loader_name, num_records=len(chunk)
+        ):
+            with profiling.profiled("conductor.write"):
+                with metrics.CONDUCTOR_WRITE_SECONDS.time(loader=loader_name):
+                    loader.write_batch(chunk)
+
+    def _run_batches_for_loader(self, loader: Loader, loader_name: str):
         log.info("Starting pipeline", loader=loader_name)
+        write_size = loader.preferred_write_size
+        sizer = (
+            self._create_sizer(loader_name, write_size or self.batch_size)
+            if self.adaptive
+            else None
+        )
 
+        started = time.perf_counter()
+        rows_moved = 0
+        buffer: List[Dict] = []
+        buffered_since = None
         try:
+            loader.start_run()
             high_water_mark = loader.get_high_water_mark()
             log.info("Initial high-water mark", loader=loader_name, hwm=high_water_mark)
+            self.extractor.acknowledge(loader_name, high_water_mark)
 
             while True:
-                log.info(
+                log.debug(
                     "Extracting batch for loader",
                     loader=loader_name,
                     high_water_mark=high_water_mark,
                     batch_size=self.batch_size,
                 )
-                batch = self.extractor.read_batch(
-                    batch_size=self.batch_size, high_water_mark=high_water_mark
+                with tracing.span("conductor.extract", loader=loader_name):
+                    with profiling.profiled("conductor.extract"):
+                        with metrics.CONDUCTOR_EXTRACT_SECONDS.time(loader=loader_name):
+                            batch = self.extractor.read_batch(
+                                batch_size=self.batch_size,
+                                high_water_mark=high_water_mark,
+                            )
+
+                exhausted = not batch
+                if batch:
+                    buffer.extend(batch)
+                    high_water_mark = self.extractor.get_next_high_water_mark(batch)
+                    buffered_since = buffered_since or time.monotonic()
+                flush_due = exhausted or (
+                    loader.flush_interval
+                    and time.monotonic() - buffered_since >= loader.flush_interval
                 )
 
-                if not batch:
+                while buffer:
+                    target = sizer.size if sizer else write_size or len(buffer)
+                    if len(buffer) < target and not flush_due:
+                        break
+                    chunk = buffer[:target]
+                    write_started = time.perf_counter()
+                    try:
+                        self._write(loader, loader_name, chunk)
+                    except Exception as e:
+                        if not (
+                            sizer and is_timeout_error(e) and sizer.back_off("timeout")
+                        ):
+                            raise
+                        log.warn(
+                            "Write timed out, retrying with a smaller batch",
+                            loader=loader_name,
+                            batch_size=sizer.size,
+                            error=str(e),
+                        )
+                        continue
+                    if sizer:
+                        sizer.observe(len(chunk), time.perf_counter() - write_started)
+                    del buffer[: len(chunk)]
+                    committed_hwm = self.extractor.get_next_high_water_mark(chunk)
+                    self.extractor.acknowledge(loader_name, committed_hwm)
+
+                    rows_moved += len(chunk)
+                    metrics.CONDUCTOR_BATCHES.inc(loader=loader_name)
+                    metrics.CONDUCTOR_ROWS_PER_SECOND.set(
+                        rows_moved / (time.perf_counter() - started), loader=loader_name
+                    )
+                    log.info(
+                        "Batch committed. New high-water mark.",
+                        loader=loader_name,
+                        hwm=committed_hwm,
+                        buffered=len(buffer),
+                    )
+
+                if not buffer:
+                    buffered_since = None
+                if exhausted:
                     log.info(
                         "No new data found for loader. Pipeline finished.",
                         loader=loader_name,
                     )
                     break
 
-                loader.write_batch(batch)
-
-                high_water_mark = self.extractor.get_next_high_water_mark(batch)
+            loader.finish_run()
+            if sizer:
                 log.info(
-                    "Batch processed. New high-water mark.",
+                    "Adaptive batch size at end of run",
                     loader=loader_name,
-                    hwm=high_water_mark,
+                    batch_size=sizer.size,
                 )
-
+                self.batch_size_store.save(loader_name, sizer.size)
             return f"Pipeline for {loader_name} completed successfully."
         except Exception as e:
-            log.error("Pipeline failed for loader", loader=loader_name, error=str(e))
+            log.error(
+                "Pipeline failed for loader",
+                loader=loader_name,
+                error=str(e),
+                uncommitted_rows=len(buffer),
+            )
+            metrics.CONDUCTOR_FAILURES.inc(loader=loader_name)
             raise
+        finally:
+            metrics.CONDUCTOR_PENDING_LOADERS.dec()
 
-    def run_concurrently(self):
+    def run_concurrently(self) -> Dict[str, str]:
         log.info("Starting concurrent pipeline execution...")
+        metrics.CONDUCTOR_PENDING_LOADERS.inc(len(self.loaders))
 
+        failures = {}
         with ThreadPoolExecutor(max_workers=len(self.loaders)) as executor:
             future_to_loader = {
-                executor.submit(self._run_pipeline_for_loader, loader): type(
-                    loader
-                ).__name__
+                executor.submit(
+                    contextvars.copy_context().run,
+                    self._run_pipeline_for_loader,
+                    loader,
+                ): loader.name
                 for loader in self.loaders
             }
 
@@ -82,5 +183,7 @@ class PipelineConductor:
                         loader=loader_name,
                         exception=str(exc),
                     )
+                    failures[loader_name] = str(exc)
 
         log.info("All concurrent pipelines have finished.")
+        return failures
@@ -0,0 +1,87 @@
+import os
+import threading
+import structlog
+from typing import Any, Dict, List
+
+from config.config import settings
+from src.cache.segment_store import SegmentStore
+from src.interfaces.extractor import Extractor
+from src import metrics
+
+log = structlog.get_logger()
+
+
+class CachedExtractor(Extractor):
+    def __init__(self, extractor: Extractor, directory: str = None, max_bytes=None):
+        self.extractor = extractor
+        extractor_name = type(extractor).__name__
+        self.store = SegmentStore(
+            directory=directory
+            or os.path.join(settings.cache.directory, extractor_name),
+            max_bytes=max_bytes if max_bytes is not None else settings.cache.max_bytes,
+        )
+        self._validated = False
+        self._validate_lock = threading.Lock()
+        log.info("Cached Extractor initialized.", extractor=extractor_name)
+
+    def _validate_against_source(self):
+        with self._validate_lock:
+            if self._validated:
+                return
+            source_hwm = self.extractor.get_source_high_water_mark()
+            cached_hwm = self.store.source_high_water_mark
+            if source_hwm is not None:
+                if cached_hwm is not None and source_hwm < cached_hwm:
+                    log.warn(
+                        "Source high-water mark moved backwards, invalidating cache",
+                        cached_hwm=cached_hwm,
+                        source_hwm=source_hwm,
+                    )
+                    self.store.invalidate()
+                self.store.set_source_high_water_mark(source_hwm)
+            self._validated = True
+
+    def _rows_after(self, rows: List[Dict], high_water_mark: Any) -> List[Dict]:
+        return [
+            row
+            for row in rows
+            if self.extractor.get_next_high_water_mark([row]) > high_water_mark
+        ]
+
+    def read_batch(self, batch_size: int, high_water_mark: Any) -> List[Dict]:
+        self._validate_against_source()
+
+        segment = self.store.find(high_water_mark)
+        if segment is not None:
+            rows = self.store.read(segment)
+            if high_water_mark != segment["start"]:
+                rows = self._rows_after(rows, high_water_mark)
+            batch = [dict(row) for row in rows[:batch_size]]
+            metrics.CACHE_REQUESTS.inc(result="hit")
+            log.debug(
+                "Batch served from cache",
+                high_water_mark=high_water_mark,
+                num_records=len(batch),
+            )
+            return batch
+
+        metrics.CACHE_REQUESTS.inc(result="miss")
+        batch = self.extractor.read_batch(
+            batch_size=batch_size, high_water_mark=high_water_mark
+        )
+        if batch:
+            next_hwm = self.extractor.get_next_high_water_mark(batch)
+            if self.store.append(high_water_mark, next_hwm, batch):
+                log.debug(
+                    "Batch cached",
+                    start=high_water_mark,
+                    end=next_hwm,
+                    num_records=len(batch),
+                )
+        return batch
+
+    def get_next_high_water_mark(self, batch: List[Dict]) -> Any:
+        return self.extractor.get_next_high_water_mark(batch)
+
+    def get_source_high_water_mark(self) -> Any:
+        return self.extractor.get_source_high_water_mark()
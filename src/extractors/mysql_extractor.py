@@ -4,6 +4,8 @@ from typing import List, Dict
 
 from config.config import settings
 from src.interfaces.extractor import Extractor
+from src import metrics
+from src.throttling import build_replica_router, get_source_governor
 
 log = structlog.get_logger()
 
@@ -16,11 +18,16 @@ class MySQLExtractor(Extractor):
             "host": settings.mysql.host,
             "database": settings.mysql.db,
         }
+        self.governor = get_source_governor("mysql", settings.mysql)
+        self.router = build_replica_router(
+            self.db_config, settings.mysql, mysql.connector.connect
+        )
         log.info("MySQL Extractor initialized.")
 
-    def _get_connection(self):
+    def _get_connection(self, read_only: bool = False):
+        config = self.router.read_config() if read_only else self.db_config
         try:
-            return mysql.connector.connect(**self.db_config)
+            return mysql.connector.connect(**config)
         except mysql.connector.Error as err:
             log.error("Failed to connect to MySQL", error=str(err))
             raise
@@ -33,22 +40,35 @@ class MySQLExtractor(Extractor):
             ORDER BY movieId ASC
             LIMIT %s
         """
-        log.info(
+        log.debug(
             "Reading batch from MySQL",
             batch_size=batch_size,
             high_water_mark=high_water_mark,
         )
 
         try:
-            with self._get_connection() as conn:
-                with conn.cursor(dictionary=True) as cursor:
-                    cursor.execute(query, (high_water_mark, batch_size))
-                    result = cursor.fetchall()
-                    log.info("Batch read successfully", num_records=len(result))
-                    return result
+            with self.governor.query(expected_rows=batch_size) as request:
+                with self._get_connection(read_only=True) as conn:
+                    with conn.cursor(dictionary=True) as cursor:
+                        with metrics.EXTRACT_SECONDS.time(extractor="MySQLExtractor"):
+                            cursor.execute(query, (high_water_mark, batch_size))
+                            result = cursor.fetchall()
+                request.rows = len(result)
         except mysql.connector.Error as err:
             log.error("Failed to read batch from MySQL", error=str(err))
             return []
+        metrics.ROWS_EXTRACTED.inc(len(result), extractor="MySQLExtractor")
+        log.debug("Batch read successfully", num_records=len(result))
+        self.governor.consume_rows(len(result))
+        return result
+
+    def get_source_high_water_mark(self) -> int:
+        query = "SELECT MAX(movieId) FROM movies"
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query)
+                result = cursor.fetchone()[0]
+                return result if result is not None else 0
 
     def get_next_high_water_mark(self, batch: List[Dict]) -> int:
         if not batch:
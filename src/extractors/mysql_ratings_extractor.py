@@ -4,6 +4,9 @@ from typing import List, Dict, Tuple
 
 from config.config import settings
 from src.interfaces.extractor import Extractor
+from src import metrics
+from src.rating_codec import HALF_STARS_KEY, MYSQL_HALF_STARS
+from src.throttling import build_replica_router, get_source_governor
 
 log = structlog.get_logger()
 
@@ -16,11 +19,24 @@ class MySQLRatingsExtractor(Extractor):
             "host": settings.mysql.host,
             "database": settings.mysql.db,
         }
-        log.info("MySQL Ratings Extractor initialized.")
+        self.governor = get_source_governor("mysql", settings.mysql)
+        self.router = build_replica_router(
+            self.db_config, settings.mysql, mysql.connector.connect
+        )
+        self.rating_column = (
+            f"{MYSQL_HALF_STARS} AS {HALF_STARS_KEY}"
+            if settings.etl.compact_ratings
+            else "rating"
+        )
+        log.info(
+            "MySQL Ratings Extractor initialized.",
+            compact_ratings=settings.etl.compact_ratings,
+        )
 
-    def _get_connection(self):
+    def _get_connection(self, read_only: bool = False):
+        config = self.router.read_config() if read_only else self.db_config
         try:
-            return mysql.connector.connect(**self.db_config)
+            return mysql.connector.connect(**config)
         except mysql.connector.Error as err:
             log.error("Failed to connect to MySQL", error=str(err))
             raise
@@ -30,29 +46,51 @@ class MySQLRatingsExtractor(Extractor):
     ) -> List[Dict]:
         last_user_id, last_movie_id = high_water_mark
 
-        query = """
-            SELECT userId, movieId, rating, timestamp
+        query = f"""
+            SELECT userId, movieId, {self.rating_column}, timestamp
             FROM ratings
             WHERE (userId, movieId) > (%s, %s)
             ORDER BY userId ASC, movieId ASC
             LIMIT %s
         """
-        log.info(
+        log.debug(
             "Reading ratings batch from MySQL",
             batch_size=batch_size,
             high_water_mark=f"({last_user_id}, {last_movie_id})",
         )
 
         try:
-            with self._get_connection() as conn:
-                with conn.cursor(dictionary=True) as cursor:
-                    cursor.execute(query, (last_user_id, last_movie_id, batch_size))
-                    result = cursor.fetchall()
-                    log.info("Ratings batch read successfully", num_records=len(result))
-                    return result
+            with self.governor.query(expected_rows=batch_size) as request:
+                with self._get_connection(read_only=True) as conn:
+                    with conn.cursor(dictionary=True) as cursor:
+                        with metrics.EXTRACT_SECONDS.time(
+                            extractor="MySQLRatingsExtractor"
+                        ):
+                            cursor.execute(
+                                query, (last_user_id, last_movie_id, batch_size)
+                            )
+                            result = cursor.fetchall()
+                request.rows = len(result)
         except mysql.connector.Error as err:
             log.error("Failed to read ratings batch from MySQL", error=str(err))
             return []
+        metrics.ROWS_EXTRACTED.inc(len(result), extractor="MySQLRatingsExtractor")
+        log.debug("Ratings batch read successfully", num_records=len(result))
+        self.governor.consume_rows(len(result))
+        return result
+
+    def get_source_high_water_mark(self) -> Tuple[int, int]:
+        query = """
+            SELECT userId, movieId
+            FROM ratings
+            ORDER BY userId DESC, movieId DESC
+            LIMIT 1
+        """
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query)
+                result = cursor.fetchone()
+                return (result[0], result[1]) if result else (0, 0)
 
     def get_next_high_water_mark(self, batch: List[Dict]) -> Tuple[int, int]:
         if not batch:
@@ -0,0 +1,93 @@
+import os
+import threading
+import structlog
+from typing import Any, Dict, List, Optional
+
+from config.config import settings
+from src.cache.spill_queue import SpillQueue
+from src.interfaces.extractor import Extractor
+from src import metrics
+
+log = structlog.get_logger()
+
+
+class SpillingExtractor(Extractor):
+    def __init__(
+        self,
+        extractor: Extractor,
+        directory: str = None,
+        max_bytes=None,
+        consumer_ttl_seconds=None,
+    ):
+        self.extractor = extractor
+        extractor_name = type(extractor).__name__
+        self.queue = SpillQueue(
+            directory=directory
+            or os.path.join(settings.spill.directory, extractor_name),
+            max_bytes=max_bytes if max_bytes is not None else settings.spill.max_bytes,
+            consumer_ttl_seconds=(
+                consumer_ttl_seconds
+                if consumer_ttl_seconds is not None
+                else settings.spill.consumer_ttl_seconds
+            ),
+        )
+        self._source_lock = threading.Lock()
+        log.info(
+            "Spilling Extractor initialized.",
+            extractor=extractor_name,
+            consumers=self.queue.consumers,
+        )
+
+    def _read_spilled(
+        self, batch_size: int, high_water_mark: Any
+    ) -> Optional[List[Dict]]:
+        segment = self.queue.find(high_water_mark)
+        if segment is None:
+            return None
+        rows = self.queue.read(segment)
+        if high_water_mark != segment["start"]:
+            rows = [
+                row
+                for row in rows
+                if self.extractor.get_next_high_water_mark([row]) > high_water_mark
+            ]
+        return [dict(row) for row in rows[:batch_size]]
+
+    def read_batch(self, batch_size: int, high_water_mark: Any) -> List[Dict]:
+        batch = self._read_spilled(batch_size, high_water_mark)
+        if batch is None:
+            with self._source_lock:
+                batch = self._read_spilled(batch_size, high_water_mark)
+                if batch is None:
+                    metrics.SPILL_REQUESTS.inc(result="source")
+                    batch = self.extractor.read_batch(
+                        batch_size=batch_size, high_water_mark=high_water_mark
+                    )
+                    if batch:
+                        self.queue.append(
+                            high_water_mark,
+                            self.extractor.get_next_high_water_mark(batch),
+                            batch,
+                        )
+                    return batch
+        metrics.SPILL_REQUESTS.inc(result="spilled")
+        log.debug(
+            "Batch drained from spill queue",
+            high_water_mark=high_water_mark,
+            num_records=len(batch),
+        )
+        return batch
+
+    def register_consumer(self, consumer: str) -> None:
+        self.extractor.register_consumer(consumer)
+        self.queue.register(consumer)
+
+    def acknowledge(self, consumer: str, high_water_mark: Any) -> None:
+        self.extractor.acknowledge(consumer, high_water_mark)
+        self.queue.acknowledge(consumer, high_water_mark)
+
+    def get_next_high_water_mark(self, batch: List[Dict]) -> Any:
+        return self.extractor.get_next_high_water_mark(batch)
+
+    def get_source_high_water_mark(self) -> Any:
+        return self.extractor.get_source_high_water_mark()
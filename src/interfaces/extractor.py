@@ -10,3 +10,12 @@ class Extractor(ABC):
     @abstractmethod
     def get_next_high_water_mark(self, batch: List[Dict]) -> Any:
         pass
+
+    def get_source_high_water_mark(self) -> Any:
+        return None
+
+    def register_consumer(self, consumer: str) -> None:
+        pass
+
+    def acknowledge(self, consumer: str, high_water_mark: Any) -> None:
+        pass
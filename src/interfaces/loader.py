@@ -1,8 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 
 class Loader(ABC):
+    preferred_write_size: Optional[int] = None
+    flush_interval: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
     @abstractmethod
     def get_high_water_mark(self) -> int:
         pass
@@ -10,3 +17,9 @@ class Loader(ABC):
     @abstractmethod
     def write_batch(self, batch: List[Dict]) -> None:
         pass
+
+    def start_run(self) -> None:
+        pass
+
+    def finish_run(self) -> None:
+        pass
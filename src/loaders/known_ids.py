@@ -0,0 +1,48 @@
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+_registry: Dict[str, "KnownIds"] = {}
+_registry_lock = threading.Lock()
+
+
+class KnownIds:
+    def __init__(self, ids: Iterable[int] = ()):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.synced = False
+        self._lock = threading.Lock()
+        self.add(ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: Iterable[int]):
+        ids = np.fromiter(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        with self._lock:
+            self.ids = np.union1d(self.ids, ids)
+
+    def contains(self, ids: Iterable[int]) -> np.ndarray:
+        ids = np.fromiter(ids, dtype=np.int64)
+        known = self.ids
+        if not len(known):
+            return np.zeros(len(ids), dtype=bool)
+        positions = np.minimum(np.searchsorted(known, ids), len(known) - 1)
+        return known[positions] == ids
+
+    def partition(self, rows: List[Dict], key: str) -> Tuple[List[Dict], List[Dict]]:
+        mask = self.contains(row[key] for row in rows)
+        if mask.all():
+            return rows, []
+        loadable = [row for row, known in zip(rows, mask.tolist()) if known]
+        orphans = [row for row, known in zip(rows, mask.tolist()) if not known]
+        return loadable, orphans
+
+
+def known_ids(name: str) -> KnownIds:
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = KnownIds()
+        return _registry[name]
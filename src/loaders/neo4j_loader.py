@@ -4,9 +4,13 @@ from neo4j import GraphDatabase
 
 from config.config import settings
 from src.interfaces.loader import Loader
+from src.loaders.known_ids import known_ids
+from src import metrics
 
 log = structlog.get_logger()
 
+KNOWN_MOVIE_IDS = "neo4j.movies"
+
 
 class Neo4jLoader(Loader):
     def __init__(self):
@@ -14,6 +18,8 @@ class Neo4jLoader(Loader):
         user = settings.neo4j.user
         password = settings.neo4j.password
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.preferred_write_size = settings.neo4j.write_batch_size
+        self.flush_interval = settings.neo4j.flush_interval
         log.info("Neo4j Loader initialized.")
 
     def _get_session(self):
@@ -49,12 +55,17 @@ class Neo4jLoader(Loader):
             MERGE (m)-[:IN_GENRE]->(g)
         )
         """
-        log.info("Writing batch to Neo4j", num_records=len(transformed_batch))
+        log.debug("Writing batch to Neo4j", num_records=len(transformed_batch))
 
         try:
-            with self._get_session() as session:
-                session.run(query, batch=transformed_batch)
-            log.info("Batch written successfully to Neo4j.")
+            with metrics.WRITE_SECONDS.time(loader="Neo4jLoader"):
+                with self._get_session() as session:
+                    session.run(query, batch=transformed_batch)
+            metrics.ROWS_WRITTEN.inc(len(transformed_batch), loader="Neo4jLoader")
+            known_ids(KNOWN_MOVIE_IDS).add(
+                record["movieId"] for record in transformed_batch
+            )
+            log.debug("Batch written successfully to Neo4j.")
         except Exception as e:
             log.error("Failed to write batch to Neo4j", error=str(e))
             raise
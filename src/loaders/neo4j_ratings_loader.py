@@ -1,10 +1,14 @@
 import structlog
 from typing import List, Dict, Tuple
 from neo4j import GraphDatabase
-from decimal import Decimal
 
 from config.config import settings
+from src.cache.dead_letter_store import DeadLetterStore
 from src.interfaces.loader import Loader
+from src.loaders.known_ids import known_ids
+from src.loaders.neo4j_loader import KNOWN_MOVIE_IDS
+from src import metrics
+from src.rating_codec import HALF_STAR_FLOATS, record_rating
 
 log = structlog.get_logger()
 
@@ -15,7 +19,18 @@ class Neo4jRatingsLoader(Loader):
         user = settings.neo4j.user
         password = settings.neo4j.password
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
-        log.info("Neo4j Ratings Loader initialized.")
+        self.preferred_write_size = settings.neo4j.write_batch_size
+        self.flush_interval = settings.neo4j.flush_interval
+        self.known_movies = (
+            known_ids(KNOWN_MOVIE_IDS) if settings.neo4j.check_movie_ids else None
+        )
+        self.dead_letters = DeadLetterStore(
+            settings.neo4j.dead_letter_path, ("userId", "movieId")
+        )
+        log.info(
+            "Neo4j Ratings Loader initialized.",
+            check_movie_ids=settings.neo4j.check_movie_ids,
+        )
 
     def _get_session(self):
         return self.driver.session()
@@ -41,10 +56,53 @@ class Neo4jRatingsLoader(Loader):
                 return (0, 0)
 
     def _transform_batch(self, batch: List[Dict]) -> List[Dict]:
-        for record in batch:
-            if "rating" in record and isinstance(record["rating"], Decimal):
-                record["rating"] = float(record["rating"])
-        return batch
+        return [
+            {
+                "userId": record["userId"],
+                "movieId": record["movieId"],
+                "rating": float(record_rating(record, HALF_STAR_FLOATS)),
+                "timestamp": record["timestamp"],
+            }
+            for record in batch
+        ]
+
+    def fetch_movie_ids(self) -> List[int]:
+        with self._get_session() as session:
+            result = session.run("MATCH (m:Movie) RETURN m.movieId AS movieId")
+            return [record["movieId"] for record in result]
+
+    def start_run(self):
+        if self.known_movies is None:
+            return
+        if not self.known_movies.synced:
+            self.known_movies.add(self.fetch_movie_ids())
+            self.known_movies.synced = True
+            log.info(
+                "Known movie ids loaded from Neo4j",
+                num_movies=len(self.known_movies),
+            )
+        self.retry_dead_letters()
+
+    def retry_dead_letters(self):
+        entries = self.dead_letters.pending()
+        if not entries:
+            return
+        known = self.known_movies.contains(
+            entry["row"]["movieId"] for entry in entries
+        ).tolist()
+        loadable = [entry["row"] for entry, ok in zip(entries, known) if ok]
+        remaining = [entry for entry, ok in zip(entries, known) if not ok]
+        if loadable:
+            self._write_rows(loadable)
+        self.dead_letters.replace(remaining)
+        metrics.DEAD_LETTER_RETRIED.inc(len(loadable), loader="Neo4jRatingsLoader")
+        metrics.DEAD_LETTER_PENDING.set(len(remaining), loader="Neo4jRatingsLoader")
+        log.info(
+            "Retried dead-lettered ratings",
+            loaded=len(loadable),
+            pending=len(remaining),
+            path=self.dead_letters.path,
+        )
 
     def write_batch(self, batch: List[Dict]) -> None:
         if not batch:
@@ -52,7 +110,26 @@ class Neo4jRatingsLoader(Loader):
             return
 
         transformed_batch = self._transform_batch(batch)
+        if self.known_movies is not None:
+            transformed_batch, orphans = self.known_movies.partition(
+                transformed_batch, "movieId"
+            )
+            if orphans:
+                self.dead_letters.append(orphans, reason="unknown_movie")
+                metrics.DEAD_LETTER_ROWS.inc(
+                    len(orphans), loader="Neo4jRatingsLoader", reason="unknown_movie"
+                )
+                log.warn(
+                    "Ratings for movies missing in Neo4j were dead-lettered",
+                    num_orphans=len(orphans),
+                    movie_ids=sorted({row["movieId"] for row in orphans})[:10],
+                    path=self.dead_letters.path,
+                )
+            if not transformed_batch:
+                return
+        self._write_rows(transformed_batch)
 
+    def _write_rows(self, transformed_batch: List[Dict]):
         query = """
         UNWIND $batch AS rating_data
         
@@ -61,12 +138,16 @@ class Neo4jRatingsLoader(Loader):
         MERGE (u)-[r:RATED]->(m)
         SET r.rating = rating_data.rating, r.timestamp = rating_data.timestamp
         """
-        log.info("Writing ratings batch to Neo4j", num_records=len(transformed_batch))
+        log.debug("Writing ratings batch to Neo4j", num_records=len(transformed_batch))
 
         try:
-            with self._get_session() as session:
-                session.run(query, batch=transformed_batch)
-            log.info("Ratings batch written successfully to Neo4j.")
+            with metrics.WRITE_SECONDS.time(loader="Neo4jRatingsLoader"):
+                with self._get_session() as session:
+                    session.run(query, batch=transformed_batch)
+            metrics.ROWS_WRITTEN.inc(
+                len(transformed_batch), loader="Neo4jRatingsLoader"
+            )
+            log.debug("Ratings batch written successfully to Neo4j.")
         except Exception as e:
             log.error("Failed to write ratings batch to Neo4j", error=str(e))
             raise
@@ -0,0 +1,221 @@
+import re
+import time
+from typing import Callable, List, Optional, Tuple
+
+import structlog
+
+from config.config import settings
+
+log = structlog.get_logger()
+
+INITIAL_LOAD_MODES = ("auto", "on", "off")
+BLOCKED_KIND = "blocked"
+BLOCKED_POSITION = -1
+DUPLICATE_SAMPLE_SIZE = 10
+
+CONSTRAINTS_QUERY = """
+    SELECT conname, pg_get_constraintdef(oid)
+    FROM pg_constraint
+    WHERE conrelid = %s::regclass AND contype IN ('p', 'u')
+    ORDER BY contype, conname
+"""
+
+SECONDARY_INDEXES_QUERY = """
+    SELECT index_class.relname, pg_get_indexdef(pg_index.indexrelid)
+    FROM pg_index
+    JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+    WHERE pg_index.indrelid = %s::regclass
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_constraint WHERE conindid = pg_index.indexrelid
+      )
+    ORDER BY index_class.relname
+"""
+
+
+class InitialLoadError(RuntimeError):
+    pass
+
+
+def key_columns(ddl: str) -> Optional[str]:
+    match = re.match(r"(PRIMARY KEY|UNIQUE)\s*\(([^)]*)\)", ddl)
+    return match.group(2) if match else None
+
+
+class InitialLoad:
+    def __init__(self, connect: Callable, table: str, mode: str = None):
+        self.connect = connect
+        self.table = table
+        self.schema = table.split(".", 1)[0]
+        self.mode = mode or settings.postgres.initial_load
+        if self.mode not in INITIAL_LOAD_MODES:
+            raise ValueError(
+                f"Unknown initial load mode {self.mode!r}, "
+                f"expected one of {INITIAL_LOAD_MODES}"
+            )
+        self.active = False
+
+    def _saved_definitions(self, cursor) -> List[Tuple[str, str, str]]:
+        cursor.execute(
+            "SELECT object_kind, object_name, definition FROM jobs.initial_load_state "
+            "WHERE table_name = %s ORDER BY position",
+            (self.table,),
+        )
+        return cursor.fetchall()
+
+    def _duplicate_keys(self, cursor, ddl: str) -> List[Tuple]:
+        columns = key_columns(ddl)
+        if columns is None:
+            return []
+        cursor.execute(
+            f"SELECT {columns}, COUNT(*) FROM {self.table} "
+            f"WHERE ({columns}) IS NOT NULL "
+            f"GROUP BY {columns} HAVING COUNT(*) > 1 "
+            f"LIMIT {DUPLICATE_SAMPLE_SIZE}"
+        )
+        return cursor.fetchall()
+
+    def _should_start(self, cursor) -> bool:
+        if self.mode == "off":
+            return False
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = %s::regclass", (self.table,)
+        )
+        if cursor.fetchone()[0] == "p":
+            log.warn(
+                "Initial load mode does not support partitioned tables",
+                table=self.table,
+            )
+            return False
+        if self.mode == "on":
+            return True
+        cursor.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {self.table})")
+        return cursor.fetchone()[0]
+
+    def start(self):
+        with self.connect() as conn:
+            with conn.cursor() as cursor:
+                saved = self._saved_definitions(cursor)
+        if any(kind == BLOCKED_KIND for kind, _, _ in saved):
+            log.warn(
+                "Retrying the key restore blocked by duplicate keys",
+                table=self.table,
+            )
+            self.active = True
+            self.finish()
+            return
+        if saved:
+            log.warn(
+                "Resuming an unfinished initial load",
+                table=self.table,
+            )
+            self.active = True
+            return
+
+        with self.connect() as conn:
+            with conn.cursor() as cursor:
+                if not self._should_start(cursor):
+                    return
+
+                cursor.execute(CONSTRAINTS_QUERY, (self.table,))
+                constraints = cursor.fetchall()
+                cursor.execute(SECONDARY_INDEXES_QUERY, (self.table,))
+                indexes = cursor.fetchall()
+                definitions = (
+                    [("table", self.table, "SET LOGGED")]
+                    + [("constraint", name, ddl) for name, ddl in constraints]
+                    + [("index", name, ddl) for name, ddl in indexes]
+                )
+                for position, (kind, name, ddl) in enumerate(definitions):
+                    cursor.execute(
+                        "INSERT INTO jobs.initial_load_state "
+                        "(table_name, position, object_kind, object_name, definition) "
+                        "VALUES (%s, %s, %s, %s, %s)",
+                        (self.table, position, kind, name, ddl),
+                    )
+                for name, _ in indexes:
+                    cursor.execute(f"DROP INDEX {self.schema}.{name}")
+                for name, _ in constraints:
+                    cursor.execute(f"ALTER TABLE {self.table} DROP CONSTRAINT {name}")
+                cursor.execute(f"ALTER TABLE {self.table} SET UNLOGGED")
+            conn.commit()
+        self.active = True
+        log.info(
+            "Initial load mode enabled: table is unlogged, keys and indexes dropped",
+            table=self.table,
+            constraints=[name for name, _ in constraints],
+            indexes=[name for name, _ in indexes],
+        )
+
+    def _check_keys(self, conn, cursor, definitions: List[Tuple[str, str, str]]):
+        for kind, name, ddl in definitions:
+            if kind != "constraint":
+                continue
+            duplicates = self._duplicate_keys(cursor, ddl)
+            if not duplicates:
+                continue
+            duplicate_keys = [list(row[:-1]) for row in duplicates]
+            if not any(kind == BLOCKED_KIND for kind, _, _ in definitions):
+                cursor.execute(
+                    "INSERT INTO jobs.initial_load_state "
+                    "(table_name, position, object_kind, object_name, definition) "
+                    "VALUES (%s, %s, %s, %s, %s)",
+                    (self.table, BLOCKED_POSITION, BLOCKED_KIND, name, ddl),
+                )
+            conn.commit()
+            self.active = False
+            log.error(
+                "Duplicate keys block the restore after initial load; "
+                "bulk mode stays off until they are removed",
+                table=self.table,
+                constraint=name,
+                duplicate_keys=duplicate_keys,
+            )
+            raise InitialLoadError(
+                f"{self.table} has duplicate keys for {name}: {duplicate_keys}"
+            )
+
+    def finish(self):
+        if not self.active:
+            return
+        started = time.perf_counter()
+        with self.connect() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('max_parallel_maintenance_workers', %s, true), "
+                    "set_config('maintenance_work_mem', %s, true)",
+                    (
+                        str(settings.postgres.parallel_maintenance_workers),
+                        settings.postgres.maintenance_work_mem,
+                    ),
+                )
+                definitions = self._saved_definitions(cursor)
+                self._check_keys(conn, cursor, definitions)
+                for kind, name, ddl in definitions:
+                    if kind == BLOCKED_KIND:
+                        continue
+                    log.info(
+                        "Restoring after initial load",
+                        table=self.table,
+                        kind=kind,
+                        name=name,
+                    )
+                    if kind == "table":
+                        cursor.execute(f"ALTER TABLE {self.table} {ddl}")
+                    elif kind == "constraint":
+                        cursor.execute(
+                            f"ALTER TABLE {self.table} ADD CONSTRAINT {name} {ddl}"
+                        )
+                    else:
+                        cursor.execute(ddl)
+                cursor.execute(
+                    "DELETE FROM jobs.initial_load_state WHERE table_name = %s",
+                    (self.table,),
+                )
+                cursor.execute(f"ANALYZE {self.table}")
+            conn.commit()
+        self.active = False
+        log.info(
+            "Initial load finished, table is logged and keys are validated",
+            table=self.table,
+            seconds=round(time.perf_counter() - started, 3),
+        )
@@ -5,6 +5,8 @@ from typing import List, Dict
 
 from config.config import settings
 from src.interfaces.loader import Loader
+from src.loaders.postgres_initial_load import InitialLoad
+from src import metrics
 
 log = structlog.get_logger()
 
@@ -17,6 +19,9 @@ class PostgresLoader(Loader):
             "host": settings.postgres.host,
             "dbname": settings.postgres.db,
         }
+        self.preferred_write_size = settings.postgres.write_batch_size
+        self.flush_interval = settings.postgres.flush_interval
+        self.initial_load = InitialLoad(lambda: self._get_connection(), "movies.movies")
         log.info("PostgreSQL Loader initialized.")
 
     def _get_connection(self):
@@ -26,6 +31,12 @@ class PostgresLoader(Loader):
             log.error("Failed to connect to PostgreSQL", error=str(err))
             raise
 
+    def start_run(self):
+        self.initial_load.start()
+
+    def finish_run(self):
+        self.initial_load.finish()
+
     def get_high_water_mark(self) -> int:
         query = "SELECT MAX(movie_id) FROM movies.movies;"
         log.info("Getting high-water mark from PostgreSQL.")
@@ -58,14 +69,16 @@ class PostgresLoader(Loader):
         query = (
             "INSERT INTO movies.movies (movie_id, title, genres) VALUES (%s, %s, %s)"
         )
-        log.info("Writing batch to PostgreSQL", num_records=len(transformed_batch))
+        log.debug("Writing batch to PostgreSQL", num_records=len(transformed_batch))
 
         try:
-            with self._get_connection() as conn:
-                with conn.cursor() as cursor:
-                    extras.execute_batch(cursor, query, transformed_batch)
-                conn.commit()
-                log.info("Batch written successfully.")
+            with metrics.WRITE_SECONDS.time(loader="PostgresLoader"):
+                with self._get_connection() as conn:
+                    with conn.cursor() as cursor:
+                        extras.execute_batch(cursor, query, transformed_batch)
+                    conn.commit()
+            metrics.ROWS_WRITTEN.inc(len(transformed_batch), loader="PostgresLoader")
+            log.debug("Batch written successfully.")
         except psycopg2.Error as err:
             log.error("Failed to write batch to PostgreSQL", error=str(err))
             raise
@@ -1,13 +1,59 @@
+import io
+
 import psycopg2
 from psycopg2 import extras
 import structlog
-from typing import List, Dict, Tuple
+from typing import List, Dict, Set, Tuple
 
 from config.config import settings
 from src.interfaces.loader import Loader
+from src.loaders.postgres_initial_load import InitialLoad
+from src import metrics
+from src.rating_codec import record_rating
 
 log = structlog.get_logger()
 
+PARTITION_BOUNDS_QUERY = """
+    SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+    WHERE ns.nspname = 'movies' AND parent.relname = 'ratings'
+"""
+
+
+def partition_start(movie_id: int, width: int) -> int:
+    return movie_id // width * width
+
+
+def parse_partition_bound(bound: str) -> Tuple[int, int]:
+    start, end = bound.split("FROM (", 1)[1].split(") TO (")
+    return int(start.strip("'")), int(end.split(")", 1)[0].strip("'"))
+
+
+def is_partitioned(cursor) -> bool:
+    cursor.execute(
+        "SELECT relkind FROM pg_class WHERE oid = 'movies.ratings'::regclass;"
+    )
+    return cursor.fetchone()[0] == "p"
+
+
+def get_partition_ranges(cursor) -> List[Tuple[int, int]]:
+    cursor.execute(PARTITION_BOUNDS_QUERY)
+    return sorted(
+        parse_partition_bound(bound)
+        for _, bound in cursor.fetchall()
+        if bound.startswith("FOR VALUES FROM")
+    )
+
+
+def create_partition(cursor, start: int, width: int):
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS movies.ratings_p{start} "
+        f"PARTITION OF movies.ratings FOR VALUES FROM ({start}) TO ({start + width});"
+    )
+
 
 class PostgresRatingsLoader(Loader):
     def __init__(self):
@@ -17,6 +63,14 @@ class PostgresRatingsLoader(Loader):
             "host": settings.postgres.host,
             "dbname": settings.postgres.db,
         }
+        self.partition_width = settings.aggregation.batch_width
+        self._partitioned = None
+        self._partitions: Set[int] = set()
+        self.preferred_write_size = settings.postgres.write_batch_size
+        self.flush_interval = settings.postgres.flush_interval
+        self.initial_load = InitialLoad(
+            lambda: self._get_connection(), "movies.ratings"
+        )
         log.info("PostgreSQL Ratings Loader initialized.")
 
     def _get_connection(self):
@@ -26,6 +80,12 @@ class PostgresRatingsLoader(Loader):
             log.error("Failed to connect to PostgreSQL", error=str(err))
             raise
 
+    def start_run(self):
+        self.initial_load.start()
+
+    def finish_run(self):
+        self.initial_load.finish()
+
     def get_high_water_mark(self) -> Tuple[int, int]:
         query = "SELECT MAX(user_id), MAX(movie_id) FROM movies.ratings WHERE user_id = (SELECT MAX(user_id) FROM movies.ratings);"
         log.info("Getting ratings high-water mark from PostgreSQL.")
@@ -42,23 +102,60 @@ class PostgresRatingsLoader(Loader):
             log.error("Failed to get ratings high-water mark", error=str(err))
             return (0, 0)
 
+    def _ensure_partitions(self, cursor, batch: List[Dict]):
+        if self._partitioned is None:
+            self._partitioned = is_partitioned(cursor)
+            if self._partitioned:
+                self._partitions = {start for start, _ in get_partition_ranges(cursor)}
+                log.info(
+                    "Ratings table is partitioned by movie_id",
+                    num_partitions=len(self._partitions),
+                )
+        if not self._partitioned:
+            return
+
+        starts = {
+            partition_start(rec["movieId"], self.partition_width) for rec in batch
+        }
+        for start in sorted(starts - self._partitions):
+            create_partition(cursor, start, self.partition_width)
+            log.info(
+                "Created ratings partition", start=start, width=self.partition_width
+            )
+        self._partitions |= starts
+
+    def _copy_batch(self, cursor, rows: List[tuple]):
+        buffer = io.StringIO("".join(f"{u}\t{m}\t{r}\t{t}\n" for u, m, r, t in rows))
+        cursor.copy_expert(
+            "COPY movies.ratings (user_id, movie_id, rating, timestamp) FROM STDIN",
+            buffer,
+        )
+
     def write_batch(self, batch: List[Dict]) -> None:
         transformed_batch = [
-            (rec["userId"], rec["movieId"], rec["rating"], rec["timestamp"])
+            (rec["userId"], rec["movieId"], record_rating(rec), rec["timestamp"])
             for rec in batch
         ]
 
         query = "INSERT INTO movies.ratings (user_id, movie_id, rating, timestamp) VALUES (%s, %s, %s, %s)"
-        log.info(
+        log.debug(
             "Writing ratings batch to PostgreSQL", num_records=len(transformed_batch)
         )
 
         try:
-            with self._get_connection() as conn:
-                with conn.cursor() as cursor:
-                    extras.execute_batch(cursor, query, transformed_batch)
-                conn.commit()
-                log.info("Ratings batch written successfully.")
+            with metrics.WRITE_SECONDS.time(loader="PostgresRatingsLoader"):
+                with self._get_connection() as conn:
+                    with conn.cursor() as cursor:
+                        self._ensure_partitions(cursor, batch)
+                        if self.initial_load.active:
+                            self._copy_batch(cursor, transformed_batch)
+                        else:
+                            extras.execute_batch(cursor, query, transformed_batch)
+                    conn.commit()
+            metrics.ROWS_WRITTEN.inc(
+                len(transformed_batch), loader="PostgresRatingsLoader"
+            )
+            log.debug("Ratings batch written successfully.")
         except psycopg2.Error as err:
             log.error("Failed to write ratings batch to PostgreSQL", error=str(err))
             raise
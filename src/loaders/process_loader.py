@@ -0,0 +1,172 @@
+import multiprocessing
+import time
+import traceback
+from typing import Any, Callable, List, Dict
+
+import structlog
+
+from config.config import settings
+from src.batch_sizing import is_timeout_error
+from src.cache.segment_store import decode_batch, encode_batch
+from src.interfaces.loader import Loader
+from src import logging_config, metrics, profiling, tracing
+
+log = structlog.get_logger()
+
+CLOSE_TIMEOUT = 30.0
+
+
+class LoaderProcessError(Exception):
+    def __init__(self, loader_name: str, error_type: str, message: str, details=""):
+        super().__init__(f"{error_type}: {message}")
+        self.loader_name = loader_name
+        self.error_type = error_type
+        self.details = details
+
+
+class LoaderProcessTimeout(LoaderProcessError, TimeoutError):
+    pass
+
+
+def _error_reply(error: Exception):
+    return (
+        "error",
+        type(error).__name__,
+        str(error),
+        traceback.format_exc(),
+        is_timeout_error(error),
+    )
+
+
+def loader_worker(
+    conn,
+    loader_factory: Callable,
+    profiling_config: dict,
+    tracing_config: dict,
+    log_config: dict,
+):
+    logging_config.setup_worker_logging(**log_config)
+    metrics.registry.reset()
+    profiling.configure(**profiling_config)
+    tracing.init(role="loader", **tracing_config)
+
+    try:
+        loader = loader_factory()
+        reply = ("ok", (loader.preferred_write_size, loader.flush_interval))
+    except Exception as e:
+        conn.send(_error_reply(e) + (metrics.registry.drain(),))
+        return
+    conn.send(reply + (metrics.registry.drain(),))
+
+    running = True
+    while running:
+        try:
+            method, payload, traceparent = conn.recv()
+        except EOFError:
+            break
+        try:
+            with tracing.attach(traceparent):
+                if method == "write_batch":
+                    with profiling.profiled("loader.write"):
+                        result = loader.write_batch(decode_batch(payload))
+                elif method == "close":
+                    running = False
+                    result = loader.close() if hasattr(loader, "close") else None
+                    profiling.flush()
+                else:
+                    result = getattr(loader, method)()
+            reply = ("ok", result)
+        except Exception as e:
+            reply = _error_reply(e)
+        conn.send(reply + (metrics.registry.drain(),))
+
+
+class ProcessLoader(Loader):
+    def __init__(self, loader_factory: Callable[[], Loader], start_method=None):
+        self._name = getattr(loader_factory, "__name__", type(loader_factory).__name__)
+        context = multiprocessing.get_context(
+            start_method or settings.etl.loader_start_method
+        )
+        self._conn, child_conn = context.Pipe()
+        started = time.perf_counter()
+        self.process = context.Process(
+            target=loader_worker,
+            args=(
+                child_conn,
+                loader_factory,
+                profiling.worker_config(role="loader"),
+                tracing.worker_config(),
+                logging_config.worker_config(),
+            ),
+            name=f"loader-{self._name}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        try:
+            self.preferred_write_size, self.flush_interval = self._receive()
+        except Exception:
+            self._stop()
+            raise
+        log.info(
+            "Loader process started",
+            loader=self._name,
+            pid=self.process.pid,
+            startup_seconds=round(time.perf_counter() - started, 3),
+        )
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def _receive(self) -> Any:
+        try:
+            reply = self._conn.recv()
+        except EOFError:
+            self.process.join(CLOSE_TIMEOUT)
+            raise LoaderProcessError(
+                self._name,
+                "ProcessExited",
+                f"loader process exited with code {self.process.exitcode}",
+            )
+        metrics.registry.merge(reply[-1])
+        if reply[0] == "ok":
+            return reply[1]
+        _, error_type, message, details, timed_out, _ = reply
+        error_class = LoaderProcessTimeout if timed_out else LoaderProcessError
+        raise error_class(self._name, error_type, message, details)
+
+    def _call(self, method: str, payload: Any = None) -> Any:
+        self._conn.send((method, payload, tracing.worker_traceparent()))
+        return self._receive()
+
+    def get_high_water_mark(self) -> Any:
+        return self._call("get_high_water_mark")
+
+    def start_run(self) -> None:
+        self._call("start_run")
+
+    def finish_run(self) -> None:
+        self._call("finish_run")
+
+    def write_batch(self, batch: List[Dict]) -> None:
+        if batch:
+            self._call("write_batch", encode_batch(batch))
+
+    def _stop(self):
+        self._conn.close()
+        self.process.join(CLOSE_TIMEOUT)
+        if self.process.is_alive():
+            log.warn("Loader process did not exit, terminating", loader=self._name)
+            self.process.terminate()
+            self.process.join()
+
+    def close(self):
+        if not self.process.is_alive():
+            self._conn.close()
+            return
+        try:
+            self._call("close")
+        finally:
+            self._stop()
+        log.info("Loader process stopped", loader=self._name)
@@ -1,27 +1,159 @@
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
+import multiprocessing.util
+import queue
+import random
 import sys
+from typing import Dict, Optional
+
 import structlog
 
+_listeners = []
+_worker_queue = None
+_local_output = None
 
-def setup_logging():
-    processors = [
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class EventSampler:
+    def __init__(self, rates: Dict[str, float]):
+        self.rates = rates
+
+    def __call__(self, logger, method_name: str, event_dict: Dict) -> Dict:
+        rate = self.rates.get(event_dict.get("event"))
+        if rate is None:
+            return event_dict
+        if random.random() >= rate:
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for entry in spec.split(";"):
+        event, _, rate = entry.rpartition("=")
+        if event.strip():
+            rates[event.strip()] = float(rate)
+    return rates
+
+
+def _json_formatter() -> logging.Formatter:
+    return structlog.stdlib.ProcessorFormatter(
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.JSONRenderer(),
+        ]
+    )
+
+
+def _configure(level: str, sample_rates: Dict[str, float], background: bool):
+    processors = []
+    if sample_rates:
+        processors.append(EventSampler(sample_rates))
+    processors += [
+        structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_log_level,
         structlog.processors.TimeStamper(fmt="iso"),
         structlog.processors.dict_tracebacks,
-        structlog.processors.JSONRenderer(),
     ]
+    if background:
+        processors.append(structlog.stdlib.ProcessorFormatter.wrap_for_formatter)
+    else:
+        processors.append(structlog.processors.JSONRenderer())
 
     structlog.configure(
         processors=processors,
         logger_factory=structlog.stdlib.LoggerFactory(),
-        wrapper_class=structlog.stdlib.BoundLogger,
+        wrapper_class=structlog.make_filtering_bound_logger(
+            logging.getLevelName(level.upper())
+        ),
         cache_logger_on_first_use=True,
     )
 
-    handler = logging.StreamHandler(sys.stdout)
-
     root_logger = logging.getLogger()
-    root_logger.addHandler(handler)
-    root_logger.setLevel(logging.INFO)
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    root_logger.setLevel(level.upper())
+    return root_logger
+
+
+def _start_listener(log_queue, handler: logging.Handler):
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    _listeners.append(listener)
+    if len(_listeners) == 1:
+        atexit.register(stop_logging)
+
+
+def _restart_after_fork(_):
+    global _worker_queue
+    _listeners.clear()
+    _worker_queue = None
+    _start_listener(*_local_output)
+    multiprocessing.util.Finalize(None, stop_logging, exitpriority=0)
+
+
+def setup_logging():
+    global _local_output
+    from config.config import settings
+
+    level = settings.log.level
+    background = settings.log.background
+    root_logger = _configure(
+        level, parse_sample_rates(settings.log.sample_rates), background
+    )
+
+    if background:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(_json_formatter())
+        local_queue = queue.SimpleQueue()
+        root_logger.addHandler(LocalQueueHandler(local_queue))
+        if _local_output is None:
+            multiprocessing.util.register_after_fork(
+                _restart_after_fork, _restart_after_fork
+            )
+        _local_output = (local_queue, handler)
+        _start_listener(local_queue, handler)
+    else:
+        root_logger.addHandler(logging.StreamHandler(sys.stdout))
 
     print("Structured logging configured.")
+
+
+def worker_config() -> Dict:
+    global _worker_queue
+    from config.config import settings
+
+    if settings.log.background and _listeners and _worker_queue is None:
+        _worker_queue = multiprocessing.get_context("spawn").Queue()
+        _start_listener(_worker_queue, logging.StreamHandler(sys.stdout))
+    return {
+        "level": settings.log.level,
+        "sample_rates": parse_sample_rates(settings.log.sample_rates),
+        "log_queue": _worker_queue,
+    }
+
+
+def setup_worker_logging(
+    level: str = "INFO",
+    sample_rates: Optional[Dict[str, float]] = None,
+    log_queue=None,
+):
+    root_logger = _configure(level, sample_rates or {}, log_queue is not None)
+    if log_queue is None:
+        root_logger.addHandler(logging.StreamHandler(sys.stdout))
+        return
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.setFormatter(_json_formatter())
+    root_logger.addHandler(handler)
+
+
+def stop_logging():
+    while _listeners:
+        _listeners.pop().stop()
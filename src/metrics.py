@@ -0,0 +1,362 @@
+import copy
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+import structlog
+
+log = structlog.get_logger()
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)  # fmt: skip
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Dict = None) -> str:
+    pairs = list(key) + sorted((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock):
+        self.name = name
+        self.documentation = documentation
+        self._lock = lock
+        self._values: Dict[LabelKey, object] = {}
+
+    def _reset(self):
+        self._values = {}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _merge(self, key: LabelKey, value):
+        self._values[key] = self._values.get(key, 0) + value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def _merge(self, key: LabelKey, value):
+        self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, lock, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, lock)
+        self.buckets = tuple(buckets)
+
+    def _empty(self) -> Dict:
+        return {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = self._empty()
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][index] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _merge(self, key: LabelKey, value):
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = self._empty()
+        state["buckets"] = [a + b for a, b in zip(state["buckets"], value["buckets"])]
+        state["sum"] += value["sum"]
+        state["count"] += value["count"]
+
+    def quantile(self, state: Dict, q: float) -> float:
+        if not state["count"]:
+            return 0.0
+        rank = q * state["count"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, state["buckets"]):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._register(Counter(name, documentation, self._lock))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._register(Gauge(name, documentation, self._lock))
+
+    def histogram(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, self._lock, buckets))
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                name: [
+                    [list(key), copy.deepcopy(value)]
+                    for key, value in metric._values.items()
+                ]
+                for name, metric in self._metrics.items()
+                if metric._values
+            }
+
+    def drain(self) -> Dict:
+        with self._lock:
+            snapshot = {
+                name: [[list(key), value] for key, value in metric._values.items()]
+                for name, metric in self._metrics.items()
+                if metric._values
+            }
+            for metric in self._metrics.values():
+                metric._reset()
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            for metric in self._metrics.values():
+                metric._reset()
+
+    def merge(self, snapshot: Dict):
+        with self._lock:
+            for name, samples in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                for key, value in samples:
+                    metric._merge(tuple(tuple(pair) for pair in key), value)
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for metric in self._metrics.values():
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                for key, value in metric._values.items():
+                    if metric.kind != "histogram":
+                        lines.append(f"{metric.name}{_format_labels(key)} {value}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets, value["buckets"]):
+                        cumulative += count
+                        labels = _format_labels(key, {"le": repr(float(bound))})
+                        lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+                    labels = _format_labels(key, {"le": "+Inf"})
+                    lines.append(f"{metric.name}_bucket{labels} {value['count']}")
+                    lines.append(
+                        f"{metric.name}_sum{_format_labels(key)} {value['sum']}"
+                    )
+                    lines.append(
+                        f"{metric.name}_count{_format_labels(key)} {value['count']}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict:
+        summary = {}
+        with self._lock:
+            for metric in self._metrics.values():
+                samples = []
+                for key, value in metric._values.items():
+                    sample = {"labels": dict(key)}
+                    if metric.kind == "histogram":
+                        count = value["count"]
+                        sample.update(
+                            count=count,
+                            sum=round(value["sum"], 6),
+                            mean=round(value["sum"] / count, 6) if count else 0.0,
+                            p50_upper_bound=metric.quantile(value, 0.5),
+                            p99_upper_bound=metric.quantile(value, 0.99),
+                        )
+                    else:
+                        sample["value"] = value
+                    samples.append(sample)
+                if samples:
+                    summary[metric.name] = {"type": metric.kind, "samples": samples}
+        return summary
+
+    def write_summary(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2, default=str)
+        log.info("Metrics summary written", path=path)
+
+
+registry = MetricsRegistry()
+
+ROWS_EXTRACTED = registry.counter(
+    "chariot_rows_extracted_total", "Rows read from the source by each extractor."
+)
+EXTRACT_SECONDS = registry.histogram(
+    "chariot_extract_seconds", "Time spent in a single extractor read."
+)
+ROWS_WRITTEN = registry.counter(
+    "chariot_rows_written_total", "Rows written to a sink by each loader."
+)
+WRITE_SECONDS = registry.histogram(
+    "chariot_write_seconds", "Time spent in the sink round trip of a loader write."
+)
+SOURCE_THROTTLE_SECONDS = registry.histogram(
+    "chariot_source_throttle_seconds",
+    "Time extractor reads waited on the source governor.",
+)
+SOURCE_CONCURRENCY_LIMIT = registry.gauge(
+    "chariot_source_concurrency_limit", "Adaptive concurrent query limit per source."
+)
+SOURCE_REPLICA_LAG = registry.gauge(
+    "chariot_source_replica_lag_seconds", "Last observed replication lag."
+)
+SOURCE_READS = registry.counter(
+    "chariot_source_reads_total", "Extractor reads by target (primary or replica)."
+)
+CACHE_REQUESTS = registry.counter(
+    "chariot_cache_requests_total", "Replay cache lookups by result."
+)
+SPILL_REQUESTS = registry.counter(
+    "chariot_spill_requests_total", "Spill queue reads by origin (spilled or source)."
+)
+SPILL_QUEUE_BYTES = registry.gauge(
+    "chariot_spill_queue_bytes", "Bytes of extracted batches held in the spill queue."
+)
+DEAD_LETTER_ROWS = registry.counter(
+    "chariot_dead_letter_rows_total", "Rows a loader routed to its dead-letter store."
+)
+DEAD_LETTER_RETRIED = registry.counter(
+    "chariot_dead_letter_retried_total", "Dead-letter rows loaded on a later run."
+)
+DEAD_LETTER_PENDING = registry.gauge(
+    "chariot_dead_letter_pending", "Rows waiting in a loader's dead-letter store."
+)
+CONDUCTOR_EXTRACT_SECONDS = registry.histogram(
+    "chariot_conductor_extract_seconds", "Per-loader time waiting on extraction."
+)
+CONDUCTOR_WRITE_SECONDS = registry.histogram(
+    "chariot_conductor_write_seconds", "Per-loader time spent in write_batch."
+)
+CONDUCTOR_BATCHES = registry.counter(
+    "chariot_conductor_batches_total", "Batches moved by the conductor per loader."
+)
+CONDUCTOR_ROWS_PER_SECOND = registry.gauge(
+    "chariot_conductor_rows_per_second", "End-to-end rows/s per loader pipeline."
+)
+CONDUCTOR_PENDING_LOADERS = registry.gauge(
+    "chariot_conductor_pending_loaders", "Loader pipelines that have not finished."
+)
+CONDUCTOR_BATCH_SIZE = registry.gauge(
+    "chariot_conductor_batch_size", "Current write batch size per loader."
+)
+CONDUCTOR_FAILURES = registry.counter(
+    "chariot_conductor_failures_total", "Loader pipelines that raised."
+)
+SCHEDULER_NODE_SECONDS = registry.histogram(
+    "chariot_scheduler_node_seconds",
+    "Duration of each pipeline DAG node.",
+    buckets=(1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0),
+)
+SCHEDULER_NODES = registry.counter(
+    "chariot_scheduler_nodes_total", "Pipeline DAG nodes by final status."
+)
+AGGREGATION_STAGE_SECONDS = registry.histogram(
+    "chariot_aggregation_stage_seconds",
+    "Duration of dispatcher stages.",
+    buckets=(1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0),
+)
+AGGREGATION_PENDING_BATCHES = registry.gauge(
+    "chariot_aggregation_pending_batches", "Aggregation batches not yet completed."
+)
+AGGREGATION_WORKER_UTILIZATION = registry.gauge(
+    "chariot_aggregation_worker_utilization",
+    "Busy worker time divided by wall time times pool size.",
+)
+AGGREGATION_BATCH_SECONDS = registry.histogram(
+    "chariot_aggregation_batch_seconds", "Aggregation worker time per batch phase."
+)
+AGGREGATION_RATINGS = registry.counter(
+    "chariot_aggregation_ratings_total", "Ratings aggregated by the workers."
+)
+AGGREGATION_MOVIES = registry.counter(
+    "chariot_aggregation_movies_total", "Movie summaries written to staging."
+)
+AGGREGATION_BATCHES = registry.counter(
+    "chariot_aggregation_batches_total", "Aggregation batches by final status."
+)
+AGGREGATION_PROMOTED_ROWS = registry.gauge(
+    "chariot_aggregation_promoted_rows", "Rows promoted into ratings_summary."
+)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    log.info("Metrics endpoint started", port=port, path="/metrics")
+    return server
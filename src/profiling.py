@@ -0,0 +1,239 @@
+import argparse
+import cProfile
+import glob
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List
+
+import structlog
+
+log = structlog.get_logger()
+
+SHARED_PROFILER = sys.version_info >= (3, 12)
+FLUSH_INTERVAL_SECONDS = 5.0
+TOP_ALLOCATION_SITES = 50
+
+_NULL_SECTION = nullcontext()
+_profiler = None
+
+
+class StageProfiler:
+    def __init__(
+        self, output_dir: str, sample_rate: float, trace_memory: bool, role: str
+    ):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.trace_memory = trace_memory
+        self.role = role
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles: Dict[int, cProfile.Profile] = {}
+        self._active = set()
+        self._shared_depth = 0
+        self._last_flush = time.monotonic()
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+
+    def _thread_key(self) -> int:
+        return 0 if SHARED_PROFILER else threading.get_ident()
+
+    def _enter(self):
+        with self._lock:
+            key = self._thread_key()
+            profile = self._profiles.get(key)
+            if profile is None:
+                profile = self._profiles[key] = cProfile.Profile()
+            self._shared_depth += 1
+            if key not in self._active:
+                self._active.add(key)
+                profile.enable()
+
+    def _exit(self):
+        with self._lock:
+            key = self._thread_key()
+            self._shared_depth -= 1
+            if not SHARED_PROFILER or self._shared_depth == 0:
+                self._active.discard(key)
+                self._profiles[key].disable()
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS:
+            self.flush()
+
+    @contextmanager
+    def _section(self):
+        self._local.depth = getattr(self._local, "depth", 0) + 1
+        if self._local.depth == 1:
+            self._enter()
+        try:
+            yield
+        finally:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                self._exit()
+
+    def section(self, name: str):
+        if getattr(self._local, "depth", 0):
+            return self._section()
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return _NULL_SECTION
+        return self._section()
+
+    def flush(self):
+        with self._lock:
+            for key, profile in self._profiles.items():
+                if key in self._active:
+                    continue
+                suffix = "" if SHARED_PROFILER else f"-{key}"
+                path = os.path.join(
+                    self.output_dir, f"{self.role}-{self.pid}{suffix}.prof"
+                )
+                profile.dump_stats(path)
+            self._last_flush = time.monotonic()
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            sites = [
+                {
+                    "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size": stat.size,
+                    "count": stat.count,
+                }
+                for stat in snapshot.statistics("lineno")[:TOP_ALLOCATION_SITES]
+            ]
+            path = os.path.join(self.output_dir, f"{self.role}-{self.pid}.alloc.json")
+            with open(path, "w") as f:
+                json.dump(sites, f)
+
+    def disable(self):
+        for key in list(self._active):
+            self._profiles[key].disable()
+        self._active.clear()
+
+
+def configure(
+    enabled: bool,
+    output_dir: str = "profiles",
+    sample_rate: float = 1.0,
+    trace_memory: bool = False,
+    role: str = "main",
+):
+    global _profiler
+    if _profiler is not None:
+        _profiler.disable()
+    if not enabled:
+        _profiler = None
+        return
+    _profiler = StageProfiler(output_dir, sample_rate, trace_memory, role)
+    log.info(
+        "Profiling enabled",
+        role=role,
+        output_dir=output_dir,
+        sample_rate=sample_rate,
+        trace_memory=trace_memory,
+    )
+
+
+def worker_config(role: str = "worker") -> Dict:
+    if _profiler is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "output_dir": _profiler.output_dir,
+        "sample_rate": _profiler.sample_rate,
+        "trace_memory": _profiler.trace_memory,
+        "role": role,
+    }
+
+
+def configure_from_settings(role: str = "main", enabled: bool = None):
+    from config.config import settings
+
+    configure(
+        enabled=settings.profiling.enabled if enabled is None else enabled,
+        output_dir=settings.profiling.output_dir,
+        sample_rate=settings.profiling.sample_rate,
+        trace_memory=settings.profiling.trace_memory,
+        role=role,
+    )
+
+
+def is_enabled() -> bool:
+    return _profiler is not None
+
+
+def profiled(name: str):
+    if _profiler is None:
+        return _NULL_SECTION
+    return _profiler.section(name)
+
+
+def flush():
+    if _profiler is not None:
+        _profiler.flush()
+
+
+def merge_profiles(directory: str) -> pstats.Stats:
+    paths = sorted(glob.glob(os.path.join(directory, "*.prof")))
+    paths = [path for path in paths if not path.endswith("merged.prof")]
+    if not paths:
+        raise FileNotFoundError(f"No profiles found in {directory}")
+    stats = pstats.Stats(paths[0], stream=io.StringIO())
+    for path in paths[1:]:
+        stats.add(path)
+    return stats
+
+
+def merge_allocation_sites(directory: str) -> List[Dict]:
+    merged: Dict[str, Dict] = {}
+    for path in glob.glob(os.path.join(directory, "*.alloc.json")):
+        with open(path) as f:
+            for site in json.load(f):
+                entry = merged.setdefault(site["site"], {"size": 0, "count": 0})
+                entry["size"] += site["size"]
+                entry["count"] += site["count"]
+    return sorted(
+        ({"site": site, **entry} for site, entry in merged.items()),
+        key=lambda entry: entry["size"],
+        reverse=True,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Merge per-process stage profiles into a single report."
+    )
+    parser.add_argument("directory", nargs="?", default="profiles")
+    parser.add_argument("--top", type=int, default=40)
+    parser.add_argument("--sort", default="cumulative")
+    args = parser.parse_args(argv)
+
+    stats = merge_profiles(args.directory)
+    merged_path = os.path.join(args.directory, "merged.prof")
+    stats.dump_stats(merged_path)
+
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats(args.sort).print_stats(args.top)
+    print(stream.getvalue())
+    print(f"Merged profile written to {merged_path}")
+
+    sites = merge_allocation_sites(args.directory)
+    if sites:
+        print(f"Top {min(args.top, len(sites))} allocation sites:")
+        for site in sites[: args.top]:
+            print(
+                f"{site['size'] / 1024:12.1f} KiB {site['count']:10d}  {site['site']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
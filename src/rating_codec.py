@@ -0,0 +1,66 @@
+from decimal import Decimal
+from typing import Dict, List
+
+import numpy as np
+
+from src.aggregators.sketches import HALF_STARS
+
+HALF_STARS_KEY = "halfStars"
+HALF_STAR_CHECK = (
+    f"rating * 2 = FLOOR(rating * 2) AND rating BETWEEN 0.5 AND {HALF_STARS / 2}"
+)
+MYSQL_HALF_STARS = f"CASE WHEN {HALF_STAR_CHECK} THEN CAST(rating * 2 AS UNSIGNED) END"
+POSTGRES_HALF_STARS = f"CASE WHEN {HALF_STAR_CHECK} THEN (rating * 2)::SMALLINT END"
+
+HALF_STAR_TEXT = tuple(f"{code / 2:.1f}" for code in range(HALF_STARS + 1))
+HALF_STAR_DECIMALS = tuple(Decimal(text) for text in HALF_STAR_TEXT)
+HALF_STAR_FLOATS = tuple(code / 2 for code in range(HALF_STARS + 1))
+
+
+def to_half_stars(rating) -> int:
+    doubled = rating * 2
+    code = int(doubled)
+    if code != doubled or not 1 <= code <= HALF_STARS:
+        raise ValueError(f"Rating {rating!r} is not a half-star value")
+    return code
+
+
+def not_half_star_error(user_id, movie_id) -> ValueError:
+    return ValueError(
+        f"Rating of user {user_id} for movie {movie_id} is not a half-star value"
+    )
+
+
+def record_half_stars(record: Dict) -> int:
+    if HALF_STARS_KEY not in record:
+        return to_half_stars(record["rating"])
+    code = record[HALF_STARS_KEY]
+    if code is None:
+        raise not_half_star_error(record.get("userId"), record.get("movieId"))
+    return code
+
+
+def half_star_codes(codes, movie_ids, user_ids) -> np.ndarray:
+    codes = np.asarray(codes, dtype=np.float64)
+    invalid = np.flatnonzero(np.isnan(codes))
+    if len(invalid):
+        raise not_half_star_error(user_ids[invalid[0]], movie_ids[invalid[0]])
+    return codes.astype(np.int8)
+
+
+def check_half_star_rows(rows: List[tuple]):
+    for row in rows:
+        if row[2] is None:
+            raise not_half_star_error(row[1], row[0])
+
+
+def record_rating(record: Dict, values: tuple = HALF_STAR_DECIMALS):
+    return values[record_half_stars(record)]
+
+
+def half_star_array(batch: List[Dict]) -> np.ndarray:
+    return np.fromiter(
+        (record_half_stars(record) for record in batch),
+        dtype=np.int8,
+        count=len(batch),
+    )
@@ -0,0 +1,207 @@
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import structlog
+
+from config.config import settings
+from src import metrics
+
+log = structlog.get_logger()
+
+LOWER_IS_BETTER = (".seconds", ".seconds_per_row")
+HIGHER_IS_BETTER = ".rows_per_second"
+ROWS = ".rows"
+STAGE_LOADERS = {
+    "movies:postgres": "PostgresLoader",
+    "movies:neo4j": "Neo4jLoader",
+    "ratings:postgres": "PostgresRatingsLoader",
+    "ratings:neo4j": "Neo4jRatingsLoader",
+}
+
+_ledger_lock = threading.Lock()
+
+_MEASUREMENTS = (
+    ("chariot_scheduler_node_seconds", "node", "stage.{}.seconds", "sum"),
+    ("chariot_aggregation_stage_seconds", "stage", "aggregation.{}.seconds", "sum"),
+    ("chariot_rows_written_total", "loader", "loader.{}.rows", "value"),
+    ("chariot_conductor_batches_total", "loader", "loader.{}.batches", "value"),
+    (
+        "chariot_conductor_rows_per_second",
+        "loader",
+        "loader.{}.rows_per_second",
+        "value",
+    ),
+)
+
+
+def run_config(stages: List[str] = None) -> Dict:
+    return {
+        "stages": stages,
+        "etl_batch_size": settings.etl.batch_size,
+        "adaptive_batching": settings.etl.adaptive_batching,
+        "compact_ratings": settings.etl.compact_ratings,
+        "loader_processes": settings.etl.loader_processes,
+        "postgres_write_batch_size": settings.postgres.write_batch_size,
+        "neo4j_write_batch_size": settings.neo4j.write_batch_size,
+        "workers": settings.aggregation.processes or os.cpu_count(),
+        "aggregation_streaming": settings.aggregation.streaming,
+        "aggregation_shared_dataset": settings.aggregation.shared_dataset,
+    }
+
+
+def collect_measurements(summary: Dict) -> Dict[str, float]:
+    measurements = {}
+    for metric_name, label, key_format, field in _MEASUREMENTS:
+        for sample in summary.get(metric_name, {}).get("samples", []):
+            name = sample["labels"].get(label)
+            if name is not None:
+                measurements[key_format.format(name)] = sample[field]
+    return measurements
+
+
+def build_run_record(
+    role: str,
+    run_id: str,
+    started_at: float,
+    duration: float,
+    success: bool,
+    stages: List[str] = None,
+) -> Dict:
+    measurements = collect_measurements(metrics.registry.summary())
+    measurements["run.seconds"] = round(duration, 3)
+    return {
+        "run_id": run_id,
+        "role": role,
+        "started_at": datetime.fromtimestamp(started_at, timezone.utc).isoformat(),
+        "success": success,
+        "config": run_config(stages),
+        "measurements": measurements,
+    }
+
+
+class RunLedger:
+    def __init__(self, path: str = None):
+        self.path = path if path is not None else settings.ledger.path
+
+    def append(self, record: Dict):
+        if not self.path:
+            return
+        with _ledger_lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        log.info("Run recorded in ledger", path=self.path, run_id=record["run_id"])
+
+    def load(self) -> List[Dict]:
+        if not self.path or not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    log.warn("Skipping unreadable ledger line", path=self.path)
+        return records
+
+
+def record_run(role: str, run_id: str, started_at: float, success: bool, **kwargs):
+    record = build_run_record(
+        role, run_id, started_at, time.time() - started_at, success, **kwargs
+    )
+    RunLedger().append(record)
+    return record
+
+
+def loader_rows_key(key: str) -> Optional[str]:
+    kind, _, rest = key.partition(".")
+    name = rest.rpartition(".")[0]
+    if kind == "stage":
+        name = STAGE_LOADERS.get(name)
+    elif kind != "loader":
+        name = None
+    return None if name is None else f"loader.{name}{ROWS}"
+
+
+def normalized_measurements(record: Dict) -> Dict[str, Tuple[float, float]]:
+    measurements = record["measurements"]
+    total_rows = sum(value for key, value in measurements.items() if key.endswith(ROWS))
+    normalized = {}
+    for key, value in measurements.items():
+        rows_key = loader_rows_key(key)
+        rows = measurements.get(rows_key, 0) if rows_key else total_rows
+        if key.endswith(HIGHER_IS_BETTER):
+            normalized[key] = (value, rows)
+        elif key.endswith(LOWER_IS_BETTER):
+            if rows_key and rows:
+                normalized[key + "_per_row"] = (value / rows, rows)
+            else:
+                normalized[key] = (value, rows)
+    return normalized
+
+
+def rows_comparable(rows: float, baseline_rows: float, max_ratio: float) -> bool:
+    if not rows or not baseline_rows:
+        return rows == baseline_rows
+    return max(rows, baseline_rows) / min(rows, baseline_rows) <= max_ratio
+
+
+def detect_regressions(
+    records: List[Dict],
+    role: str,
+    window: int = None,
+    z_threshold: float = None,
+    min_change: float = None,
+    min_baseline_runs: int = 3,
+    max_row_ratio: float = None,
+) -> List[Dict]:
+    window = window or settings.ledger.window
+    z_threshold = z_threshold or settings.ledger.z_threshold
+    min_change = min_change if min_change is not None else settings.ledger.min_change
+    max_row_ratio = max_row_ratio or settings.ledger.max_row_ratio
+
+    runs = [record for record in records if record["role"] == role]
+    if not runs:
+        return []
+    latest = runs[-1]
+    baseline = [
+        normalized_measurements(record)
+        for record in runs[:-1]
+        if record["success"] and record.get("config") == latest.get("config")
+    ][-window:]
+
+    regressions = []
+    for key, (value, rows) in sorted(normalized_measurements(latest).items()):
+        sign = -1 if key.endswith(HIGHER_IS_BETTER) else 1
+        history = [
+            measurements[key][0]
+            for measurements in baseline
+            if key in measurements
+            and rows_comparable(rows, measurements[key][1], max_row_ratio)
+        ]
+        if len(history) < min_baseline_runs:
+            continue
+        mean = sum(history) / len(history)
+        variance = sum((x - mean) ** 2 for x in history) / (len(history) - 1)
+        std = max(math.sqrt(variance), abs(mean) * 0.01, 1e-9)
+        z_score = sign * (value - mean) / std
+        change = sign * (value - mean) / abs(mean) if mean else 0.0
+        if z_score > z_threshold and change > min_change:
+            regressions.append(
+                {
+                    "measurement": key,
+                    "latest": value,
+                    "baseline_mean": round(mean, 6),
+                    "baseline_runs": len(history),
+                    "z_score": round(z_score, 2),
+                    "change": round(change, 4),
+                }
+            )
+    return regressions
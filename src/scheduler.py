@@ -0,0 +1,105 @@
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List
+
+import structlog
+
+from src import metrics, tracing
+
+log = structlog.get_logger()
+
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class StageNode:
+    def __init__(self, name: str, run: Callable[[], None], depends_on: List[str] = ()):
+        self.name = name
+        self.run = run
+        self.depends_on = list(depends_on)
+
+
+class StageScheduler:
+    def __init__(self, nodes: List[StageNode], max_workers: int = None):
+        self.nodes = {node.name: node for node in nodes}
+        self.max_workers = max_workers or max(len(self.nodes), 1)
+        self._validate()
+        log.info(
+            "Stage scheduler initialized",
+            nodes={name: node.depends_on for name, node in self.nodes.items()},
+        )
+
+    def _validate(self):
+        for node in self.nodes.values():
+            unknown = [dep for dep in node.depends_on if dep not in self.nodes]
+            if unknown:
+                raise ValueError(f"Node {node.name} depends on unknown nodes {unknown}")
+
+        visiting, visited = set(), set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through node {name}")
+            visiting.add(name)
+            for dep in self.nodes[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.nodes:
+            visit(name)
+
+    def _run_node(self, node: StageNode):
+        log.info("Starting node", node=node.name)
+        with tracing.span(f"stage.{node.name}"):
+            with metrics.SCHEDULER_NODE_SECONDS.time(node=node.name):
+                node.run()
+
+    def run(self) -> Dict[str, str]:
+        statuses: Dict[str, str] = {}
+        running = {}
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(statuses) < len(self.nodes):
+                for name, node in self.nodes.items():
+                    if name in statuses or name in running.values():
+                        continue
+                    dep_statuses = [statuses.get(dep) for dep in node.depends_on]
+                    if any(status in (FAILED, SKIPPED) for status in dep_statuses):
+                        log.warn(
+                            "Skipping node, a dependency did not succeed", node=name
+                        )
+                        statuses[name] = SKIPPED
+                        metrics.SCHEDULER_NODES.inc(status=SKIPPED)
+                    elif all(status == SUCCEEDED for status in dep_statuses):
+                        future = executor.submit(
+                            contextvars.copy_context().run, self._run_node, node
+                        )
+                        running[future] = name
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        future.result()
+                        statuses[name] = SUCCEEDED
+                        log.info("Node finished", node=name)
+                    except Exception as e:
+                        statuses[name] = FAILED
+                        log.error("Node failed", node=name, error=str(e))
+                    metrics.SCHEDULER_NODES.inc(status=statuses[name])
+
+        log.info(
+            "All nodes have finished",
+            statuses=statuses,
+            seconds=round(time.perf_counter() - started, 3),
+        )
+        return statuses
@@ -0,0 +1,233 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import structlog
+
+from src import metrics
+
+log = structlog.get_logger()
+
+LATENCY_BASELINE_DRIFT = 0.005
+
+_governors: Dict[str, "SourceGovernor"] = {}
+_governors_lock = threading.Lock()
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.burst = burst or rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(
+        self,
+        name: str,
+        max_limit: int,
+        min_limit: int = 1,
+        latency_tolerance: float = 2.0,
+    ):
+        self.name = name
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(max_limit)
+        self.baseline: Optional[float] = None
+        self.in_flight = 0
+        self._condition = threading.Condition()
+        metrics.SOURCE_CONCURRENCY_LIMIT.set(self.limit, source=name)
+
+    def acquire(self):
+        if not self.max_limit:
+            return
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        if not self.max_limit:
+            return
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def observe(self, latency: float):
+        if not self.max_limit:
+            return
+        with self._condition:
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:
+                self.baseline += (latency - self.baseline) * LATENCY_BASELINE_DRIFT
+
+            if latency > self.baseline * self.latency_tolerance:
+                limit = max(self.min_limit, self.limit / 2)
+                if int(limit) != int(self.limit):
+                    log.info(
+                        "Source latency above baseline, reducing concurrency",
+                        source=self.name,
+                        latency=latency,
+                        baseline=self.baseline,
+                        limit=int(limit),
+                    )
+            else:
+                limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.limit = limit
+            metrics.SOURCE_CONCURRENCY_LIMIT.set(int(limit), source=self.name)
+            self._condition.notify_all()
+
+
+class SourceQuery:
+    def __init__(self, expected_rows: int):
+        self.expected_rows = expected_rows
+        self.rows = 0
+
+
+class SourceGovernor:
+    def __init__(
+        self,
+        name: str,
+        max_rows_per_second: float = 0,
+        max_queries_per_second: float = 0,
+        max_concurrency: int = 0,
+        latency_tolerance: float = 2.0,
+    ):
+        self.name = name
+        self.rows = TokenBucket(max_rows_per_second)
+        self.queries = TokenBucket(max_queries_per_second)
+        self.limiter = AdaptiveConcurrencyLimiter(
+            name, max_concurrency, latency_tolerance=latency_tolerance
+        )
+
+    @contextmanager
+    def query(self, expected_rows: int = 0):
+        waited = self.queries.acquire(1)
+        started = time.perf_counter()
+        self.limiter.acquire()
+        waited += time.perf_counter() - started
+        metrics.SOURCE_THROTTLE_SECONDS.observe(waited, source=self.name)
+
+        request = SourceQuery(expected_rows)
+        started = time.perf_counter()
+        try:
+            yield request
+        finally:
+            self.limiter.release()
+        if request.rows and request.rows >= request.expected_rows:
+            self.limiter.observe((time.perf_counter() - started) / request.rows)
+
+    def consume_rows(self, rows: int):
+        waited = self.rows.acquire(rows)
+        if waited:
+            metrics.SOURCE_THROTTLE_SECONDS.observe(waited, source=self.name)
+
+
+def get_source_governor(name: str, source_settings) -> SourceGovernor:
+    with _governors_lock:
+        if name not in _governors:
+            _governors[name] = SourceGovernor(
+                name,
+                max_rows_per_second=source_settings.max_rows_per_second,
+                max_queries_per_second=source_settings.max_queries_per_second,
+                max_concurrency=source_settings.max_concurrency,
+                latency_tolerance=source_settings.latency_tolerance,
+            )
+            log.info(
+                "Source governor created",
+                source=name,
+                max_rows_per_second=source_settings.max_rows_per_second,
+                max_queries_per_second=source_settings.max_queries_per_second,
+                max_concurrency=source_settings.max_concurrency,
+            )
+        return _governors[name]
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        primary: Dict,
+        replica: Optional[Dict],
+        max_lag_seconds: float,
+        connect: Callable,
+        check_interval: float = 5.0,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_seconds = max_lag_seconds
+        self.connect = connect
+        self.check_interval = check_interval
+        self._use_replica = False
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def replica_lag(self) -> Optional[float]:
+        try:
+            with self.connect(**self.replica) as conn:
+                with conn.cursor(dictionary=True) as cursor:
+                    cursor.execute("SHOW REPLICA STATUS")
+                    rows = cursor.fetchall()
+        except Exception as e:
+            log.warn("Could not read replica status", error=str(e))
+            return None
+        if not rows:
+            return None
+        lag = rows[0].get("Seconds_Behind_Source", rows[0].get("Seconds_Behind_Master"))
+        return None if lag is None else float(lag)
+
+    def read_config(self) -> Dict:
+        if not self.replica:
+            return self.primary
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._checked_at is None
+                or now - self._checked_at >= self.check_interval
+            ):
+                lag = self.replica_lag()
+                use_replica = lag is not None and lag <= self.max_lag_seconds
+                if use_replica != self._use_replica:
+                    log.info(
+                        "Switching extraction reads",
+                        target="replica" if use_replica else "primary",
+                        replica_lag=lag,
+                        max_lag_seconds=self.max_lag_seconds,
+                    )
+                self._use_replica = use_replica
+                self._checked_at = now
+                if lag is not None:
+                    metrics.SOURCE_REPLICA_LAG.set(lag, source=self.replica["host"])
+            use_replica = self._use_replica
+        metrics.SOURCE_READS.inc(target="replica" if use_replica else "primary")
+        return self.replica if use_replica else self.primary
+
+
+def build_replica_router(primary: Dict, source_settings, connect) -> ReplicaRouter:
+    replica = (
+        dict(primary, host=source_settings.replica_host)
+        if source_settings.replica_host
+        else None
+    )
+    return ReplicaRouter(
+        primary, replica, source_settings.replica_max_lag_seconds, connect
+    )
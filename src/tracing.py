@@ -0,0 +1,186 @@
+import argparse
+import contextvars
+import glob
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+import structlog
+
+log = structlog.get_logger()
+
+TRACEPARENT_ENV = "TRACEPARENT"
+
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: Optional[str]
+
+
+_current_span = contextvars.ContextVar("chariot_current_span", default=None)
+_exporter = None
+
+
+class TraceFileExporter:
+    def __init__(self, output_dir: str, trace_id: str, role: str):
+        self.directory = os.path.join(output_dir, trace_id)
+        self.role = role
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(os.path.join(self.directory, f"{role}-{self.pid}.jsonl"), "a")
+        self._write(
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": self.pid,
+                "args": {"name": f"{role} ({self.pid})"},
+            }
+        )
+
+    def _write(self, event: dict):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def export(self, name, context, parent_id, start_ns, end_ns, attributes):
+        self._write(
+            {
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": start_ns / 1000.0,
+                "dur": (end_ns - start_ns) / 1000.0,
+                "pid": self.pid,
+                "tid": threading.get_native_id(),
+                "args": {
+                    "trace_id": context.trace_id,
+                    "span_id": context.span_id,
+                    "parent_span_id": parent_id,
+                    **attributes,
+                },
+            }
+        )
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def format_traceparent(context: SpanContext) -> str:
+    return f"00-{context.trace_id}-{context.span_id or '0' * 16}-01"
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        log.warn("Ignoring malformed traceparent", traceparent=value)
+        return None
+    span_id = None if parts[2] == "0" * 16 else parts[2]
+    return SpanContext(parts[1], span_id)
+
+
+def init(role: str, traceparent: str = None, enabled: bool = None) -> str:
+    global _exporter
+    from config.config import settings
+
+    parent = parse_traceparent(traceparent or os.environ.get(TRACEPARENT_ENV))
+    context = parent or SpanContext(secrets.token_hex(16), None)
+    _current_span.set(context)
+    structlog.contextvars.bind_contextvars(run_id=context.trace_id)
+
+    if _exporter is not None:
+        _exporter.close()
+        _exporter = None
+    if settings.tracing.enabled if enabled is None else enabled:
+        _exporter = TraceFileExporter(
+            settings.tracing.output_dir, context.trace_id, role
+        )
+    return context.trace_id
+
+
+def worker_traceparent() -> Optional[str]:
+    context = _current_span.get()
+    return format_traceparent(context) if context else None
+
+
+def worker_config() -> dict:
+    return {"traceparent": worker_traceparent(), "enabled": _exporter is not None}
+
+
+def current_run_id() -> Optional[str]:
+    context = _current_span.get()
+    return context.trace_id if context else None
+
+
+@contextmanager
+def attach(traceparent: Optional[str]):
+    context = parse_traceparent(traceparent)
+    if context is None:
+        yield
+        return
+    token = _current_span.set(context)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    context = SpanContext(parent.trace_id, secrets.token_hex(8))
+    token = _current_span.set(context)
+    start_ns = time.time_ns()
+    try:
+        with structlog.contextvars.bound_contextvars(span_id=context.span_id):
+            yield context
+    except BaseException as e:
+        attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        if _exporter is not None:
+            _exporter.export(
+                name, context, parent.span_id, start_ns, time.time_ns(), attributes
+            )
+
+
+def merge_trace(output_dir: str, trace_id: str) -> str:
+    events = []
+    for path in sorted(glob.glob(os.path.join(output_dir, trace_id, "*.jsonl"))):
+        with open(path) as f:
+            events.extend(json.loads(line) for line in f if line.strip())
+
+    merged_path = os.path.join(output_dir, f"{trace_id}.json")
+    with open(merged_path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    log.info("Trace written", path=merged_path, num_events=len(events))
+    return merged_path
+
+
+def main(argv=None):
+    from config.config import settings
+
+    parser = argparse.ArgumentParser(
+        description="Merge per-process span files of a run into one trace file."
+    )
+    parser.add_argument("trace_id")
+    parser.add_argument("--output-dir", default=settings.tracing.output_dir)
+    args = parser.parse_args(argv)
+    print(merge_trace(args.output_dir, args.trace_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import pytest
+
+from run_aggregation import WarmWorkerPool, plan_movie_ranges
+from src.loaders.postgres_ratings_loader import parse_partition_bound, partition_start
+
+
+def test_planned_ranges_align_to_partition_boundaries():
+    ranges = plan_movie_ranges(1, 2500, 1000)
+
+    assert ranges == [(1, 999), (1000, 1999), (2000, 2500)]
+    assert all(
+        partition_start(start, 1000) == partition_start(end, 1000)
+        for start, end in ranges
+    )
+    assert plan_movie_ranges(None, None, 1000) == []
+
+
+def test_parse_partition_bound():
+    assert parse_partition_bound("FOR VALUES FROM (1000) TO (2000)") == (1000, 2000)
+
+
+def test_closing_a_pool_that_failed_to_start_does_not_raise(monkeypatch):
+    def fail(self, *configs):
+        raise OSError("cannot start workers")
+
+    monkeypatch.setattr(WarmWorkerPool, "_create_pool", fail)
+    pool = WarmWorkerPool(processes=1)
+
+    with pytest.raises(OSError):
+        pool.get()
+    pool.close()
+    assert pool._executor._shutdown
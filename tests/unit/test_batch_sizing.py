@@ -0,0 +1,50 @@
+from benchmarks.fakes import FakeLoader, FakeMoviesExtractor
+from src.batch_sizing import AdaptiveBatchSizer, BatchSizeStore
+from src.conductor import PipelineConductor
+
+
+def test_sizer_grows_additively_and_backs_off_multiplicatively():
+    sizer = AdaptiveBatchSizer(
+        "loader", 1000, min_size=100, max_size=1500, target_seconds=1.0,
+        increase_step=200, memory_limit_mb=0,
+    )  # fmt: skip
+
+    assert sizer.observe(1000, 0.1) == 1200
+    assert sizer.observe(1200, 0.1) == 1400
+    assert sizer.observe(1400, 0.1) == 1500
+    assert sizer.observe(1500, 2.0) == 750
+    assert sizer.observe(10, 0.1) == 750
+    for _ in range(10):
+        sizer.back_off("timeout")
+    assert sizer.size == 100
+    assert not sizer.back_off("timeout")
+
+
+class FlakyLoader(FakeLoader):
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes = []
+
+    def write_batch(self, batch):
+        if len(batch) > 20:
+            raise TimeoutError("statement timeout")
+        self.batch_sizes.append(len(batch))
+        super().write_batch(batch)
+
+
+def test_conductor_retries_timed_out_writes_with_smaller_batches(tmp_path, monkeypatch):
+    from config.config import settings
+
+    state_path = str(tmp_path / "batch_sizes.json")
+    monkeypatch.setattr(settings.etl, "adaptive_batching", True)
+    monkeypatch.setattr(settings.etl, "min_batch_size", 10)
+    monkeypatch.setattr(settings.etl, "batch_state_path", state_path)
+
+    loader = FlakyLoader()
+    conductor = PipelineConductor(extractor=FakeMoviesExtractor(100), loaders=[loader])
+    conductor.batch_size = 80
+
+    assert conductor.run_concurrently() == {}
+    assert loader.rows_written == 100
+    assert max(loader.batch_sizes) <= 20
+    assert BatchSizeStore(state_path).load()["FlakyLoader"] < 80
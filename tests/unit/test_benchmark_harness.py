@@ -0,0 +1,45 @@
+import os
+
+from benchmarks.harness import run_isolated, run_transfer_scenario
+
+SCENARIO = {
+    "stage": "transfer",
+    "dataset": "ratings",
+    "sink": "fake",
+    "rows": 2_000,
+    "movies": 500,
+    "batch_size": 300,
+    "workers": 2,
+    "extract_latency_ms": 0.0,
+    "write_latency_ms": 0.0,
+    "read_latency_ms": 0.0,
+    "failure_rate": 0.0,
+    "seed": 7,
+}
+
+
+def test_transfer_scenario_moves_every_row_to_every_loader():
+    result = run_transfer_scenario(SCENARIO)
+
+    assert result["rows"] == 4_000
+    assert result["batches"] == 2 * 7
+    assert result["batch_latency_p99_ms"] >= result["batch_latency_p50_ms"]
+    assert result["failures"] == {}
+
+
+def test_failed_loaders_do_not_count_towards_throughput():
+    result = run_transfer_scenario(dict(SCENARIO, failure_rate=1.0))
+
+    assert result["rows"] == 0
+    assert result["expected_rows"] == 4_000
+    assert result["failures"] == {"FakeLoader": "Injected failure"}
+
+
+def _crash(scenario):
+    os._exit(137)
+
+
+def test_crashed_benchmark_process_is_reported_as_an_error():
+    result = run_isolated(_crash, SCENARIO)
+
+    assert "exited with code 137" in result["error"]
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from src.extractors.cached_extractor import CachedExtractor
+from src.interfaces.extractor import Extractor
+
+
+class InMemoryRatingsExtractor(Extractor):
+    def __init__(self, rows):
+        self.rows = rows
+        self.reads = 0
+
+    def read_batch(self, batch_size, high_water_mark):
+        self.reads += 1
+        return [
+            dict(row)
+            for row in self.rows
+            if (row["userId"], row["movieId"]) > high_water_mark
+        ][:batch_size]
+
+    def get_next_high_water_mark(self, batch):
+        if not batch:
+            return (0, 0)
+        return (batch[-1]["userId"], batch[-1]["movieId"])
+
+    def get_source_high_water_mark(self):
+        return self.get_next_high_water_mark(self.rows)
+
+
+def make_rows(num_users):
+    return [
+        {
+            "userId": user_id,
+            "movieId": movie_id,
+            "rating": Decimal("3.5"),
+            "timestamp": 964982703,
+        }
+        for user_id in range(1, num_users + 1)
+        for movie_id in (1, 2)
+    ]
+
+
+def drain(extractor, batch_size):
+    hwm, rows = (0, 0), []
+    while True:
+        batch = extractor.read_batch(batch_size=batch_size, high_water_mark=hwm)
+        if not batch:
+            return rows
+        rows.extend(batch)
+        hwm = extractor.get_next_high_water_mark(batch)
+
+
+def test_second_pass_is_served_from_cache(tmp_path):
+    source = InMemoryRatingsExtractor(make_rows(5))
+    cached = CachedExtractor(source, directory=str(tmp_path), max_bytes=10**7)
+
+    first = drain(cached, batch_size=4)
+    reads_after_first = source.reads
+    second = drain(CachedExtractor(source, directory=str(tmp_path)), batch_size=3)
+
+    assert first == second == source.rows
+    assert source.reads == reads_after_first + 1
+
+
+def test_cache_invalidated_when_source_moves_backwards(tmp_path):
+    source = InMemoryRatingsExtractor(make_rows(5))
+    drain(CachedExtractor(source, directory=str(tmp_path)), batch_size=4)
+
+    source.rows = make_rows(2)
+    rows = drain(CachedExtractor(source, directory=str(tmp_path)), batch_size=4)
+
+    assert rows == source.rows
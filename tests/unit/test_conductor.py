@@ -0,0 +1,34 @@
+from benchmarks.fakes import FakeLoader, FakeMoviesExtractor
+from src.conductor import PipelineConductor
+
+
+class RecordingLoader(FakeLoader):
+    def __init__(self, preferred_write_size=None):
+        super().__init__()
+        self.preferred_write_size = preferred_write_size
+        self.writes = []
+
+    def write_batch(self, batch):
+        self.writes.append([row["movieId"] for row in batch])
+        super().write_batch(batch)
+
+
+def test_extracted_batches_are_coalesced_and_split_per_sink():
+    coalescing, splitting, passthrough = (
+        RecordingLoader(25),
+        RecordingLoader(4),
+        RecordingLoader(),
+    )
+    conductor = PipelineConductor(
+        extractor=FakeMoviesExtractor(57),
+        loaders=[coalescing, splitting, passthrough],
+    )
+    conductor.batch_size = 10
+
+    assert conductor.run_concurrently() == {}
+
+    assert [len(w) for w in coalescing.writes] == [25, 25, 7]
+    assert [len(w) for w in splitting.writes] == [4] * 14 + [1]
+    assert [len(w) for w in passthrough.writes] == [10] * 5 + [7]
+    for loader in (coalescing, splitting, passthrough):
+        assert sum(loader.writes, []) == list(range(1, 58))
@@ -0,0 +1,23 @@
+import pandas as pd
+
+from scripts.generate_dataset import DatasetGenerator
+
+
+def test_generated_dataset_has_movielens_shape(tmp_path):
+    generator = DatasetGenerator(
+        num_movies=300, num_ratings=5_000, seed=3, users_per_chunk=20
+    )
+    generator.write_movies(tmp_path / "movies.csv")
+    generator.write_ratings(tmp_path / "ratings.csv")
+
+    movies = pd.read_csv(tmp_path / "movies.csv")
+    ratings = pd.read_csv(tmp_path / "ratings.csv")
+
+    assert len(movies) == 300
+    assert movies["movieId"].is_unique
+    assert len(ratings) == 5_000
+    assert not ratings.duplicated(["userId", "movieId"]).any()
+    assert ratings["userId"].is_monotonic_increasing
+    assert ratings["movieId"].isin(movies["movieId"]).all()
+    assert ((ratings["rating"] * 2) % 1 == 0).all()
+    assert ratings["rating"].between(0.5, 5.0).all()
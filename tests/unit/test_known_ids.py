@@ -0,0 +1,52 @@
+from decimal import Decimal
+
+from benchmarks.fakes import FakeDriver
+from config.config import settings
+from src.loaders.known_ids import KnownIds
+from src.loaders.neo4j_ratings_loader import Neo4jRatingsLoader
+
+
+def test_partition_splits_rows_by_known_ids():
+    known = KnownIds([3, 5])
+    known.add([1000])
+    rows = [{"movieId": movie_id} for movie_id in (5, 4, 1000, -1, 5000, 3)]
+
+    loadable, orphans = known.partition(rows, "movieId")
+
+    assert [row["movieId"] for row in loadable] == [5, 1000, 3]
+    assert [row["movieId"] for row in orphans] == [4, -1, 5000]
+    assert len(known) == 3
+
+    known.add([2**40])
+    assert known.ids.nbytes == 4 * 8
+    assert known.contains([2**40, 2**40 - 1]).tolist() == [True, False]
+
+
+def test_orphan_ratings_are_dead_lettered_and_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        settings.neo4j, "dead_letter_path", str(tmp_path / "dead.jsonl")
+    )
+    loader = Neo4jRatingsLoader()
+    loader.driver.close()
+    loader.driver = FakeDriver()
+    loader.known_movies = KnownIds()
+    movies_in_graph = [1, 2]
+    loader.fetch_movie_ids = lambda: movies_in_graph
+    written = []
+    monkeypatch.setattr(loader, "_write_rows", written.extend)
+
+    loader.start_run()
+    batch = [
+        {"userId": 1, "movieId": movie_id, "rating": Decimal("4.5"), "timestamp": 7}
+        for movie_id in (1, 2, 3, 3)
+    ]
+    loader.write_batch(batch)
+    assert [row["movieId"] for row in written] == [1, 2]
+    assert len(loader.dead_letters.pending()) == 1
+
+    movies_in_graph.append(3)
+    loader.known_movies = KnownIds()
+    written.clear()
+    loader.start_run()
+    assert written == [{"userId": 1, "movieId": 3, "rating": 4.5, "timestamp": 7}]
+    assert loader.dead_letters.pending() == []
@@ -0,0 +1,59 @@
+import json
+import logging
+import multiprocessing
+
+import pytest
+import structlog
+
+from config.config import settings
+from src import logging_config
+
+
+def log_from_worker(log_config):
+    logging_config.setup_worker_logging(**log_config)
+    structlog.get_logger().info("Worker event", worker=True)
+    structlog.get_logger().debug("Worker detail")
+
+
+@pytest.fixture
+def background_logging(monkeypatch):
+    monkeypatch.setattr(settings.log, "background", True)
+    monkeypatch.setattr(settings.log, "sample_rates", "Dropped event=0;Kept event=1")
+    yield
+    logging_config.stop_logging()
+    monkeypatch.setattr(logging_config, "_worker_queue", None)
+    for handler in list(logging.getLogger().handlers):
+        logging.getLogger().removeHandler(handler)
+    structlog.reset_defaults()
+
+
+def test_parse_sample_rates():
+    assert logging_config.parse_sample_rates("") == {}
+    assert logging_config.parse_sample_rates(
+        "Batch committed. New high-water mark.=0.01; a=b=0.5"
+    ) == {"Batch committed. New high-water mark.": 0.01, "a=b": 0.5}
+
+
+def test_background_listener_renders_sampled_and_forwarded_events(
+    background_logging, capsys
+):
+    logging_config.setup_logging()
+    log = structlog.get_logger()
+    log.debug("Hot path detail")
+    log.info("Dropped event")
+    log.info("Kept event", batch=1)
+    log.info("Plain event")
+
+    worker = multiprocessing.get_context("spawn").Process(
+        target=log_from_worker, args=(logging_config.worker_config(),)
+    )
+    worker.start()
+    worker.join()
+    logging_config.stop_logging()
+
+    lines = [line for line in capsys.readouterr().out.splitlines() if line[:1] == "{"]
+    events = {event["event"]: event for event in map(json.loads, lines)}
+    assert set(events) == {"Kept event", "Plain event", "Worker event"}
+    assert events["Kept event"]["sample_rate"] == 1
+    assert events["Worker event"]["worker"] is True
+    assert events["Plain event"]["level"] == "info"
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+from main import parse_args
+
+
+def test_stages_run_in_pipeline_order():
+    assert parse_args(["audit", "movies"]).stages == ["movies", "audit"]
+    assert parse_args([]).stages == ["movies", "ratings", "aggregate"]
+
+
+def test_importing_main_has_no_heavy_imports():
+    code = (
+        "import sys, main; "
+        "print(sorted(m for m in ('pandas', 'psycopg2', 'neo4j', 'mysql') "
+        "if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == "[]"
+
+
+def test_stage_graph_drops_dependencies_on_unselected_stages():
+    from main import build_stage_graph
+
+    nodes = {node.name: node.depends_on for node in build_stage_graph(["ratings"])}
+    assert nodes == {"ratings:postgres": [], "ratings:neo4j": []}
+
+    nodes = {
+        node.name: node.depends_on
+        for node in build_stage_graph(["movies", "ratings", "aggregate"])
+    }
+    assert nodes["ratings:neo4j"] == ["movies:neo4j"]
+    assert nodes["aggregate"] == ["movies:postgres", "ratings:postgres"]
+
+
+def test_streamed_summary_waits_for_movies_in_postgres(monkeypatch):
+    from config.config import settings
+    from main import build_stage_graph
+
+    monkeypatch.setattr(settings.aggregation, "streaming", True)
+    nodes = {
+        node.name: node.depends_on
+        for node in build_stage_graph(["movies", "ratings", "aggregate"])
+    }
+    assert nodes["aggregate"] == ["movies:postgres", "ratings:postgres"]
+
+    nodes = {
+        node.name: node.depends_on
+        for node in build_stage_graph(["ratings", "aggregate"])
+    }
+    assert nodes["aggregate"] == ["ratings:postgres"]
@@ -0,0 +1,23 @@
+from src.metrics import MetricsRegistry
+
+
+def test_worker_snapshots_merge_into_parent_registry():
+    parent = MetricsRegistry()
+    worker = MetricsRegistry()
+    for registry in (parent, worker):
+        registry.counter("rows_total", "Rows.")
+        registry.histogram("batch_seconds", "Batch time.", buckets=(0.1, 1.0))
+
+    parent._metrics["rows_total"].inc(5, loader="pg")
+    worker._metrics["rows_total"].inc(7, loader="pg")
+    worker._metrics["batch_seconds"].observe(0.5, phase="fetch")
+    worker._metrics["batch_seconds"].observe(3.0, phase="fetch")
+
+    parent.merge(worker.drain())
+
+    assert worker.snapshot() == {}
+    text = parent.render_prometheus()
+    assert 'rows_total{loader="pg"} 12' in text
+    assert 'batch_seconds_bucket{phase="fetch",le="1.0"} 1' in text
+    assert 'batch_seconds_bucket{phase="fetch",le="+Inf"} 2' in text
+    assert 'batch_seconds_count{phase="fetch"} 2' in text
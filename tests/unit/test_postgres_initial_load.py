@@ -0,0 +1,120 @@
+import pytest
+
+from src.loaders.postgres_initial_load import InitialLoad, InitialLoadError
+
+
+class RecordingDatabase:
+    def __init__(self, empty):
+        self.empty = empty
+        self.duplicates = []
+        self.state = []
+        self.statements = []
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        pass
+
+    def execute(self, sql, params=None):
+        self.statements.append(" ".join(sql.split()))
+        if "FROM jobs.initial_load_state" in sql and sql.startswith("SELECT"):
+            self.results = [row[2:] for row in self.state]
+        elif sql.startswith("INSERT INTO jobs.initial_load_state"):
+            self.state.append(params)
+        elif sql.startswith("DELETE FROM jobs.initial_load_state"):
+            self.state = []
+        elif "HAVING COUNT(*) > 1" in sql:
+            self.results = self.duplicates
+        elif "relkind" in sql:
+            self.results = [("r",)]
+        elif "NOT EXISTS (SELECT 1 FROM movies.ratings)" in sql:
+            self.results = [(self.empty,)]
+        elif "FROM pg_constraint" in sql and "conrelid" in sql:
+            self.results = [("ratings_pkey", "PRIMARY KEY (user_id, movie_id)")]
+        elif "FROM pg_index" in sql:
+            self.results = [
+                (
+                    "idx_ratings_movie_id_covering",
+                    "CREATE INDEX idx_ratings_movie_id_covering ON movies.ratings "
+                    'USING btree (movie_id) INCLUDE (rating, user_id, "timestamp")',
+                )
+            ]
+
+    def fetchone(self):
+        return self.results[0]
+
+    def fetchall(self):
+        return self.results
+
+    def ddl(self):
+        return [
+            s for s in self.statements if s.split()[0] in ("ALTER", "DROP", "CREATE")
+        ]
+
+
+def test_empty_table_is_loaded_unlogged_and_restored_after_a_restart():
+    database = RecordingDatabase(empty=True)
+    InitialLoad(database, "movies.ratings", mode="auto").start()
+    assert database.ddl() == [
+        "DROP INDEX movies.idx_ratings_movie_id_covering",
+        "ALTER TABLE movies.ratings DROP CONSTRAINT ratings_pkey",
+        "ALTER TABLE movies.ratings SET UNLOGGED",
+    ]
+
+    database.statements = []
+    database.empty = False
+    resumed = InitialLoad(database, "movies.ratings", mode="auto")
+    resumed.start()
+    assert resumed.active and database.ddl() == []
+
+    resumed.finish()
+    assert database.ddl() == [
+        "ALTER TABLE movies.ratings SET LOGGED",
+        "ALTER TABLE movies.ratings ADD CONSTRAINT ratings_pkey "
+        "PRIMARY KEY (user_id, movie_id)",
+        "CREATE INDEX idx_ratings_movie_id_covering ON movies.ratings USING btree "
+        '(movie_id) INCLUDE (rating, user_id, "timestamp")',
+    ]
+    assert database.state == [] and not resumed.active
+
+
+def test_non_empty_table_keeps_incremental_mode():
+    database = RecordingDatabase(empty=False)
+    initial_load = InitialLoad(database, "movies.ratings", mode="auto")
+    initial_load.start()
+    initial_load.finish()
+    assert not initial_load.active and database.ddl() == []
+
+
+def test_duplicate_keys_block_the_restore_and_bulk_mode():
+    database = RecordingDatabase(empty=True)
+    InitialLoad(database, "movies.ratings", mode="auto").start()
+    database.duplicates = [(7, 42, 2)]
+    database.statements = []
+
+    initial_load = InitialLoad(database, "movies.ratings", mode="auto")
+    initial_load.start()
+    with pytest.raises(InitialLoadError, match=r"\[\[7, 42\]\]"):
+        initial_load.finish()
+    assert not initial_load.active and database.ddl() == []
+
+    retried = InitialLoad(database, "movies.ratings", mode="auto")
+    with pytest.raises(InitialLoadError):
+        retried.start()
+    assert not retried.active and database.ddl() == []
+
+    database.duplicates = []
+    fixed = InitialLoad(database, "movies.ratings", mode="auto")
+    fixed.start()
+    assert not fixed.active and database.state == []
+    assert "ALTER TABLE movies.ratings SET LOGGED" in database.ddl()
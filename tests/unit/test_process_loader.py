@@ -0,0 +1,62 @@
+import pytest
+
+from benchmarks.fakes import FakeLoader, FakeMoviesExtractor
+from src import metrics
+from src.conductor import PipelineConductor
+from src.loaders.process_loader import (
+    LoaderProcessError,
+    LoaderProcessTimeout,
+    ProcessLoader,
+)
+
+
+class HighWaterMarkLoader(FakeLoader):
+    preferred_write_size = 20
+    timed_out = False
+
+    def write_batch(self, batch):
+        if not self.timed_out and any(row["movieId"] == 13 for row in batch):
+            self.timed_out = True
+            raise TimeoutError("write timed out")
+        super().write_batch(batch)
+        self.initial_hwm = batch[-1]["movieId"]
+        metrics.ROWS_WRITTEN.inc(len(batch), loader="HighWaterMarkLoader")
+
+
+class BrokenLoader(FakeLoader):
+    def __init__(self):
+        raise RuntimeError("cannot connect")
+
+
+def rows_written():
+    summary = metrics.registry.summary().get("chariot_rows_written_total", {})
+    return sum(
+        sample["value"]
+        for sample in summary.get("samples", [])
+        if sample["labels"]["loader"] == "HighWaterMarkLoader"
+    )
+
+
+def test_loader_runs_in_a_child_process_and_reports_back():
+    before = rows_written()
+    loader = ProcessLoader(HighWaterMarkLoader, start_method="spawn")
+    try:
+        assert loader.name == "HighWaterMarkLoader"
+        assert loader.preferred_write_size == 20
+        with pytest.raises(LoaderProcessTimeout, match="TimeoutError"):
+            loader.write_batch([{"movieId": 13, "title": "x", "genres": "y"}])
+        assert loader.get_high_water_mark() == 0
+
+        conductor = PipelineConductor(FakeMoviesExtractor(57), [loader])
+        conductor.batch_size = 10
+        assert conductor.run_concurrently() == {}
+        assert loader.get_high_water_mark() == 57
+        assert rows_written() - before == 57
+    finally:
+        loader.close()
+    assert not loader.process.is_alive()
+
+
+def test_loader_start_failures_are_raised_in_the_parent():
+    with pytest.raises(LoaderProcessError, match="RuntimeError: cannot connect"):
+        ProcessLoader(BrokenLoader, start_method="spawn")
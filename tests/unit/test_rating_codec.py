@@ -0,0 +1,96 @@
+import sqlite3
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from benchmarks.fakes import FakeConnection, FakeDatabase
+from src.aggregators.ratings_aggregator import RatingsAggregator
+from src.rating_codec import (
+    HALF_STAR_DECIMALS,
+    HALF_STAR_FLOATS,
+    HALF_STAR_TEXT,
+    MYSQL_HALF_STARS,
+    check_half_star_rows,
+    half_star_array,
+    record_rating,
+    to_half_stars,
+)
+
+
+def test_half_star_conversion_is_exact_in_both_directions():
+    for code in range(1, 11):
+        decimal = Decimal(code) / 2
+        assert to_half_stars(decimal) == code
+        assert to_half_stars(code / 2) == code
+        assert HALF_STAR_DECIMALS[code] == decimal
+        assert HALF_STAR_FLOATS[code] == float(decimal)
+        assert Decimal(HALF_STAR_TEXT[code]) == decimal
+
+
+@pytest.mark.parametrize("rating", [Decimal("4.2"), 0, Decimal("5.5"), 2.25])
+def test_non_half_star_ratings_are_rejected(rating):
+    with pytest.raises(ValueError):
+        to_half_stars(rating)
+
+
+def test_compact_and_decimal_records_decode_to_the_same_values():
+    decimal_batch = [
+        {"userId": 1, "movieId": 1, "rating": Decimal("3.5")},
+        {"userId": 1, "movieId": 2, "rating": Decimal("5.0")},
+    ]
+    compact_batch = [
+        {"userId": 1, "movieId": 1, "halfStars": 7},
+        {"userId": 1, "movieId": 2, "halfStars": 10},
+    ]
+    for batch in (decimal_batch, compact_batch):
+        codes = half_star_array(batch)
+        assert codes.dtype == np.int8 and codes.tolist() == [7, 10]
+    assert [record_rating(r) for r in compact_batch] == [
+        r["rating"] for r in decimal_batch
+    ]
+    assert [record_rating(r, HALF_STAR_FLOATS) for r in compact_batch] == [3.5, 5.0]
+
+
+def test_sql_conversion_leaves_non_half_star_ratings_null():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE ratings (rating)")
+    conn.executemany(
+        "INSERT INTO ratings VALUES (?)", [(0.5,), (4.2,), (5.0,), (5.5,), (0,)]
+    )
+    codes = conn.execute(f"SELECT {MYSQL_HALF_STARS} FROM ratings").fetchall()
+    assert [code for code, in codes] == [1, None, 10, None, None]
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        {"userId": 1, "movieId": 2, "halfStars": None},
+        {"userId": 1, "movieId": 2, "rating": Decimal("4.2")},
+    ],
+)
+def test_loaders_reject_non_half_star_records(record):
+    with pytest.raises(ValueError):
+        record_rating(record)
+
+
+def test_batch_with_non_half_star_rating_fails_naming_the_rating():
+    database = FakeDatabase(
+        np.array([1, 1, 2, 2]),
+        np.array([4, 10, 6, None], dtype=object),
+        user_ids=np.array([1, 2, 1, 3]),
+    )
+    database.plan_batches(10)
+    aggregator = RatingsAggregator()
+    aggregator._get_connection = lambda: FakeConnection(database)
+
+    with pytest.raises(ValueError, match="user 3 for movie 2"):
+        aggregator.process_batch(1)
+    assert database.statuses[1] == "failed"
+    assert database.rows_written == 0
+
+
+def test_fetched_rows_with_null_codes_are_rejected():
+    check_half_star_rows([(1, 1, 4, 0), (2, 1, 10, 0)])
+    with pytest.raises(ValueError, match="user 5 for movie 2"):
+        check_half_star_rows([(1, 1, 4, 0), (2, 5, None, 0)])
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from benchmarks.fakes import FakeLoader, FakeRatingsExtractor
+from src.aggregators.rollups import (
+    ROLLUPS,
+    compute_rollups,
+    configured_rollups,
+    genre_partials,
+    group_partials,
+)
+from src.aggregators.streaming_aggregator import StreamingRatingsAggregator
+from src.conductor import PipelineConductor
+
+
+def test_configured_rollups_rejects_unknown_names():
+    assert [rollup.name for rollup in configured_rollups("month, user")] == [
+        "month",
+        "user",
+    ]
+    assert configured_rollups("") == []
+    with pytest.raises(ValueError):
+        configured_rollups("user,country")
+
+
+def test_genre_partials_fan_out_movie_totals():
+    keys, half_star_sums, counts = genre_partials(
+        np.array([1, 2, 3]),
+        np.array([10, 6, 4]),
+        np.array([3, 2, 1]),
+        {1: ["Comedy", "Drama"], 2: ["Drama"]},
+    )
+    assert keys.tolist() == ["Comedy", "Drama"]
+    assert half_star_sums.tolist() == [10, 16]
+    assert counts.tolist() == [3, 5]
+
+
+def test_streamed_rollups_match_single_pass_batch_rollups(tmp_path):
+    extractor = FakeRatingsExtractor(num_ratings=2000, num_movies=60)
+    aggregator = StreamingRatingsAggregator(
+        FakeLoader(initial_hwm=(0, 0)),
+        extractor,
+        checkpoint_path=str(tmp_path / "streaming.npz"),
+    )
+    conductor = PipelineConductor(extractor=extractor, loaders=[aggregator])
+    conductor.batch_size = 250
+    assert conductor.run_concurrently() == {}
+
+    genres = {movie_id: ["Drama"] for movie_id in range(0, 60, 2)}
+    movie_partials = group_partials(extractor.movie_ids, extractor.half_stars)
+    expected = compute_rollups(
+        list(ROLLUPS.values()),
+        extractor.user_ids,
+        extractor.half_stars,
+        extractor.timestamps,
+        movie_partials,
+        genres,
+    )
+    streamed = aggregator.rollup_partials(genres)
+    assert streamed.keys() == expected.keys()
+    for name, partials in expected.items():
+        for streamed_column, expected_column in zip(streamed[name], partials):
+            assert streamed_column.tolist() == expected_column.tolist()
+    assert sum(streamed["user"][2]) == 2000
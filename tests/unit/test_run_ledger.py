@@ -0,0 +1,78 @@
+from check_regressions import main as check_regressions
+from config.config import settings
+from src import metrics
+from src.run_ledger import detect_regressions, record_run
+
+
+def make_run(seconds, rows_per_second, success=True, rows=1000, stages=None):
+    return {
+        "role": "main",
+        "success": success,
+        "config": {"stages": stages or ["ratings"]},
+        "measurements": {
+            "stage.ratings:postgres.seconds": seconds,
+            "loader.PostgresRatingsLoader.rows_per_second": rows_per_second,
+            "loader.PostgresRatingsLoader.rows": rows,
+        },
+    }
+
+
+def test_flags_only_significant_slowdowns_against_successful_baseline():
+    history = [make_run(100 + i, 5000 - i * 10) for i in range(6)]
+    history.append(make_run(500, 100, success=False))
+
+    assert detect_regressions(history + [make_run(104, 4980)], "main") == []
+
+    regressions = detect_regressions(history + [make_run(140, 3500)], "main")
+    assert [r["measurement"] for r in regressions] == [
+        "loader.PostgresRatingsLoader.rows_per_second",
+        "stage.ratings:postgres.seconds_per_row",
+    ]
+    assert regressions[1]["baseline_runs"] == 6
+
+
+def test_baseline_only_includes_comparable_runs():
+    history = [make_run(100 + i, 5000 - i * 10) for i in range(6)]
+    history += [make_run(10, 5000, stages=["aggregate"]) for _ in range(3)]
+
+    assert detect_regressions(history + [make_run(140, 5000, rows=1400)], "main") == []
+    assert detect_regressions(history + [make_run(103, 4980)], "main") == []
+    assert (
+        detect_regressions(history + [make_run(11, 5000, stages=["aggregate"])], "main")
+        == []
+    )
+
+
+def test_stages_are_normalized_by_their_own_loader_and_similar_row_counts():
+    def run(seconds, rows, neo4j_rows):
+        record = make_run(seconds, 5000, rows=rows)
+        record["measurements"]["loader.Neo4jRatingsLoader.rows"] = neo4j_rows
+        record["measurements"]["run.seconds"] = seconds + 5
+        return record
+
+    history = [run(100 + i, 1000, 50_000) for i in range(6)]
+
+    assert detect_regressions(history + [run(20, 100, 5_000)], "main") == []
+    assert detect_regressions(history + [run(104, 1000, 5_000)], "main") == []
+    regressions = detect_regressions(history + [run(140, 1100, 50_000)], "main")
+    assert [r["measurement"] for r in regressions] == [
+        "run.seconds",
+        "stage.ratings:postgres.seconds_per_row",
+    ]
+
+
+def test_recorded_runs_gate_the_cli(tmp_path, monkeypatch):
+    path = str(tmp_path / "ledger.jsonl")
+    monkeypatch.setattr(settings.ledger, "path", path)
+    for seconds in (10.0, 10.2, 9.9, 10.1):
+        metrics.registry.reset()
+        metrics.SCHEDULER_NODE_SECONDS.observe(seconds, node="aggregate")
+        record_run("main", "run", 0.0, True, stages=["aggregate"])
+    assert check_regressions(["--ledger", path]) == 0
+
+    metrics.registry.reset()
+    metrics.SCHEDULER_NODE_SECONDS.observe(20.0, node="aggregate")
+    record = record_run("main", "run", 0.0, True, stages=["aggregate"])
+    assert record["measurements"]["stage.aggregate.seconds"] == 20.0
+    assert check_regressions(["--ledger", path]) == 1
+    metrics.registry.reset()
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from src.scheduler import FAILED, SKIPPED, SUCCEEDED, StageNode, StageScheduler
+
+
+def test_independent_nodes_run_concurrently_and_dependencies_wait():
+    both_started = threading.Barrier(2, timeout=5)
+    order = []
+
+    def sink(name):
+        def run():
+            both_started.wait()
+            order.append(name)
+
+        return run
+
+    nodes = [
+        StageNode("movies:postgres", sink("movies:postgres")),
+        StageNode("movies:neo4j", sink("movies:neo4j")),
+        StageNode(
+            "aggregate",
+            lambda: order.append("aggregate"),
+            depends_on=["movies:postgres"],
+        ),
+    ]
+    statuses = StageScheduler(nodes).run()
+
+    assert set(statuses.values()) == {SUCCEEDED}
+    assert order.index("aggregate") > order.index("movies:postgres")
+
+
+def test_failed_node_skips_only_its_dependents():
+    def fail():
+        raise RuntimeError("neo4j down")
+
+    nodes = [
+        StageNode("movies:neo4j", fail),
+        StageNode("ratings:neo4j", lambda: None, depends_on=["movies:neo4j"]),
+        StageNode("audit", lambda: None, depends_on=["ratings:neo4j"]),
+        StageNode("ratings:postgres", lambda: None),
+    ]
+    statuses = StageScheduler(nodes).run()
+
+    assert statuses == {
+        "movies:neo4j": FAILED,
+        "ratings:neo4j": SKIPPED,
+        "audit": SKIPPED,
+        "ratings:postgres": SUCCEEDED,
+    }
+
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    with pytest.raises(ValueError):
+        StageScheduler([StageNode("a", None, ["b"]), StageNode("b", None, ["a"])])
+    with pytest.raises(ValueError):
+        StageScheduler([StageNode("a", None, ["missing"])])
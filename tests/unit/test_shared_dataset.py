@@ -0,0 +1,36 @@
+import functools
+
+import numpy as np
+
+from run_aggregation import get_worker_context
+from src.aggregators.shared_dataset import SharedRatingsDataset, attach_cached
+
+
+def _batch_totals(descriptor, movie_range):
+    movie_ids, _, half_stars, _ = attach_cached(descriptor).between(*movie_range)
+    return len(movie_ids), int(half_stars.sum())
+
+
+def test_workers_read_movie_ranges_from_shared_memory():
+    rng = np.random.default_rng(3)
+    movie_ids = np.sort(rng.integers(1, 200, size=5000))
+    half_stars = rng.integers(1, 11, size=5000)
+    dataset = SharedRatingsDataset.create(len(movie_ids))
+    try:
+        dataset.columns["movie_id"][:] = movie_ids
+        dataset.columns["half_stars"][:] = half_stars
+        ranges = [(1, 50), (51, 120), (121, 250)]
+
+        with get_worker_context().Pool(2) as pool:
+            totals = pool.map(
+                functools.partial(_batch_totals, dataset.descriptor), ranges
+            )
+
+        expected = []
+        for start_id, end_id in ranges:
+            selected = (movie_ids >= start_id) & (movie_ids <= end_id)
+            expected.append((int(selected.sum()), int(half_stars[selected].sum())))
+        assert totals == expected
+        assert sum(count for count, _ in totals) == 5000
+    finally:
+        dataset.unlink()
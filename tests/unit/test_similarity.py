@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from run_similarity import SimilarityBuilder, plan_row_chunks
+from src.aggregators.similarity import build_item_matrix, top_k_similar
+
+
+def test_top_k_matches_dense_cosine_similarity():
+    rng = np.random.default_rng(7)
+    movie_ids = rng.integers(100, 130, size=600)
+    user_ids = rng.integers(1, 40, size=600)
+    ratings = rng.integers(1, 11, size=600) / 2
+    movie_index, matrix = build_item_matrix(movie_ids, user_ids, ratings)
+
+    dense = matrix.toarray()
+    expected = dense @ dense.T
+    np.fill_diagonal(expected, 0)
+    chunks = [
+        top_k_similar(matrix, start, end, k=3)
+        for start, end in plan_row_chunks(len(movie_index), 7)
+    ]
+    sources, targets, scores = (np.concatenate(column) for column in zip(*chunks))
+
+    assert np.allclose(scores, expected[sources, targets])
+    for row in range(len(movie_index)):
+        top = np.sort(expected[row])[::-1][:3]
+        assert np.allclose(scores[sources == row], top)
+    assert not np.any(sources == targets)
+
+
+def test_adjusted_cosine_centers_each_user_on_their_mean():
+    movie_index, matrix = build_item_matrix(
+        np.array([1, 2, 1, 2]),
+        np.array([10, 10, 20, 20]),
+        np.array([5.0, 3.0, 2.0, 4.0]),
+        method="adjusted_cosine",
+    )
+    sources, targets, scores = top_k_similar(matrix, 0, 2, k=5, min_score=-1.0)
+    assert movie_index.tolist() == [1, 2]
+    assert np.allclose(scores, [-1.0, -1.0])
+    with pytest.raises(ValueError):
+        build_item_matrix(movie_index, movie_index, movie_index, method="jaccard")
+
+
+class RecordingSession:
+    def __init__(self):
+        self.calls = []
+
+    def run(self, query, **params):
+        self.calls.append(params)
+
+
+def test_each_batch_replaces_older_neighbours_of_its_sources():
+    builder = SimilarityBuilder()
+    builder.write_batch_size = 2
+    session = RecordingSession()
+    neighbors = (np.array([0, 0, 1]), np.array([1, 2, 0]), np.array([0.9, 0.5, 0.9]))
+
+    written = builder.publish(session, np.array([10, 20, 30]), neighbors, "v2")
+
+    assert written == 3
+    assert [call["sources"] for call in session.calls] == [[10], [20]]
+    assert all(call["version"] == "v2" for call in session.calls)
+    assert session.calls[1]["batch"] == [{"source": 20, "target": 10, "score": 0.9}]
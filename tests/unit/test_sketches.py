@@ -0,0 +1,43 @@
+import numpy as np
+
+from src.aggregators.sketches import (
+    HLL_RELATIVE_ERROR,
+    HyperLogLog,
+    half_star_histograms,
+    histogram_quantiles,
+    monthly_hyperloglogs,
+)
+
+
+def test_histogram_quantiles_use_nearest_rank():
+    ratings = np.random.default_rng(3).integers(1, 11, size=(40, 25))
+    codes = np.repeat(np.arange(40), 25)
+    histograms = half_star_histograms(codes, ratings.ravel(), 40)
+
+    for q in (0.5, 0.9):
+        expected = np.quantile(ratings / 2, q, axis=1, method="inverted_cdf")
+        assert np.array_equal(histogram_quantiles(histograms, q), expected)
+
+
+def test_hyperloglog_merge_round_trip_and_error_bound():
+    left = HyperLogLog().add(np.arange(0, 60_000))
+    right = HyperLogLog().add(np.arange(40_000, 100_000))
+    small = HyperLogLog().add([7, 7, 8])
+
+    merged = HyperLogLog.from_bytes(left.to_bytes()).merge(
+        HyperLogLog.from_bytes(right.to_bytes())
+    )
+
+    assert abs(merged.estimate() / 100_000 - 1) < 4 * HLL_RELATIVE_ERROR
+    assert len(small.to_bytes()) < 16
+    assert HyperLogLog.from_bytes(small.to_bytes()).estimate() == 2
+
+
+def test_monthly_sketches_split_users_by_calendar_month():
+    day = 86_400
+    sketches = monthly_hyperloglogs(
+        np.array([1, 2, 2, 3]), np.array([0, day, 2 * day, 40 * day])
+    )
+
+    assert [str(month) for month in sketches] == ["1970-01", "1970-02"]
+    assert [sketch.estimate() for sketch in sketches.values()] == [2, 1]
@@ -0,0 +1,76 @@
+from benchmarks.fakes import FakeLoader
+from src.conductor import PipelineConductor
+from src.extractors.spilling_extractor import SpillingExtractor
+from tests.unit.test_cached_extractor import InMemoryRatingsExtractor, make_rows
+
+
+class LaggingLoader(FakeLoader):
+    pass
+
+
+def test_lagging_consumer_drains_from_disk_and_queue_is_trimmed(tmp_path):
+    source = InMemoryRatingsExtractor(make_rows(10))
+    spilling = SpillingExtractor(source, directory=str(tmp_path), max_bytes=10**7)
+    spilling.acknowledge("LaggingLoader", (3, 1))
+
+    fast = PipelineConductor(extractor=spilling, loaders=[FakeLoader((0, 0))])
+    fast.batch_size = 4
+    assert fast.run_concurrently() == {}
+    reads_by_fast = source.reads
+    assert spilling.queue.total_bytes > 0
+
+    restarted = SpillingExtractor(source, directory=str(tmp_path))
+    lagging_loader = LaggingLoader((3, 1))
+    lagging = PipelineConductor(extractor=restarted, loaders=[lagging_loader])
+    lagging.batch_size = 3
+    assert lagging.run_concurrently() == {}
+
+    assert lagging_loader.rows_written == 15
+    assert source.reads == reads_by_fast + 1
+    assert restarted.queue.consumers == {
+        "FakeLoader": (10, 2),
+        "LaggingLoader": (10, 2),
+    }
+    assert restarted.queue.total_bytes == 0
+
+
+def test_registered_consumer_that_starts_late_reads_from_disk(tmp_path):
+    source = InMemoryRatingsExtractor(make_rows(10))
+    spilling = SpillingExtractor(source, directory=str(tmp_path), max_bytes=10**7)
+    spilling.register_consumer("FakeLoader")
+    spilling.register_consumer("LaggingLoader")
+
+    first = PipelineConductor(extractor=spilling, loaders=[FakeLoader((0, 0))])
+    first.batch_size = 4
+    assert first.run_concurrently() == {}
+    reads_by_first = source.reads
+    assert spilling.queue.consumers["LaggingLoader"] is None
+
+    late_loader = LaggingLoader((0, 0))
+    late = PipelineConductor(extractor=spilling, loaders=[late_loader])
+    late.batch_size = 4
+    assert late.run_concurrently() == {}
+
+    assert late_loader.rows_written == 20
+    assert source.reads == reads_by_first + 1
+    assert spilling.queue.total_bytes == 0
+
+
+def test_retired_consumers_stop_pinning_segments(tmp_path):
+    source = InMemoryRatingsExtractor(make_rows(10))
+    spilling = SpillingExtractor(
+        source, directory=str(tmp_path), max_bytes=10**7, consumer_ttl_seconds=60
+    )
+    spilling.register_consumer("Retired")
+    spilling.register_consumer("Stale")
+    spilling.queue._manifest["consumers_seen_at"]["Stale"] -= 120
+
+    conductor = PipelineConductor(extractor=spilling, loaders=[FakeLoader((0, 0))])
+    conductor.batch_size = 4
+    assert conductor.run_concurrently() == {}
+    assert set(spilling.queue.consumers) == {"FakeLoader", "Retired"}
+    assert spilling.queue.total_bytes > 0
+
+    spilling.queue.remove_consumer("Retired")
+    assert spilling.queue.consumers == {"FakeLoader": (10, 2)}
+    assert spilling.queue.total_bytes == 0
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.fakes import FakeLoader, FakeRatingsExtractor
+from src.aggregators.streaming_aggregator import StreamingRatingsAggregator
+from src.conductor import PipelineConductor
+
+
+def test_streamed_summary_matches_batch_aggregation_and_resumes(tmp_path):
+    extractor = FakeRatingsExtractor(num_ratings=2000, num_movies=60)
+    checkpoint_path = str(tmp_path / "streaming.npz")
+    aggregator = StreamingRatingsAggregator(
+        FakeLoader(initial_hwm=(0, 0)), extractor, checkpoint_path=checkpoint_path
+    )
+    conductor = PipelineConductor(extractor=extractor, loaders=[aggregator])
+    conductor.batch_size = 300
+    assert conductor.run_concurrently() == {}
+
+    df = pd.DataFrame(
+        {"movie_id": extractor.movie_ids, "rating": extractor.half_stars / 2}
+    )
+    grouped = df.groupby("movie_id")["rating"]
+    expected = [
+        (
+            int(movie_id),
+            round(ratings.mean(), 5),
+            len(ratings),
+            float(np.quantile(ratings, 0.5, method="inverted_cdf")),
+            float(np.quantile(ratings, 0.9, method="inverted_cdf")),
+        )
+        for movie_id, ratings in grouped
+    ]
+    assert [row[:5] for row in aggregator.summary()] == expected
+    assert sum(row[2] for row in aggregator.summary()) == 2000
+
+    aggregator.checkpoint()
+    resumed = StreamingRatingsAggregator(
+        FakeLoader(initial_hwm=aggregator.high_water_mark),
+        extractor,
+        checkpoint_path=checkpoint_path,
+    )
+    assert resumed.get_high_water_mark() == aggregator.high_water_mark
+    assert resumed.summary() == aggregator.summary()
+    assert resumed.monthly_raters.keys() == aggregator.monthly_raters.keys()
@@ -0,0 +1,53 @@
+import sqlite3
+from decimal import Decimal
+
+from benchmarks.fakes import FakeDriver
+from run_summary_sync import CHANGED_SUMMARIES_QUERY, SummarySync
+
+
+def test_changed_summaries_query_finds_new_changed_and_removed_movies():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("ATTACH DATABASE ':memory:' AS movies")
+    conn.execute("ATTACH DATABASE ':memory:' AS jobs")
+    conn.execute(
+        "CREATE TABLE movies.ratings_summary "
+        "(movie_id INT, average_rating TEXT, rating_count INT)"
+    )
+    conn.execute(
+        "CREATE TABLE jobs.neo4j_summary_sync "
+        "(movie_id INT, average_rating TEXT, rating_count INT)"
+    )
+    conn.executemany(
+        "INSERT INTO movies.ratings_summary VALUES (?, ?, ?)",
+        [(1, "4.00000", 2), (2, "3.75000", 5), (3, "2.00000", 1), (5, "1.0", 1)],
+    )
+    conn.executemany(
+        "INSERT INTO jobs.neo4j_summary_sync VALUES (?, ?, ?)",
+        [(1, "4.00000", 2), (2, "3.50000", 4), (4, "5.00000", 1), (5, "1.0", 2)],
+    )
+
+    assert conn.execute(CHANGED_SUMMARIES_QUERY).fetchall() == [
+        (2, "3.75000", 5),
+        (3, "2.00000", 1),
+        (4, None, None),
+        (5, "1.0", 1),
+    ]
+
+
+def test_only_movies_matched_in_neo4j_are_recorded_as_synced():
+    changed = [
+        (1, Decimal("4.00000"), 2),
+        (2, Decimal("3.75000"), 5),
+        (3, Decimal("2.00000"), 1),
+        (4, None, None),
+    ]
+    recorded = []
+    sync = SummarySync()
+    sync.write_batch_size = 3
+    sync._get_connection = lambda: sqlite3.connect(":memory:")
+    sync._get_driver = lambda: FakeDriver(movie_ids={1, 3})
+    sync.changed_summaries = lambda conn: changed
+    sync.record_synced = lambda conn, rows: recorded.extend(rows)
+
+    assert sync.run() == 3
+    assert recorded == [changed[0], changed[2], changed[3]]
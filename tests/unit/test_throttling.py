@@ -0,0 +1,66 @@
+import time
+
+from src.throttling import AdaptiveConcurrencyLimiter, ReplicaRouter, TokenBucket
+
+
+def test_token_bucket_charges_debt_as_wait_time():
+    bucket = TokenBucket(rate=1000, burst=50)
+    assert bucket.acquire(50) == 0.0
+    started = time.monotonic()
+    waited = bucket.acquire(100)
+    assert 0.09 <= waited <= 0.11
+    assert time.monotonic() - started >= 0.09
+    assert TokenBucket(rate=0).acquire(10**9) == 0.0
+
+
+def test_concurrency_halves_on_latency_spike_and_recovers_additively():
+    limiter = AdaptiveConcurrencyLimiter("test", max_limit=8, latency_tolerance=2.0)
+    for _ in range(5):
+        limiter.observe(0.001)
+    assert limiter.limit == 8
+
+    limiter.observe(0.01)
+    limiter.observe(0.01)
+    assert int(limiter.limit) == 2
+
+    for _ in range(20):
+        limiter.observe(0.001)
+    assert 2 < limiter.limit < 8
+
+
+class FakeReplicaConnection:
+    def __init__(self, status):
+        self.status = status
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, query):
+        pass
+
+    def fetchall(self):
+        return self.status
+
+
+def test_replica_router_falls_back_to_primary_when_lagging():
+    statuses = [[{"Seconds_Behind_Source": 3}], [{"Seconds_Behind_Source": 90}], []]
+    primary = {"host": "primary"}
+    router = ReplicaRouter(
+        primary,
+        {"host": "replica"},
+        max_lag_seconds=30,
+        connect=lambda **config: FakeReplicaConnection(statuses.pop(0)),
+        check_interval=0,
+    )
+    assert [router.read_config()["host"] for _ in range(3)] == [
+        "replica",
+        "primary",
+        "primary",
+    ]
+    assert ReplicaRouter(primary, None, 30, connect=None).read_config() is primary
@@ -0,0 +1,30 @@
+import json
+
+from benchmarks.fakes import FakeLoader, FakeMoviesExtractor
+from config.config import settings
+from src import tracing
+from src.conductor import PipelineConductor
+
+
+def test_spans_from_conductor_threads_share_the_run_trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings.tracing, "output_dir", str(tmp_path))
+    parent = "00-" + "a" * 32 + "-" + "b" * 16 + "-01"
+    run_id = tracing.init(role="test", traceparent=parent, enabled=True)
+
+    with tracing.span("stage.movies") as stage:
+        conductor = PipelineConductor(
+            extractor=FakeMoviesExtractor(25), loaders=[FakeLoader(), FakeLoader()]
+        )
+        conductor.batch_size = 10
+        conductor.run_concurrently()
+
+    with open(tracing.merge_trace(str(tmp_path), run_id)) as f:
+        events = [e for e in json.load(f)["traceEvents"] if e["ph"] == "X"]
+
+    assert run_id == "a" * 32
+    assert {e["args"]["trace_id"] for e in events} == {run_id}
+    pipelines = [e for e in events if e["name"] == "conductor.pipeline"]
+    assert [e["args"]["parent_span_id"] for e in pipelines] == [stage.span_id] * 2
+    writes = [e for e in events if e["name"] == "conductor.write"]
+    assert len(writes) == 2 * 3
+    tracing.init(role="test", enabled=False)